@@ -156,3 +156,54 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# RL agent
+# Model files are shared by all workers; each worker reloads the agent when the
+# saved model changes, checking at most every RL_AGENT_CHECK_INTERVAL seconds.
+
+RL_MODEL_DIR = BASE_DIR / 'api' / 'models'
+RL_AGENT_BACKEND = 'numpy'
+RL_AGENT_CHECK_INTERVAL = 2.0
+
+# Segment classifier
+# Loaded once per process and reloaded when the file changes. Enable warm-up to
+# load it at startup (in every process, including management commands) instead
+# of on the first signup.
+
+SEGMENT_MODEL_PATH = BASE_DIR / 'Datasets,Models' / 'final_RF.pkl'
+SEGMENT_MODEL_WARMUP = False
+
+# Workout catalog
+# Optional JSON/YAML file replacing the built-in activity and program catalogs
+# (see workout/catalog.py); reloaded when the file changes.
+
+WORKOUT_CATALOG_PATH = None
+
+# Notifications
+# The list endpoint evaluates the notification rules for the polling user before
+# reading. Set to False when the generate_notifications scheduler runs, so a
+# poll is a plain indexed read.
+
+NOTIFICATIONS_EVALUATE_ON_POLL = True
+
+# Weekly stats are sent by `generate_notifications --weekly-digest` for all
+# users at once; when True, rule evaluation on polls no longer builds them.
+# docker-compose runs the notifications_scheduler service with --weekly-digest.
+# Set to False when running without it.
+
+NOTIFICATIONS_WEEKLY_DIGEST_JOB = True
+
+# Server-Sent Events stream (notifications/push.py). The default broker polls
+# each user's notification version every NOTIFICATIONS_STREAM_POLL_INTERVAL
+# seconds; 'notifications.push.InProcessBroker' skips polling when notifications
+# are only created by the serving process.
+
+NOTIFICATIONS_PUSH_BROKER = 'notifications.push.VersionPollingBroker'
+NOTIFICATIONS_STREAM_POLL_INTERVAL = 2.0
+NOTIFICATIONS_STREAM_HEARTBEAT = 15.0
+NOTIFICATIONS_STREAM_TIMEOUT = 300.0
+
+# Random row samplers (api/sampling.py) cache eligible IDs in memory; saves and
+# deletes in this process clear them, other changes show up after this many seconds.
+
+RANDOM_SAMPLER_TTL = 300
@@ -8,3 +8,8 @@ class ApiConfig(AppConfig):
     def ready(self):
         """Import signals when app is ready"""
         import api.signals  # noqa
+
+        from django.conf import settings
+        if getattr(settings, 'SEGMENT_MODEL_WARMUP', False):
+            from api.segmentation import warm_up
+            warm_up()
@@ -0,0 +1,197 @@
+"""
+Per-user daily activity rollup (UserDailyActivity).
+
+One row per user and local calendar day with at least one completed
+activity, holding that day's counts, minutes and feedback sums. Statistics,
+streaks and the weekly digest read these rows instead of the activity
+history, so a 90-day chart is a range read of at most 90 rows.
+
+api.signals keeps the rows current: an activity change is applied as a
+delta to the day it left and the day it joined, inside the same transaction
+as the UserStatistics update. `rebuild_daily_activity` recomputes the rows
+from Activity; the full statistics recompute and the
+`backfill_daily_activity` command use it.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from workout.models import Activity
+from .models import UserDailyActivity
+
+# Activity columns that feed a day's totals.
+SOURCE_FIELDS = (
+    'completed',
+    'completion_date',
+    'activity_type',
+    'duration_minutes',
+    'motivation_delta',
+    'motivation_after',
+    'enjoyment_rating',
+    'difficulty_rating',
+)
+
+# UserDailyActivity columns that are plain sums of per-activity contributions.
+DAY_FIELDS = (
+    'completed_count',
+    'exercise_count',
+    'meditation_count',
+    'journaling_count',
+    'total_minutes',
+    'exercise_minutes',
+    'meditation_minutes',
+    'motivation_delta_sum',
+    'motivation_delta_count',
+    'motivation_after_sum',
+    'motivation_after_count',
+    'enjoyment_rating_sum',
+    'enjoyment_rating_count',
+    'difficulty_rating_sum',
+    'difficulty_rating_count',
+)
+
+TYPE_COUNTS = {
+    'exercise': 'exercise_count',
+    'meditation': 'meditation_count',
+    'journaling': 'journaling_count',
+}
+
+TYPE_MINUTES = {
+    'exercise': 'exercise_minutes',
+    'meditation': 'meditation_minutes',
+}
+
+FEEDBACK_FIELDS = ('motivation_delta', 'motivation_after', 'enjoyment_rating', 'difficulty_rating')
+
+
+def day_contribution(values):
+    """
+    (local day, {column: value}) a single activity adds to the rollup, or
+    (None, {}) when it is not a completed activity.
+    """
+    if values is None or not values['completed'] or values['completion_date'] is None:
+        return None, {}
+
+    minutes = values['duration_minutes'] or 0
+    contribution = {'completed_count': 1, 'total_minutes': minutes}
+
+    activity_type = values['activity_type']
+    if activity_type in TYPE_COUNTS:
+        contribution[TYPE_COUNTS[activity_type]] = 1
+    if activity_type in TYPE_MINUTES:
+        contribution[TYPE_MINUTES[activity_type]] = minutes
+
+    for field in FEEDBACK_FIELDS:
+        if values[field] is not None:
+            contribution[f'{field}_sum'] = values[field]
+            contribution[f'{field}_count'] = 1
+
+    return timezone.localdate(values['completion_date']), contribution
+
+
+def day_deltas(previous, current):
+    """
+    {day: {column: change}} moving an activity from its `previous` values to
+    its `current` ones (either may be None for a create or delete).
+    """
+    deltas = defaultdict(Counter)
+    for values, sign in ((previous, -1), (current, 1)):
+        day, contribution = day_contribution(values)
+        if day is None:
+            continue
+        for field, value in contribution.items():
+            deltas[day][field] += sign * value
+
+    return {
+        day: {field: change for field, change in delta.items() if change}
+        for day, delta in deltas.items()
+        if any(delta.values())
+    }
+
+
+def apply_day_deltas(user_id, deltas):
+    """
+    Add `deltas` (from `day_deltas`) to the user's day rows, creating and
+    dropping rows as days gain their first or lose their last completion.
+
+    Callers hold the user's UserStatistics row lock, which keeps the
+    update-then-create below free of races between writers of one user.
+    """
+    for day, delta in deltas.items():
+        rows = UserDailyActivity.objects.filter(user_id=user_id, date=day)
+        updated = rows.update(**{field: _added(field, change) for field, change in delta.items()})
+        if not updated:
+            # A withdrawal from a day without a row is drift; reconciliation repairs it.
+            UserDailyActivity.objects.create(
+                user_id=user_id,
+                date=day,
+                **{field: _clamped(field, change) for field, change in delta.items()},
+            )
+        elif delta.get('completed_count', 0) < 0:
+            rows.filter(completed_count__lte=0).delete()
+
+
+def _clamped(field, value):
+    # Only the motivation delta sum may be negative.
+    return value if field == 'motivation_delta_sum' else max(0, value)
+
+
+def _added(field, change):
+    if change > 0 or field == 'motivation_delta_sum':
+        return F(field) + change
+    return Greatest(F(field) + change, 0)
+
+
+def _day_aggregates():
+    """Per-day columns over completed activities, grouped by the caller."""
+    aggregates = {
+        'completed_count': Count('id'),
+        'total_minutes': Sum('duration_minutes'),
+    }
+    for activity_type, field in TYPE_COUNTS.items():
+        aggregates[field] = Count('id', filter=Q(activity_type=activity_type))
+    for activity_type, field in TYPE_MINUTES.items():
+        aggregates[field] = Sum('duration_minutes', filter=Q(activity_type=activity_type))
+    for field in FEEDBACK_FIELDS:
+        aggregates[f'{field}_sum'] = Sum(field)
+        aggregates[f'{field}_count'] = Count(field)
+    return aggregates
+
+
+def rebuild_daily_activity(user_ids):
+    """
+    Recompute the day rows of `user_ids` from their activity history with one
+    grouped query, replacing whatever is stored.
+
+    Returns:
+        {user_id: [UserDailyActivity, ...]} ordered by date, for every user
+        given (users without completed activities map to an empty list).
+    """
+    user_ids = list(user_ids)
+    grouped = (
+        Activity.objects.filter(
+            user_id__in=user_ids,
+            completed=True,
+            completion_date__isnull=False,
+        )
+        .annotate(day=TruncDate('completion_date'))
+        .values('user_id', 'day')
+        .annotate(**_day_aggregates())
+        .order_by('user_id', 'day')
+    )
+
+    days = {user_id: [] for user_id in user_ids}
+    for row in grouped:
+        days[row['user_id']].append(UserDailyActivity(
+            user_id=row['user_id'],
+            date=row['day'],
+            **{field: row[field] or 0 for field in DAY_FIELDS},
+        ))
+
+    with transaction.atomic():
+        UserDailyActivity.objects.filter(user_id__in=user_ids).delete()
+        UserDailyActivity.objects.bulk_create([day for rows in days.values() for day in rows])
+    return days
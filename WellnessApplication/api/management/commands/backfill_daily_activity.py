@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api.daily_activity import rebuild_daily_activity
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the UserDailyActivity rollup from the activity history. Run once "
+        "after migrating; afterwards activity signals keep it current. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="usernames",
+            default=None,
+            help="Only rebuild this username (may be repeated).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Users rebuilt per grouped query (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+
+        users = get_user_model().objects.order_by("pk")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+        user_ids = list(users.values_list("pk", flat=True))
+
+        day_rows = 0
+        for start in range(0, len(user_ids), batch_size):
+            rebuilt = rebuild_daily_activity(user_ids[start:start + batch_size])
+            day_rows += sum(len(days) for days in rebuilt.values())
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Daily activity backfill complete. Users: {len(user_ids)}. Day rows: {day_rows}."
+            )
+        )
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api.rl_agent import RLModelManager, STATE_RADICES, WellnessRLAgent
+
+
+class Command(BaseCommand):
+    help = "Compare save/load time of the legacy JSON and the binary RL model format by table size."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="Numbers of visited states to benchmark.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed for the generated Q-tables.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"]
+        if any(size <= 0 for size in sizes):
+            raise CommandError("--sizes must be greater than zero.")
+
+        rng = np.random.default_rng(options["seed"])
+        total_states = int(np.prod(STATE_RADICES))
+
+        self.stdout.write(
+            f"{'states':>8} {'json save':>10} {'json load':>10} {'npy save':>10} {'npy load':>10} {'json MB':>8} {'npy MB':>8}"
+        )
+        for size in sizes:
+            keys = np.unique(rng.integers(0, total_states, size=size, dtype=np.int64))
+            values = rng.random((len(keys), 6), dtype=np.float32)
+            agent = WellnessRLAgent(backend="numpy")
+            agent.load_q_table_arrays(keys, values)
+
+            with tempfile.TemporaryDirectory() as model_dir:
+                json_save, json_load, json_size = self._time_legacy_json(agent, model_dir)
+                npy_save, npy_load, npy_size = self._time_binary(agent, model_dir)
+
+            self.stdout.write(
+                f"{len(keys):>8} {json_save:>9.1f}ms {json_load:>9.1f}ms "
+                f"{npy_save:>9.1f}ms {npy_load:>9.1f}ms "
+                f"{json_size / 1e6:>8.2f} {npy_size / 1e6:>8.2f}"
+            )
+
+    def _time_legacy_json(self, agent, model_dir):
+        manager = RLModelManager(model_dir=model_dir)
+        agent_data = {
+            "q_table": agent.get_q_table_dict(),
+            "epsilon": agent.epsilon,
+            "training_history": agent.training_history,
+            "hyperparameters": {},
+        }
+
+        started = time.perf_counter()
+        with open(manager.model_path, "w") as f:
+            json.dump(agent_data, f, indent=2)
+        saved = time.perf_counter()
+        manager._load_legacy_json()
+        loaded = time.perf_counter()
+
+        size = os.path.getsize(manager.model_path)
+        os.remove(manager.model_path)
+        return (saved - started) * 1000, (loaded - saved) * 1000, size
+
+    def _time_binary(self, agent, model_dir):
+        manager = RLModelManager(model_dir=model_dir, backend="numpy")
+
+        started = time.perf_counter()
+        manager.save_agent(agent)
+        saved = time.perf_counter()
+        manager.load_agent()
+        loaded = time.perf_counter()
+
+        size = sum(
+            os.path.getsize(os.path.join(model_dir, name))
+            for name in os.listdir(model_dir)
+        )
+        return (saved - started) * 1000, (loaded - saved) * 1000, size
@@ -0,0 +1,107 @@
+import statistics
+import time
+import warnings
+
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.segmentation import encode_features, get_classifier
+from api.serializers import RegisterSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare signup latency with a per-request model load (previous behaviour) "
+        "against the in-memory segment classifier. Created users are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Signups to time per mode.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Profiles for the predict_segments batch timing.",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        if iterations <= 0:
+            raise CommandError("--iterations must be greater than zero.")
+
+        # The bundled model was pickled with a newer scikit-learn.
+        warnings.filterwarnings("ignore", module="sklearn")
+        classifier = get_classifier()
+
+        load_per_call = self._time(iterations, lambda i: self._legacy_prediction(classifier.path))
+        classifier.model()
+        in_memory = self._time(iterations, lambda i: classifier.predict_segment(self._profile(i)))
+
+        signup_before = self._time(iterations, lambda i: self._signup(i, reset=classifier))
+        classifier.model()
+        signup_after = self._time(iterations, lambda i: self._signup(i))
+
+        batch = [self._profile(i) for i in range(options["batch_size"])]
+        started = time.perf_counter()
+        classifier.predict_segments(batch)
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(f"{'':<28}{'median':>10}{'max':>10}")
+        for label, samples in (
+            ("load + predict per call", load_per_call),
+            ("in-memory predict", in_memory),
+            ("signup, model per request", signup_before),
+            ("signup, in-memory model", signup_after),
+        ):
+            self.stdout.write(f"{label:<28}{statistics.median(samples):>8.1f}ms{max(samples):>8.1f}ms")
+        self.stdout.write(f"predict_segments({len(batch)}): {batch_ms:.1f}ms")
+
+    def _time(self, iterations, call):
+        samples = []
+        for i in range(iterations):
+            started = time.perf_counter()
+            call(i)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    def _legacy_prediction(self, path):
+        model = joblib.load(path)
+        return model.predict(np.array([encode_features(self._profile(0))]))[0]
+
+    def _profile(self, i):
+        return {
+            "age": 20 + i % 50,
+            "gender": ("male", "female")[i % 2],
+            "exercise_level": ("low", "moderate", "high")[i % 3],
+            "diet_type": "balanced",
+            "sleep_hours": 4 + i % 5,
+            "stress_level": ("low", "moderate", "high")[i % 3],
+            "mental_health_condition": "none",
+            "work_hours_per_week": 30 + i % 40,
+            "screen_time_per_day": 2.0 + i % 8,
+            "self_reported_social_interaction_score": i % 11,
+            "happiness_score": (i * 3) % 11,
+        }
+
+    def _signup(self, i, reset=None):
+        if reset is not None:
+            reset.reset()
+        data = {
+            **self._profile(i),
+            "email": f"segment-benchmark-{i}@example.com",
+            "username": f"segment-benchmark-{i}",
+            "password": "BenchmarkPass123!",
+            "password2": "BenchmarkPass123!",
+        }
+        with transaction.atomic():
+            serializer = RegisterSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            transaction.set_rollback(True)
@@ -7,7 +7,7 @@ from django.db import transaction
 from django.db.models import Avg
 from django.utils import timezone
 
-from api.signals import _update_user_statistics
+from api.signals import _update_user_statistics, deferred_statistics
 from workout.activities import ACTIVITIES_BY_SEGMENT
 from workout.models import Activity, WorkoutSession
 
@@ -90,7 +90,7 @@ class Command(BaseCommand):
                 self._refresh_rollups(user)
                 continue
 
-            with transaction.atomic():
+            with deferred_statistics(), transaction.atomic():
                 if force:
                     WorkoutSession.objects.filter(
                         user=user,
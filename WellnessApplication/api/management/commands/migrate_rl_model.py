@@ -0,0 +1,61 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.rl_agent import RLModelManager, STATE_RADICES
+from api.rl_registry import model_write_lock, rl_model_dir
+
+
+class Command(BaseCommand):
+    help = "Convert the legacy JSON RL model (wellness_rl_agent.json) to the binary model format."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model-dir",
+            default=None,
+            help="Directory holding the RL model files (default: settings.RL_MODEL_DIR).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Overwrite an existing binary model.",
+        )
+        parser.add_argument(
+            "--remove-json",
+            action="store_true",
+            help="Delete the legacy JSON file after a successful migration.",
+        )
+
+    def handle(self, *args, **options):
+        manager = RLModelManager(model_dir=options["model_dir"] or rl_model_dir(), backend="numpy")
+
+        if not os.path.exists(manager.model_path):
+            raise CommandError(f"No legacy model found at {manager.model_path}.")
+        if manager.has_binary_model() and not options["force"]:
+            self.stdout.write("Binary model already present. Use --force to migrate again.")
+            return
+
+        with open(manager.model_path, "r") as f:
+            legacy_states = len(json.load(f).get("q_table", {}))
+
+        with model_write_lock(manager.model_dir):
+            agent = manager._load_legacy_json()
+            manager.save_agent(agent)
+
+        # Verify the new files load back before touching the legacy model.
+        migrated = manager.load_agent()
+        if len(migrated.q_table) != len(agent.q_table):
+            raise CommandError("Migrated model does not match the legacy model; JSON file kept.")
+
+        if options["remove_json"]:
+            os.remove(manager.model_path)
+
+        dropped = legacy_states - len(agent.q_table)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "RL model migration complete. "
+                f"States migrated: {len(agent.q_table)}. "
+                f"States dropped (not {len(STATE_RADICES)}-part encodings): {dropped}."
+            )
+        )
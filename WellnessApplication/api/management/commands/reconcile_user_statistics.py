@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.forms.models import model_to_dict
+
+from api.models import UserStatistics
+from api.signals import _update_user_statistics
+
+# Bookkeeping columns that change on every save and are not compared.
+IGNORED_FIELDS = ("id", "user", "last_updated", "created_at")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute UserStatistics from the full activity history and repair rows "
+        "whose incrementally maintained counters have drifted. Safe to run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="usernames",
+            default=None,
+            help="Only reconcile this username (may be repeated).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted rows without saving the recomputed values.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        users = get_user_model().objects.order_by("pk")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+
+        checked = 0
+        repaired = 0
+
+        for user in users.iterator():
+            checked += 1
+            with transaction.atomic():
+                stored = UserStatistics.objects.select_for_update().filter(user=user).first()
+                before = _snapshot(stored) if stored else None
+
+                rebuilt = _update_user_statistics(user)
+                after = _snapshot(rebuilt)
+
+                if before == after:
+                    continue
+
+                repaired += 1
+                drifted = sorted(
+                    field for field in after if before is None or before.get(field) != after[field]
+                )
+                self.stdout.write(f"{user.username}: {', '.join(drifted)}")
+
+                if dry_run:
+                    transaction.set_rollback(True)
+
+        verb = "would be repaired" if dry_run else "repaired"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Statistics reconciliation complete. Users checked: {checked}. Rows {verb}: {repaired}."
+            )
+        )
+
+
+def _snapshot(stats):
+    values = model_to_dict(stats)
+    for field in IGNORED_FIELDS:
+        values.pop(field, None)
+    return values
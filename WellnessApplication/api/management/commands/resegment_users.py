@@ -0,0 +1,108 @@
+import time
+import warnings
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import SEGMENT_CHOICES
+from api.segmentation import FEATURE_FIELDS, feature_matrix, get_classifier
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-score every user with the current segment model (Datasets,Models/final_RF.pkl) "
+        "and save the labels that changed. Run after retraining the model."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Users classified per model call and per bulk_update.",
+        )
+        parser.add_argument(
+            "--n-jobs",
+            type=int,
+            default=None,
+            help="Parallel jobs for the forest's predict (-1 uses every core).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the changes without saving them.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be greater than zero.")
+        dry_run = options["dry_run"]
+
+        classifier = get_classifier()
+        model = classifier.model()
+        if options["n_jobs"] is not None and hasattr(model, "n_jobs"):
+            model.set_params(n_jobs=options["n_jobs"])
+
+        User = get_user_model()
+        rows = (
+            User.objects.order_by("pk")
+            .values_list("pk", "segment_label", *FEATURE_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+
+        transitions = Counter()
+        processed = 0
+        changed = 0
+        started = time.perf_counter()
+
+        with warnings.catch_warnings():
+            # The model was fitted on a DataFrame; predicting on arrays is intended.
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    changed += self._resegment(User, classifier, chunk, transitions, dry_run)
+                    processed += len(chunk)
+                    chunk = []
+            if chunk:
+                changed += self._resegment(User, classifier, chunk, transitions, dry_run)
+                processed += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed else 0.0
+
+        self._write_confusion(transitions)
+        verb = "would change" if dry_run else "changed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-segmented {processed} users in {elapsed:.2f}s ({rate:.0f} rows/s). "
+                f"Labels {verb}: {changed}."
+            )
+        )
+
+    def _resegment(self, User, classifier, chunk, transitions, dry_run):
+        segments = classifier.predict_matrix(feature_matrix([row[2:] for row in chunk]))
+
+        updates = []
+        for (pk, old_label, *_), new_label in zip(chunk, segments.tolist()):
+            transitions[(old_label, new_label)] += 1
+            if old_label != new_label:
+                updates.append(User(pk=pk, segment_label=new_label))
+
+        if updates and not dry_run:
+            User.objects.bulk_update(updates, ["segment_label"], batch_size=len(chunk))
+        return len(updates)
+
+    def _write_confusion(self, transitions):
+        segment_ids = [segment_id for segment_id, _ in SEGMENT_CHOICES]
+        old_labels = sorted({old for old, _ in transitions}, key=lambda label: (label is None, label))
+
+        self.stdout.write("Old segment (rows) vs new segment (columns):")
+        self.stdout.write("old\\new" + "".join(f"{segment_id:>8}" for segment_id in segment_ids))
+        for old in old_labels:
+            name = "none" if old is None else str(old)
+            counts = "".join(f"{transitions[(old, new)]:>8}" for new in segment_ids)
+            self.stdout.write(f"{name:<7}{counts}")
@@ -0,0 +1,93 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import RLTransition
+from api.rl_agent import RLModelManager
+from api.rl_registry import rl_model_dir
+from api.rl_training import train_pending_transitions
+
+
+class Command(BaseCommand):
+    help = "Train the RL agent from queued feedback transitions in batches and checkpoint the model."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Transitions applied per vectorized update.",
+        )
+        parser.add_argument(
+            "--checkpoint-every",
+            type=int,
+            default=10,
+            help="Save the model after this many batches.",
+        )
+        parser.add_argument(
+            "--max-transitions",
+            type=int,
+            default=None,
+            help="Stop after this many transitions (default: drain the queue).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new transitions.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=30.0,
+            help="Seconds to wait between polls with --loop.",
+        )
+        parser.add_argument(
+            "--purge-after-days",
+            type=int,
+            default=30,
+            help="Delete processed transitions older than this many days (0 keeps them).",
+        )
+        parser.add_argument(
+            "--model-dir",
+            default=None,
+            help="Directory holding the RL model files (default: settings.RL_MODEL_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be greater than zero.")
+        if options["checkpoint_every"] <= 0:
+            raise CommandError("--checkpoint-every must be greater than zero.")
+
+        manager = RLModelManager(model_dir=options["model_dir"] or rl_model_dir(), backend="numpy")
+
+        while True:
+            report = train_pending_transitions(
+                manager,
+                batch_size=options["batch_size"],
+                checkpoint_every=options["checkpoint_every"],
+                max_transitions=options["max_transitions"],
+            )
+            if report["transitions"] or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        "RL training complete. "
+                        f"Transitions: {report['transitions']}. "
+                        f"Batches: {report['batches']}. "
+                        f"Checkpoints: {report['checkpoints']}. "
+                        f"Throughput: {report['transitions_per_second']:.0f} transitions/s "
+                        f"({report['seconds']:.2f}s). "
+                        f"Episodes: {report['episodes']}. "
+                        f"Epsilon: {report['epsilon']:.4f}."
+                    )
+                )
+
+            if options["purge_after_days"] > 0:
+                cutoff = timezone.now() - timedelta(days=options["purge_after_days"])
+                RLTransition.objects.filter(processed_at__lt=cutoff).delete()
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
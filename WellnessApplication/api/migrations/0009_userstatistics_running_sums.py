@@ -0,0 +1,72 @@
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_running_sums(apps, schema_editor):
+    UserStatistics = apps.get_model('api', 'UserStatistics')
+    Activity = apps.get_model('workout', 'Activity')
+
+    rows = (
+        Activity.objects.filter(completed=True)
+        .values('user_id')
+        .annotate(
+            motivation_delta_sum=Sum('motivation_delta'),
+            motivation_delta_count=Count('id', filter=Q(motivation_delta__isnull=False)),
+            enjoyment_rating_sum=Sum('enjoyment_rating'),
+            enjoyment_rating_count=Count('id', filter=Q(enjoyment_rating__isnull=False)),
+            difficulty_rating_sum=Sum('difficulty_rating'),
+            difficulty_rating_count=Count('id', filter=Q(difficulty_rating__isnull=False)),
+        )
+        .order_by()
+    )
+    for row in rows:
+        user_id = row.pop('user_id')
+        UserStatistics.objects.filter(user_id=user_id).update(
+            **{field: value or 0 for field, value in row.items()}
+        )
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_remove_customuser_primary_goal_and_workout_goal_days'),
+        ('workout', '0005_activity_duration_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstatistics',
+            name='motivation_delta_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstatistics',
+            name='motivation_delta_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstatistics',
+            name='enjoyment_rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstatistics',
+            name='enjoyment_rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstatistics',
+            name='difficulty_rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstatistics',
+            name='difficulty_rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_running_sums, reverse_code=noop_reverse),
+    ]
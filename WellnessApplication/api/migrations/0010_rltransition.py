@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_userstatistics_running_sums'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RLTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('engagement_feedback', 'Engagement Feedback'), ('recommend_feedback', 'Recommend Program Feedback'), ('session_feedback', 'Activity Session Feedback')], max_length=30)),
+                ('state', models.JSONField(help_text='User state before the action')),
+                ('action', models.PositiveSmallIntegerField()),
+                ('reward', models.FloatField()),
+                ('next_state', models.JSONField(help_text='User state after the action')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, help_text='When the trainer applied this sample', null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rl_transitions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='rl_transition_pending_idx')],
+            },
+        ),
+    ]
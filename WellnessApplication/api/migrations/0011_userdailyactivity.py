@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_rltransition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('exercise_count', models.PositiveIntegerField(default=0)),
+                ('meditation_count', models.PositiveIntegerField(default=0)),
+                ('journaling_count', models.PositiveIntegerField(default=0)),
+                ('total_minutes', models.PositiveIntegerField(default=0)),
+                ('exercise_minutes', models.PositiveIntegerField(default=0)),
+                ('meditation_minutes', models.PositiveIntegerField(default=0)),
+                ('motivation_delta_sum', models.IntegerField(default=0)),
+                ('motivation_delta_count', models.PositiveIntegerField(default=0)),
+                ('motivation_after_sum', models.PositiveIntegerField(default=0)),
+                ('motivation_after_count', models.PositiveIntegerField(default=0)),
+                ('enjoyment_rating_sum', models.PositiveIntegerField(default=0)),
+                ('enjoyment_rating_count', models.PositiveIntegerField(default=0)),
+                ('difficulty_rating_sum', models.PositiveIntegerField(default=0)),
+                ('difficulty_rating_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Daily Activity',
+                'verbose_name_plural': 'User Daily Activity',
+                'indexes': [models.Index(fields=['date'], name='daily_activity_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='daily_activity_user_date_uniq')],
+            },
+        ),
+    ]
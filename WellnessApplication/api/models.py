@@ -1,6 +1,9 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 
 SEGMENT_CHOICES = [
@@ -161,7 +164,15 @@ class UserStatistics(models.Model):
     avg_motivation_improvement = models.FloatField(default=0.0, help_text="Average motivation delta across activities")
     avg_enjoyment_rating = models.FloatField(default=0.0)
     avg_difficulty_rating = models.FloatField(default=0.0)
-    
+
+    # Running sums behind the averages, so a single activity can be folded in
+    motivation_delta_sum = models.IntegerField(default=0)
+    motivation_delta_count = models.PositiveIntegerField(default=0)
+    enjoyment_rating_sum = models.PositiveIntegerField(default=0)
+    enjoyment_rating_count = models.PositiveIntegerField(default=0)
+    difficulty_rating_sum = models.PositiveIntegerField(default=0)
+    difficulty_rating_count = models.PositiveIntegerField(default=0)
+
     # Time Metrics
     total_minutes_exercised = models.PositiveIntegerField(default=0)
     total_minutes_meditated = models.PositiveIntegerField(default=0)
@@ -187,3 +198,114 @@ class UserStatistics(models.Model):
     
     def __str__(self):
         return f"Statistics for {self.user.username}"
+
+
+class UserDailyActivity(models.Model):
+    """
+    Completed-activity totals for one user on one local calendar day.
+    Maintained from activity changes by api.signals (see api/daily_activity.py);
+    only days with at least one completed activity have a row.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='daily_activity')
+    date = models.DateField()
+
+    # Counts
+    completed_count = models.PositiveIntegerField(default=0)
+    exercise_count = models.PositiveIntegerField(default=0)
+    meditation_count = models.PositiveIntegerField(default=0)
+    journaling_count = models.PositiveIntegerField(default=0)
+
+    # Minutes
+    total_minutes = models.PositiveIntegerField(default=0)
+    exercise_minutes = models.PositiveIntegerField(default=0)
+    meditation_minutes = models.PositiveIntegerField(default=0)
+
+    # Feedback sums and the number of activities that reported each
+    motivation_delta_sum = models.IntegerField(default=0)
+    motivation_delta_count = models.PositiveIntegerField(default=0)
+    motivation_after_sum = models.PositiveIntegerField(default=0)
+    motivation_after_count = models.PositiveIntegerField(default=0)
+    enjoyment_rating_sum = models.PositiveIntegerField(default=0)
+    enjoyment_rating_count = models.PositiveIntegerField(default=0)
+    difficulty_rating_sum = models.PositiveIntegerField(default=0)
+    difficulty_rating_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'User Daily Activity'
+        verbose_name_plural = 'User Daily Activity'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='daily_activity_user_date_uniq'),
+        ]
+        indexes = [
+            # All users' days in a window: weekly digest
+            models.Index(fields=['date'], name='daily_activity_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} on {self.date}"
+
+
+class UserStreak(models.Model):
+    """
+    Consecutive-day streak of one user in one stream of events, maintained by
+    api/streaks.py. `current_streak` is the run of days ending on `last_date`.
+    """
+
+    class Stream(models.TextChoices):
+        ACTIVITY = 'activity', 'Completed Activities'
+        JOURNAL  = 'journal',  'Journal Entries'
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='streaks')
+    stream = models.CharField(max_length=20, choices=Stream.choices)
+    current_streak = models.PositiveIntegerField(default=0, help_text="Consecutive days ending on last_date")
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'stream'], name='user_streak_stream_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.stream} streak"
+
+    def current(self, today=None):
+        """Streak as of `today`: the stored run while it reaches today or yesterday, else 0."""
+        today = today or timezone.localdate()
+        if self.last_date is None or self.last_date < today - timedelta(days=1):
+            return 0
+        return self.current_streak
+
+
+class RLTransition(models.Model):
+    """
+    One (state, action, reward, next_state) sample for the RL agent.
+    Feedback endpoints append rows; the train_rl_agent command drains them in batches.
+    """
+
+    class Source(models.TextChoices):
+        ENGAGEMENT_FEEDBACK = 'engagement_feedback', 'Engagement Feedback'
+        RECOMMEND_FEEDBACK  = 'recommend_feedback',  'Recommend Program Feedback'
+        SESSION_FEEDBACK    = 'session_feedback',    'Activity Session Feedback'
+
+    user = models.ForeignKey(
+        CustomUser, null=True, blank=True, on_delete=models.SET_NULL, related_name='rl_transitions'
+    )
+    source = models.CharField(max_length=30, choices=Source.choices)
+    state = models.JSONField(help_text="User state before the action")
+    action = models.PositiveSmallIntegerField()
+    reward = models.FloatField()
+    next_state = models.JSONField(help_text="User state after the action")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True, help_text="When the trainer applied this sample")
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='rl_transition_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Transition {self.id} ({self.source}, action {self.action})"
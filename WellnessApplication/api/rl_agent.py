@@ -4,9 +4,178 @@ Based on the project proposal methodology
 """
 
 import numpy as np
+import ast
 import json
+import logging
 import os
+import uuid
 from collections import defaultdict
+from collections.abc import Mapping
+
+
+# Number of bins per component of the encoded state, in encode_state order:
+# age, gender, diet, exercise, stress, mental health, sleep, work hours,
+# screen time, social, happiness, engagement, segment.
+STATE_RADICES = (6, 2, 5, 3, 3, 5, 3, 4, 4, 3, 3, 11, 5)
+
+# encode_state defaults for missing or unparseable user state values.
+STATE_DEFAULTS = {
+    'age': 30,
+    'gender': 0,
+    'diet_type': 2,
+    'exercise_level': 1,
+    'stress_level': 1,
+    'mental_health_condition': 0,
+    'sleep_hours': 7.0,
+    'work_hours_per_week': 40.0,
+    'screen_time_per_day': 6.0,
+    'social_interaction_score': 5,
+    'happiness_score': 5,
+    'engagement': 0.5,
+    'segment': 4,
+}
+
+# Q-table storage backends accepted by WellnessRLAgent.
+Q_BACKENDS = ('dict', 'numpy')
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(value, default, min_value=None, max_value=None):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = int(default)
+    if min_value is not None:
+        number = max(min_value, number)
+    if max_value is not None:
+        number = min(max_value, number)
+    return number
+
+
+def _safe_float(value, default, min_value=None, max_value=None):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = float(default)
+    if min_value is not None:
+        number = max(min_value, number)
+    if max_value is not None:
+        number = min(max_value, number)
+    return number
+
+
+def _int_column(values, default, min_value, max_value):
+    """Vectorized _safe_int over a column of raw values."""
+    array = np.asarray(values)
+    if array.dtype.kind in 'iub':
+        return np.clip(array.astype(np.int64), min_value, max_value)
+    if array.dtype.kind == 'f' and np.isfinite(array).all():
+        return np.clip(np.trunc(array).astype(np.int64), min_value, max_value)
+    return np.fromiter(
+        (_safe_int(value, default, min_value, max_value) for value in array.tolist()),
+        dtype=np.int64,
+        count=array.size,
+    )
+
+
+def _float_column(values, default, min_value, max_value):
+    """Vectorized _safe_float over a column of raw values."""
+    array = np.asarray(values)
+    if array.dtype.kind in 'iufb':
+        array = array.astype(np.float64)
+        # max()/min() in _safe_float map NaN to the lower bound.
+        return np.clip(np.where(np.isnan(array), min_value, array), min_value, max_value)
+    return np.fromiter(
+        (_safe_float(value, default, min_value, max_value) for value in array.tolist()),
+        dtype=np.float64,
+        count=array.size,
+    )
+
+
+def _score_bin(scores):
+    """0-3 -> 0, 4-7 -> 1, 8-10 -> 2"""
+    return np.where(scores <= 3, 0, np.where(scores <= 7, 1, 2))
+
+
+def _columns(user_states, defaults):
+    """
+    Read user states given as a list of dicts or as a dict of columns.
+    Missing keys are filled with their encode_state default.
+    """
+    if isinstance(user_states, Mapping):
+        lengths = {len(np.atleast_1d(column)) for column in user_states.values()}
+        if len(lengths) > 1:
+            raise ValueError("All user state columns must have the same length")
+        size = lengths.pop() if lengths else 0
+        columns = {}
+        for key, default in defaults.items():
+            column = user_states.get(key)
+            columns[key] = np.full(size, default) if column is None else column
+        return size, columns
+
+    user_states = list(user_states)
+    return len(user_states), {
+        key: [state.get(key, default) for state in user_states]
+        for key, default in defaults.items()
+    }
+
+
+class SparseQTable:
+    """
+    Q-values for the visited states of the mixed-radix state space.
+
+    The full state space (about 64M states x 6 actions) is too large for a
+    dense matrix, so only visited states are stored: `keys` is a sorted int64
+    array of state indices and `values` the matching float32 rows. Lookups
+    are a single `searchsorted` per batch.
+    """
+
+    def __init__(self, n_actions, keys=None, values=None):
+        self.n_actions = n_actions
+        if keys is None:
+            keys = np.empty(0, dtype=np.int64)
+            values = np.empty((0, n_actions), dtype=np.float32)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float32).reshape(len(self.keys), n_actions)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _positions(self, indices):
+        positions = np.searchsorted(self.keys, indices)
+        positions = np.minimum(positions, max(len(self.keys) - 1, 0))
+        found = (self.keys[positions] == indices) if len(self.keys) else np.zeros(len(indices), dtype=bool)
+        return positions, found
+
+    def rows(self, indices):
+        """Q-value rows for state indices; unvisited states read as zeros."""
+        indices = np.asarray(indices, dtype=np.int64)
+        result = np.zeros((len(indices), self.n_actions), dtype=np.float32)
+        if len(self.keys):
+            positions, found = self._positions(indices)
+            result[found] = self.values[positions[found]]
+        return result
+
+    def ensure(self, indices):
+        """
+        Insert zero rows for unseen indices and return every index's row position.
+        Arrays loaded read-only (memory-mapped) are copied before the first write.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        missing = np.setdiff1d(indices, self.keys)
+        if len(missing):
+            keys = np.union1d(self.keys, missing)
+            values = np.zeros((len(keys), self.n_actions), dtype=np.float32)
+            values[np.searchsorted(keys, self.keys)] = self.values
+            self.keys, self.values = keys, values
+        elif not self.values.flags.writeable:
+            self.values = np.array(self.values)
+        return np.searchsorted(self.keys, indices)
+
+    def items(self):
+        """(state index, row) pairs in index order."""
+        return zip(self.keys.tolist(), self.values)
 
 
 class WellnessRLAgent:
@@ -16,7 +185,8 @@ class WellnessRLAgent:
     """
     
     def __init__(self, learning_rate=0.1, discount_factor=0.9, 
-                 initial_epsilon=0.3, epsilon_decay=0.995, min_epsilon=0.05):
+                 initial_epsilon=0.3, epsilon_decay=0.995, min_epsilon=0.05,
+                 backend='dict'):
         """
         Initialize RL Agent with Q-learning parameters
         
@@ -26,16 +196,18 @@ class WellnessRLAgent:
             initial_epsilon: Initial exploration rate
             epsilon_decay: Rate at which exploration decreases
             min_epsilon: Minimum exploration rate
+            backend: Q-table storage, 'dict' (nested dicts keyed by state
+                tuples) or 'numpy' (SparseQTable keyed by mixed-radix index)
         """
+        if backend not in Q_BACKENDS:
+            raise ValueError(f"Unknown Q-table backend: {backend}")
+        self.backend = backend
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.epsilon = initial_epsilon
         self.epsilon_decay = epsilon_decay
         self.min_epsilon = min_epsilon
         
-        # Q-table: (state) -> {action: Q-value}
-        self.q_table = defaultdict(lambda: defaultdict(float))
-        
         # Action space - 6 recommended actions
         self.actions = {
             0: "Increase Workout Intensity (IWI)",
@@ -45,12 +217,21 @@ class WellnessRLAgent:
             4: "Introduce Journaling Feature (IJF)",
             5: "Maintain Current Plan (MCP)"
         }
+
+        # Q-table: (state) -> {action: Q-value}, or state index -> row for 'numpy'
+        if backend == 'numpy':
+            self.q_table = SparseQTable(len(self.actions))
+        else:
+            self.q_table = defaultdict(lambda: defaultdict(float))
         
         # Reward function weights
         self.alpha = 0.5  # Engagement weight
         self.beta = 0.3   # Motivation weight
         self.lambda_penalty = 1.0  # Dropout penalty
         
+        # Version of the saved model this agent was loaded from (0 = never saved)
+        self.model_version = 0
+        
         # Training history
         self.training_history = {
             'episodes': 0,
@@ -81,77 +262,104 @@ class WellnessRLAgent:
         Returns:
             tuple: discrete state representation for Q-table lookup
         """
-        def safe_int(value, default, min_value=None, max_value=None):
-            try:
-                number = int(value)
-            except (TypeError, ValueError):
-                number = int(default)
-            if min_value is not None:
-                number = max(min_value, number)
-            if max_value is not None:
-                number = min(max_value, number)
-            return number
-
-        def safe_float(value, default, min_value=None, max_value=None):
-            try:
-                number = float(value)
-            except (TypeError, ValueError):
-                number = float(default)
-            if min_value is not None:
-                number = max(min_value, number)
-            if max_value is not None:
-                number = min(max_value, number)
-            return number
-
         # Age binning (0-5)
-        age = safe_int(user_state.get('age', 30), 30, min_value=0, max_value=120)
+        age = _safe_int(user_state.get('age', 30), 30, min_value=0, max_value=120)
         age_bin = min(int(age // 10), 5)
         
         # Gender (0 or 1)
-        gender = safe_int(user_state.get('gender', 0), 0, min_value=0, max_value=1)
+        gender = _safe_int(user_state.get('gender', 0), 0, min_value=0, max_value=1)
         
         # Diet type (0-4: vegetarian, vegan, balanced, junk_food, keto)
-        diet_type = safe_int(user_state.get('diet_type', 2), 2, min_value=0, max_value=4)
+        diet_type = _safe_int(user_state.get('diet_type', 2), 2, min_value=0, max_value=4)
         
         # Exercise level (0-2: low, moderate, high)
-        exercise_level = safe_int(user_state.get('exercise_level', 1), 1, min_value=0, max_value=2)
+        exercise_level = _safe_int(user_state.get('exercise_level', 1), 1, min_value=0, max_value=2)
         
         # Stress level (0-2: low, moderate, high)
-        stress_level = safe_int(user_state.get('stress_level', 1), 1, min_value=0, max_value=2)
+        stress_level = _safe_int(user_state.get('stress_level', 1), 1, min_value=0, max_value=2)
         
         # Mental health condition (0-4: none, ptsd, depression, anxiety, bipolar)
-        mental_health = safe_int(user_state.get('mental_health_condition', 0), 0, min_value=0, max_value=4)
+        mental_health = _safe_int(user_state.get('mental_health_condition', 0), 0, min_value=0, max_value=4)
         
         # Sleep hours binning (0-2: 0-3hrs, 4-6hrs, 7-9hrs)
-        sleep_hours = safe_float(user_state.get('sleep_hours', 7), 7.0, min_value=0.0, max_value=9.0)
+        sleep_hours = _safe_float(user_state.get('sleep_hours', 7), 7.0, min_value=0.0, max_value=9.0)
         sleep_bin = min(int(sleep_hours // 3), 2)
         
         # Work hours binning (0-3: 0-20, 21-40, 41-60, 61+)
-        work_hours = safe_float(user_state.get('work_hours_per_week', 40), 40.0, min_value=0.0, max_value=100.0)
+        work_hours = _safe_float(user_state.get('work_hours_per_week', 40), 40.0, min_value=0.0, max_value=100.0)
         work_bin = min(int(work_hours // 20), 3)
         
         # Screen time binning (0-3: 0-6hrs, 7-12hrs, 13-18hrs, 19-24hrs)
-        screen_time = safe_float(user_state.get('screen_time_per_day', 6.0), 6.0, min_value=0.0, max_value=24.0)
+        screen_time = _safe_float(user_state.get('screen_time_per_day', 6.0), 6.0, min_value=0.0, max_value=24.0)
         screen_bin = min(int(screen_time // 6), 3)
         
         # Social interaction score binning (0-2: 0-3, 4-7, 8-10)
-        social_score = safe_int(user_state.get('social_interaction_score', 5), 5, min_value=0, max_value=10)
+        social_score = _safe_int(user_state.get('social_interaction_score', 5), 5, min_value=0, max_value=10)
         social_bin = 0 if social_score <= 3 else (1 if social_score <= 7 else 2)
         
         # Happiness score binning (0-2: 0-3, 4-7, 8-10)
-        happiness = safe_int(user_state.get('happiness_score', 5), 5, min_value=0, max_value=10)
+        happiness = _safe_int(user_state.get('happiness_score', 5), 5, min_value=0, max_value=10)
         happiness_bin = 0 if happiness <= 3 else (1 if happiness <= 7 else 2)
         
         # Engagement binning (0-10)
-        engagement = safe_float(user_state.get('engagement', 0.5), 0.5, min_value=0.0, max_value=1.0)
+        engagement = _safe_float(user_state.get('engagement', 0.5), 0.5, min_value=0.0, max_value=1.0)
         engagement_bin = min(int(engagement * 10), 10)
         
         # Segment ID (0-4)
-        segment_id = safe_int(user_state.get('segment', 4), 4, min_value=0, max_value=4)
+        segment_id = _safe_int(user_state.get('segment', 4), 4, min_value=0, max_value=4)
         
         return (age_bin, gender, diet_type, exercise_level, stress_level, mental_health, sleep_bin, 
                 work_bin, screen_bin, social_bin, happiness_bin, engagement_bin, segment_id)
 
+    def encode_states(self, user_states):
+        """
+        Vectorized encode_state for many users at once
+
+        Args:
+            user_states: list of user state dicts, or a dict mapping each
+                user state key to an array/list with one value per user
+
+        Returns:
+            np.ndarray: (n_users, 13) int64 matrix, one encode_state tuple per row
+        """
+        size, col = _columns(user_states, STATE_DEFAULTS)
+        if size == 0:
+            return np.empty((0, len(STATE_RADICES)), dtype=np.int64)
+
+        age = _int_column(col['age'], 30, 0, 120)
+        sleep_hours = _float_column(col['sleep_hours'], 7.0, 0.0, 9.0)
+        work_hours = _float_column(col['work_hours_per_week'], 40.0, 0.0, 100.0)
+        screen_time = _float_column(col['screen_time_per_day'], 6.0, 0.0, 24.0)
+        engagement = _float_column(col['engagement'], 0.5, 0.0, 1.0)
+
+        return np.column_stack((
+            np.minimum(age // 10, 5),
+            _int_column(col['gender'], 0, 0, 1),
+            _int_column(col['diet_type'], 2, 0, 4),
+            _int_column(col['exercise_level'], 1, 0, 2),
+            _int_column(col['stress_level'], 1, 0, 2),
+            _int_column(col['mental_health_condition'], 0, 0, 4),
+            np.minimum(sleep_hours // 3, 2).astype(np.int64),
+            np.minimum(work_hours // 20, 3).astype(np.int64),
+            np.minimum(screen_time // 6, 3).astype(np.int64),
+            _score_bin(_int_column(col['social_interaction_score'], 5, 0, 10)),
+            _score_bin(_int_column(col['happiness_score'], 5, 0, 10)),
+            np.minimum((engagement * 10).astype(np.int64), 10),
+            _int_column(col['segment'], 4, 0, 4),
+        )).astype(np.int64)
+
+    @staticmethod
+    def state_indices(encoded_states):
+        """Mixed-radix index of each encoded state row (inverse of state_tuples)."""
+        encoded_states = np.asarray(encoded_states, dtype=np.int64).reshape(-1, len(STATE_RADICES))
+        return np.ravel_multi_index(encoded_states.T, STATE_RADICES).astype(np.int64)
+
+    @staticmethod
+    def state_tuples(indices):
+        """Encoded state tuples for mixed-radix indices."""
+        columns = np.unravel_index(np.asarray(indices, dtype=np.int64), STATE_RADICES)
+        return [tuple(int(part) for part in row) for row in zip(*columns)]
+
     def calculate_reward(self, user_state_after, action_taken):
         """
         Calculate reward based on the reward function from proposal:
@@ -184,6 +392,9 @@ class WellnessRLAgent:
         Returns:
             int: action index to take
         """
+        if self.backend == 'numpy':
+            return int(self.select_actions([state_dict])[0])
+
         if np.random.random() < self.epsilon:
             # Exploration: random action
             return np.random.choice(len(self.actions))
@@ -193,6 +404,47 @@ class WellnessRLAgent:
             q_values = [self.q_table[state_key].get(action, 0) for action in range(len(self.actions))]
             return np.argmax(q_values) if max(q_values) > 0 else np.random.choice(len(self.actions))
 
+    def select_actions(self, user_states, rng=None):
+        """
+        ε-greedy action selection for many users in one pass
+        
+        Args:
+            user_states: user states in any form accepted by encode_states
+            rng: optional np.random.Generator or RandomState (defaults to the
+                global np.random state, like select_action, so np.random.seed
+                reproduces both paths)
+        
+        Returns:
+            np.ndarray: int64 action index per user
+        """
+        rng = rng if rng is not None else np.random
+        integers = rng.integers if hasattr(rng, 'integers') else rng.randint
+        q_values = self._q_rows(self.encode_states(user_states))
+        n_users, n_actions = q_values.shape
+
+        random_actions = integers(0, n_actions, size=n_users)
+        if n_users == 0:
+            return random_actions.astype(np.int64)
+
+        explore = rng.random(n_users) < self.epsilon
+        # Without a positive Q-value there is nothing learned to exploit yet.
+        unlearned = q_values.max(axis=1) <= 0
+        greedy = q_values.argmax(axis=1)
+        return np.where(explore | unlearned, random_actions, greedy).astype(np.int64)
+
+    def _q_rows(self, encoded_states):
+        """Q-value matrix (n_states, n_actions) for encoded state rows."""
+        if self.backend == 'numpy':
+            return self.q_table.rows(self.state_indices(encoded_states))
+
+        rows = np.zeros((len(encoded_states), len(self.actions)), dtype=np.float64)
+        for row, state in enumerate(encoded_states):
+            state_key = tuple(int(part) for part in state)
+            if state_key in self.q_table:
+                for action, value in self.q_table[state_key].items():
+                    rows[row, int(action)] = value
+        return rows
+
     def update_q_value(self, state_dict, action, reward, next_state_dict):
         """
         Q-learning update rule:
@@ -204,6 +456,10 @@ class WellnessRLAgent:
             reward: reward received
             next_state_dict: resulting user state
         """
+        if self.backend == 'numpy':
+            self.update_q_values([state_dict], [action], [reward], [next_state_dict])
+            return
+
         state_key = self.encode_state(state_dict)
         next_state_key = self.encode_state(next_state_dict)
         
@@ -225,6 +481,46 @@ class WellnessRLAgent:
         self.training_history['total_reward'] += reward
         self.training_history['episodes'] += 1
 
+    def update_q_values(self, states, actions, rewards, next_states):
+        """
+        Batched Q-learning update for many transitions
+        
+        All targets are computed from the table as it was before the batch
+        (a synchronous update), and increments for repeated (state, action)
+        pairs accumulate. For a single transition this is update_q_value.
+        
+        Args:
+            states: current user states (any form accepted by encode_states)
+            actions: action taken per transition
+            rewards: reward received per transition
+            next_states: resulting user states
+        """
+        actions = np.asarray(actions, dtype=np.int64).reshape(-1)
+        rewards = np.asarray(rewards, dtype=np.float64).reshape(-1)
+        encoded = self.encode_states(states)
+        next_encoded = self.encode_states(next_states)
+        if not (len(encoded) == len(next_encoded) == len(actions) == len(rewards)):
+            raise ValueError("states, actions, rewards and next_states must have the same length")
+        if len(actions) == 0:
+            return
+
+        current_q = self._q_rows(encoded)[np.arange(len(actions)), actions]
+        max_next_q = self._q_rows(next_encoded).max(axis=1)
+        increments = self.learning_rate * (
+            rewards + self.discount_factor * max_next_q - current_q
+        )
+
+        if self.backend == 'numpy':
+            positions = self.q_table.ensure(self.state_indices(encoded))
+            np.add.at(self.q_table.values, (positions, actions), increments.astype(np.float32))
+        else:
+            for state, action, increment in zip(encoded, actions.tolist(), increments.tolist()):
+                state_key = tuple(int(part) for part in state)
+                self.q_table[state_key][action] = self.q_table[state_key].get(action, 0) + increment
+
+        self.training_history['total_reward'] += float(rewards.sum())
+        self.training_history['episodes'] += len(actions)
+
     def decay_epsilon(self):
         """Decay exploration rate after each episode"""
         self.epsilon = max(self.min_epsilon, self.epsilon * self.epsilon_decay)
@@ -236,15 +532,65 @@ class WellnessRLAgent:
 
     def get_q_table_dict(self):
         """Convert Q-table to serializable format"""
+        if self.backend == 'numpy':
+            states = self.state_tuples(self.q_table.keys)
+            return {
+                str(state): {action: float(value) for action, value in enumerate(row) if value}
+                for state, (_, row) in zip(states, self.q_table.items())
+            }
         return {str(k): dict(v) for k, v in self.q_table.items()}
 
     def load_q_table_dict(self, q_dict):
         """Load Q-table from serializable format"""
+        loaded = {}
         for state_str, actions in q_dict.items():
-            # Convert string keys back to tuples
-            state_tuple = eval(state_str)
+            # Convert string keys back to tuples; JSON turns action keys into strings
+            state_tuple = ast.literal_eval(state_str)
+            loaded[state_tuple] = {int(action): value for action, value in actions.items()}
+
+        if self.backend == 'numpy':
+            # States from older encodings (different tuple length) have no index.
+            states = [state for state in loaded if len(state) == len(STATE_RADICES)]
+            keys = self.state_indices(states) if states else np.empty(0, dtype=np.int64)
+            values = np.zeros((len(states), len(self.actions)), dtype=np.float32)
+            for row, state in enumerate(states):
+                for action, value in loaded[state].items():
+                    values[row, action] = value
+            order = np.argsort(keys)
+            self.q_table = SparseQTable(len(self.actions), keys[order], values[order])
+            return
+
+        for state_tuple, actions in loaded.items():
             self.q_table[state_tuple] = defaultdict(float, actions)
 
+    def get_q_table_arrays(self):
+        """
+        Q-table as (keys, values): sorted int64 state indices and float32 rows.
+        States from older encodings (different tuple length) are dropped.
+        """
+        if self.backend == 'numpy':
+            return self.q_table.keys, self.q_table.values
+
+        states = [state for state in self.q_table if len(state) == len(STATE_RADICES)]
+        keys = self.state_indices(states) if states else np.empty(0, dtype=np.int64)
+        values = np.zeros((len(states), len(self.actions)), dtype=np.float32)
+        for row, state in enumerate(states):
+            for action, value in self.q_table[state].items():
+                values[row, int(action)] = value
+        order = np.argsort(keys)
+        return keys[order], values[order]
+
+    def load_q_table_arrays(self, keys, values):
+        """Load Q-table from (keys, values) arrays; the numpy backend uses them as-is."""
+        if self.backend == 'numpy':
+            self.q_table = SparseQTable(len(self.actions), keys, values)
+            return
+
+        for state, row in zip(self.state_tuples(keys), np.asarray(values).tolist()):
+            self.q_table[state] = defaultdict(
+                float, {action: value for action, value in enumerate(row) if value}
+            )
+
     def adjust_activity_difficulty(self, activity, engagement_contribution, recent_completions):
         """
         Dynamically adjust activity duration/reps based on user engagement
@@ -345,25 +691,63 @@ class WellnessRLAgent:
 
 
 class RLModelManager:
-    """Handles persistence of RL models (Q-tables)"""
-    
-    def __init__(self, model_dir='models'):
+    """
+    Handles persistence of RL models (Q-tables)
+
+    Format version 1 stores the Q-table as two .npy arrays (sorted int64
+    state indices and float32 Q-value rows) next to a small JSON header with
+    hyperparameters and training history. Each save writes a new generation
+    of array files and then atomically replaces the header, so readers always
+    see a complete model; loading memory-maps the arrays instead of parsing
+    them. The legacy indented JSON file is still read when no header exists.
+
+    The previous generation's arrays are kept when a new one is saved, so a
+    reader that read the old header just before the swap can still open its
+    arrays; older generations are removed. A reader that loses even that race
+    re-reads the header and retries once.
+    """
+
+    FORMAT_VERSION = 1
+    MODEL_NAME = 'wellness_rl_agent'
+
+    def __init__(self, model_dir='models', backend='dict'):
         """
         Initialize manager with model directory
         
         Args:
             model_dir: directory to store models
+            backend: Q-table backend for loaded agents ('dict' or 'numpy')
         """
         self.model_dir = model_dir
-        self.model_path = os.path.join(model_dir, 'wellness_rl_agent.json')
+        self.backend = backend
+        self.meta_path = os.path.join(model_dir, f'{self.MODEL_NAME}.meta.json')
+        # Legacy JSON model, read only until it has been migrated
+        self.model_path = os.path.join(model_dir, f'{self.MODEL_NAME}.json')
         
         # Create directory if it doesn't exist
         os.makedirs(model_dir, exist_ok=True)
 
     def save_agent(self, agent):
-        """Save agent Q-table and parameters to file"""
-        agent_data = {
-            'q_table': agent.get_q_table_dict(),
+        """Save agent Q-table and parameters as a new model generation"""
+        keys, values = agent.get_q_table_arrays()
+        generation = uuid.uuid4().hex[:12]
+        keys_file = f'{self.MODEL_NAME}.{generation}.keys.npy'
+        values_file = f'{self.MODEL_NAME}.{generation}.values.npy'
+
+        self._write_array(keys_file, np.ascontiguousarray(keys, dtype=np.int64))
+        self._write_array(values_file, np.ascontiguousarray(values, dtype=np.float32))
+
+        previous = self._read_meta()
+        version = (previous or {}).get('version', 0) + 1
+        meta = {
+            'format_version': self.FORMAT_VERSION,
+            'version': version,
+            'generation': generation,
+            'state_radices': list(STATE_RADICES),
+            'actions': len(agent.actions),
+            'states': int(len(keys)),
+            'keys_file': keys_file,
+            'values_file': values_file,
             'epsilon': agent.epsilon,
             'training_history': agent.training_history,
             'hyperparameters': {
@@ -376,35 +760,117 @@ class RLModelManager:
                 'lambda_penalty': agent.lambda_penalty
             }
         }
-        
-        with open(self.model_path, 'w') as f:
-            json.dump(agent_data, f, indent=2)
+        self._write_atomic(self.meta_path, json.dumps(meta, indent=2).encode('utf-8'))
+        agent.model_version = version
+
+        self._remove_stale_generations(keep=(meta, previous))
 
     def load_agent(self):
         """Load agent from saved file or create new one"""
+        try:
+            return self.load_saved_agent()
+        except Exception:
+            logger.exception("Error loading RL agent from %s; creating a new agent.", self.model_dir)
+        return WellnessRLAgent(backend=self.backend)
+
+    def load_saved_agent(self):
+        """
+        Load the saved agent, or a new one when nothing has been saved yet.
+        Unlike load_agent, a model that cannot be read raises.
+        """
+        meta = self._read_meta()
+        if meta:
+            try:
+                return self._load_binary(meta)
+            except FileNotFoundError:
+                # A save replaced the header and removed these arrays after we
+                # read it; the current header names arrays that exist.
+                return self._load_binary(self._read_meta())
         if os.path.exists(self.model_path):
+            return self._load_legacy_json()
+        return WellnessRLAgent(backend=self.backend)
+
+    def has_binary_model(self):
+        return os.path.exists(self.meta_path)
+
+    def stat_signature(self):
+        """Cheap change marker for the saved model: (path, mtime_ns, size) of its header."""
+        for path in (self.meta_path, self.model_path):
             try:
-                with open(self.model_path, 'r') as f:
-                    agent_data = json.load(f)
-                
-                # Create agent with saved hyperparameters
-                hp = agent_data.get('hyperparameters', {})
-                agent = WellnessRLAgent(
-                    learning_rate=hp.get('learning_rate', 0.1),
-                    discount_factor=hp.get('discount_factor', 0.9),
-                    initial_epsilon=hp.get('epsilon_decay', 0.995),
-                    epsilon_decay=hp.get('epsilon_decay', 0.995),
-                    min_epsilon=hp.get('min_epsilon', 0.05)
-                )
-                
-                # Load Q-table and training history
-                agent.load_q_table_dict(agent_data.get('q_table', {}))
-                agent.epsilon = agent_data.get('epsilon', agent.epsilon)
-                agent.training_history = agent_data.get('training_history', agent.training_history)
-                
-                return agent
-            except Exception as e:
-                print(f"Error loading agent: {e}. Creating new agent.")
-                return WellnessRLAgent()
-        else:
-            return WellnessRLAgent()
+                stat = os.stat(path)
+            except OSError:
+                continue
+            return (path, stat.st_mtime_ns, stat.st_size)
+        return None
+
+    def _new_agent(self, data):
+        hp = data.get('hyperparameters', {})
+        agent = WellnessRLAgent(
+            learning_rate=hp.get('learning_rate', 0.1),
+            discount_factor=hp.get('discount_factor', 0.9),
+            initial_epsilon=data.get('epsilon', 0.3),
+            epsilon_decay=hp.get('epsilon_decay', 0.995),
+            min_epsilon=hp.get('min_epsilon', 0.05),
+            backend=self.backend,
+        )
+        agent.epsilon = data.get('epsilon', agent.epsilon)
+        agent.training_history = data.get('training_history', agent.training_history)
+        agent.model_version = data.get('version', 0)
+        return agent
+
+    def _load_binary(self, meta):
+        if meta.get('format_version') != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format version: {meta.get('format_version')}")
+        if tuple(meta.get('state_radices', ())) != STATE_RADICES:
+            raise ValueError("Saved model uses a different state encoding")
+
+        keys = np.load(os.path.join(self.model_dir, meta['keys_file']), mmap_mode='r')
+        values = np.load(os.path.join(self.model_dir, meta['values_file']), mmap_mode='r')
+
+        agent = self._new_agent(meta)
+        agent.load_q_table_arrays(keys, values)
+        return agent
+
+    def _load_legacy_json(self):
+        with open(self.model_path, 'r') as f:
+            agent_data = json.load(f)
+
+        agent = self._new_agent(agent_data)
+        agent.load_q_table_dict(agent_data.get('q_table', {}))
+        return agent
+
+    def _read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path, 'r') as f:
+            return json.load(f)
+
+    def _write_array(self, filename, array):
+        path = os.path.join(self.model_dir, filename)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _write_atomic(self, path, payload):
+        tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _remove_stale_generations(self, keep):
+        """Delete array files of every generation not named by a header in `keep`."""
+        kept = {meta.get(key) for meta in keep if meta for key in ('keys_file', 'values_file')}
+        prefix = f'{self.MODEL_NAME}.'
+        for filename in os.listdir(self.model_dir):
+            if not filename.startswith(prefix) or not filename.endswith('.npy') or filename in kept:
+                continue
+            try:
+                os.remove(os.path.join(self.model_dir, filename))
+            except OSError:
+                # Still memory-mapped by a reader on some platforms, or already gone.
+                pass
@@ -0,0 +1,159 @@
+"""
+One RL agent per process, shared by every view.
+
+The registry hands out a cached agent and reloads it only when the saved
+model changes. A staleness check is a single os.stat of the model header and
+runs at most once per RL_AGENT_CHECK_INTERVAL seconds, so requests never
+parse the model. Writers (the train_rl_agent command) hold an exclusive file
+lock while they load, train and save, so concurrent trainers apply their
+updates on top of the latest saved version instead of overwriting each other.
+Every worker converges on the last saved policy within one check interval.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .rl_agent import RLModelManager, WellnessRLAgent
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def rl_model_dir():
+    return getattr(settings, 'RL_MODEL_DIR', os.path.join(settings.BASE_DIR, 'api', 'models'))
+
+
+@contextmanager
+def model_write_lock(model_dir):
+    """Exclusive cross-process lock for writing the model in `model_dir`."""
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, f'{RLModelManager.MODEL_NAME}.lock'), 'a+b') as handle:
+        _acquire(handle)
+        try:
+            yield
+        finally:
+            _release(handle)
+
+
+def _acquire(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+    handle.seek(0)
+    while True:
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ~10s; keep waiting like flock does.
+            time.sleep(0.1)
+
+
+def _release(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        return
+    handle.seek(0)
+    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AgentRegistry:
+    """Process-local cache of the saved RL agent with versioned hot reload."""
+
+    def __init__(self, model_dir, backend='numpy', check_interval=2.0):
+        self.manager = RLModelManager(model_dir=model_dir, backend=backend)
+        self.check_interval = check_interval
+        self._agent = None
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get_agent(self):
+        """Current agent, reloaded if the saved model changed since the last check."""
+        now = time.monotonic()
+        if not self._is_due(now):
+            return self._agent
+
+        with self._lock:
+            if self._is_due(now):
+                signature = self.manager.stat_signature()
+                if self._agent is None or signature != self._signature:
+                    self._reload(signature)
+                self._checked_at = now
+        return self._agent
+
+    def _reload(self, signature):
+        try:
+            self._agent = self.manager.load_saved_agent()
+        except Exception:
+            logger.exception("Could not reload the RL agent from %s.", self.manager.model_dir)
+            if self._agent is None:
+                self._agent = WellnessRLAgent(backend=self.manager.backend)
+            # Keep serving the last good agent; the next check retries the load.
+            return
+        self._signature = signature
+
+    def _is_due(self, now):
+        return (
+            self._agent is None
+            or self._checked_at is None
+            or now - self._checked_at >= self.check_interval
+        )
+
+    @property
+    def version(self):
+        """Version of the saved model the current agent was loaded from."""
+        return self.get_agent().model_version
+
+    def invalidate(self):
+        """Force a staleness check on the next get_agent()."""
+        self._checked_at = None
+
+    @contextmanager
+    def write_lock(self):
+        with model_write_lock(self.manager.model_dir):
+            yield
+
+    def update(self, apply):
+        """
+        Load the latest saved agent under the write lock, call apply(agent),
+        save it and return apply's result.
+        """
+        with self.write_lock():
+            agent = self.manager.load_saved_agent()
+            result = apply(agent)
+            self.manager.save_agent(agent)
+        self.invalidate()
+        return result
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """The process-wide registry configured from settings."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = AgentRegistry(
+                    rl_model_dir(),
+                    backend=getattr(settings, 'RL_AGENT_BACKEND', 'numpy'),
+                    check_interval=getattr(settings, 'RL_AGENT_CHECK_INTERVAL', 2.0),
+                )
+    return _registry
+
+
+def get_shared_agent():
+    """The shared RL agent for request handlers (read-only use)."""
+    return get_registry().get_agent()
@@ -0,0 +1,111 @@
+"""
+Off-request training for the wellness RL agent.
+
+Feedback endpoints only append an RLTransition row with record_transition().
+train_pending_transitions() (run by the train_rl_agent command) drains the
+pending rows in id order, applies each batch with the agent's vectorized
+update_q_values, and checkpoints the model every few batches. Rows are marked
+processed only after the checkpoint that contains them has been saved, so a
+crashed trainer re-applies at most the batches since its last checkpoint.
+The whole run holds the model write lock, so concurrent trainers serialize.
+"""
+import time
+
+from django.utils import timezone
+
+from .models import RLTransition
+from .rl_registry import model_write_lock
+
+
+def record_transition(user, source, state, action, reward, next_state):
+    """Queue one training sample; cheap enough to call inside a request."""
+    return RLTransition.objects.create(
+        user=user,
+        source=source,
+        state=state,
+        action=int(action),
+        reward=float(reward),
+        next_state=next_state,
+    )
+
+
+def train_pending_transitions(manager, batch_size=500, checkpoint_every=10, max_transitions=None):
+    """
+    Apply pending transitions to the saved agent and checkpoint it.
+
+    Args:
+        manager: RLModelManager the agent is loaded from and saved to
+        batch_size: transitions per vectorized update
+        checkpoint_every: save the agent after this many batches
+        max_transitions: stop after this many transitions (None drains all)
+
+    Returns:
+        dict: transitions, batches, checkpoints, seconds, transitions_per_second,
+        episodes and epsilon after training
+    """
+    started = time.perf_counter()
+    with model_write_lock(manager.model_dir):
+        agent, trained, batches, checkpoints = _drain(
+            manager, batch_size, checkpoint_every, max_transitions
+        )
+
+    seconds = time.perf_counter() - started
+    return {
+        'transitions': trained,
+        'batches': batches,
+        'checkpoints': checkpoints,
+        'seconds': seconds,
+        'transitions_per_second': trained / seconds if seconds > 0 else 0.0,
+        'episodes': agent.training_history['episodes'],
+        'epsilon': agent.epsilon,
+    }
+
+
+def _drain(manager, batch_size, checkpoint_every, max_transitions):
+    # An unreadable model must stop training rather than be replaced by a blank one.
+    agent = manager.load_saved_agent()
+
+    trained = 0
+    batches = 0
+    checkpoints = 0
+    last_id = 0
+    unsaved_batches = []
+
+    while max_transitions is None or trained < max_transitions:
+        limit = batch_size if max_transitions is None else min(batch_size, max_transitions - trained)
+        rows = list(
+            RLTransition.objects.filter(processed_at__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'state', 'action', 'reward', 'next_state')[:limit]
+        )
+        if not rows:
+            break
+
+        ids, states, actions, rewards, next_states = zip(*rows)
+        agent.update_q_values(list(states), actions, rewards, list(next_states))
+        # The request path used to decay once per feedback; keep that schedule.
+        for _ in ids:
+            agent.decay_epsilon()
+
+        trained += len(ids)
+        batches += 1
+        last_id = ids[-1]
+        unsaved_batches.append(ids)
+
+        if len(unsaved_batches) >= checkpoint_every:
+            _checkpoint(manager, agent, unsaved_batches)
+            checkpoints += 1
+            unsaved_batches = []
+
+    if unsaved_batches:
+        _checkpoint(manager, agent, unsaved_batches)
+        checkpoints += 1
+
+    return agent, trained, batches, checkpoints
+
+
+def _checkpoint(manager, agent, id_batches):
+    manager.save_agent(agent)
+    processed_at = timezone.now()
+    for ids in id_batches:
+        RLTransition.objects.filter(id__in=ids).update(processed_at=processed_at)
@@ -0,0 +1,127 @@
+"""
+Random row sampling without ORDER BY RANDOM().
+
+`order_by('?')` makes the database sort the whole table on every call. A
+RandomRowSampler keeps the primary keys of the eligible rows (optionally per
+category) in process memory and picks one with random.choice, so a sample is
+an O(1) pick plus a primary-key lookup.
+
+The cached ID lists are dropped on post_save/post_delete of the model.
+bulk_create and queryset updates send no signals and other processes keep
+their own cache, so lists also expire after settings.RANDOM_SAMPLER_TTL
+seconds; callers that bulk-insert rows should call `invalidate()`.
+
+For per-user no-repeat rotation, keep a bitmap of seen IDs (see
+`sample_unseen_id`): IDs are drawn from the unseen part of the pool until it
+is exhausted, then the bitmap starts over.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+# Random draws tried against the seen-bitmap before scanning the pool.
+UNSEEN_DRAW_ATTEMPTS = 8
+
+
+def bitmap_contains(bitmap, pk):
+    index, bit = divmod(pk, 8)
+    return index < len(bitmap) and bool(bitmap[index] & (1 << bit))
+
+
+def bitmap_add(bitmap, pk):
+    """Copy of `bitmap` (bytes) with the bit for `pk` set."""
+    index, bit = divmod(pk, 8)
+    data = bytearray(bitmap)
+    if index >= len(data):
+        data.extend(bytes(index + 1 - len(data)))
+    data[index] |= 1 << bit
+    return bytes(data)
+
+
+class RandomRowSampler:
+    """
+    Uniform random rows of `model`.
+
+    Args:
+        model: model class to sample from
+        filters: queryset filter kwargs for eligible rows (e.g. is_active=True)
+        category_field: optional field to sample within (e.g. 'category')
+    """
+
+    def __init__(self, model, filters=None, category_field=None):
+        self.model = model
+        self.filters = dict(filters or {})
+        self.category_field = category_field
+        self._ids = {}
+        self._lock = threading.Lock()
+
+        uid = f'random-row-sampler-{id(self)}'
+        post_save.connect(self.invalidate, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self.invalidate, sender=model, weak=False, dispatch_uid=uid)
+
+    def queryset(self, category=None):
+        queryset = self.model._default_manager.filter(**self.filters)
+        if category is not None:
+            queryset = queryset.filter(**{self.category_field: category})
+        return queryset
+
+    def ids(self, category=None):
+        """Tuple of eligible primary keys, cached per category."""
+        ttl = getattr(settings, 'RANDOM_SAMPLER_TTL', 300)
+        cached = self._ids.get(category)
+        if cached is None or time.monotonic() - cached[0] > ttl:
+            ids = tuple(self.queryset(category).order_by('pk').values_list('pk', flat=True))
+            cached = (time.monotonic(), ids)
+            with self._lock:
+                self._ids[category] = cached
+        return cached[1]
+
+    def invalidate(self, *args, **kwargs):
+        """Drop every cached ID list. Doubles as the save/delete signal receiver."""
+        with self._lock:
+            self._ids.clear()
+
+    def sample_id(self, category=None):
+        """A random eligible primary key, or None if there are none."""
+        ids = self.ids(category)
+        return random.choice(ids) if ids else None
+
+    def sample_unseen_id(self, seen=b'', category=None):
+        """
+        A random primary key not yet marked in the `seen` bitmap.
+
+        Returns:
+            (pk, seen): the pick and the updated bitmap, which is reset once
+            every ID in the pool has been seen. pk is None for an empty pool.
+        """
+        ids = self.ids(category)
+        if not ids:
+            return None, seen
+
+        for _ in range(UNSEEN_DRAW_ATTEMPTS):
+            pk = random.choice(ids)
+            if not bitmap_contains(seen, pk):
+                return pk, bitmap_add(seen, pk)
+
+        unseen = [pk for pk in ids if not bitmap_contains(seen, pk)]
+        if not unseen:
+            seen, unseen = b'', ids
+        pk = random.choice(unseen)
+        return pk, bitmap_add(seen, pk)
+
+    def sample(self, category=None):
+        """A random eligible row, or None if there are none."""
+        for _ in range(2):
+            pk = self.sample_id(category)
+            if pk is None:
+                return None
+            row = self.queryset(category).filter(pk=pk).first()
+            if row is not None:
+                return row
+            # Deleted or deactivated elsewhere since the list was cached.
+            self.invalidate()
+        return None
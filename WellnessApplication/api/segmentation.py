@@ -0,0 +1,203 @@
+"""
+User segment classification for registration and re-segmentation.
+
+The random forest in `Datasets,Models/final_RF.pkl` takes about a second to
+unpickle but only milliseconds to predict, so the classifier is loaded lazily
+once per process and kept in memory. Each prediction stats the model file and
+reloads it when its mtime changes, so a retrained model is picked up without
+a restart. Set SEGMENT_MODEL_WARMUP = True to load it in AppConfig.ready
+instead of on the first signup.
+"""
+import os
+import threading
+
+import joblib
+import numpy as np
+from django.conf import settings
+
+
+# Feature order the model was trained with:
+# Age, Gender, Exercise Level, Diet Type, Sleep Hours, Stress Level,
+# Mental Health Condition, Work Hours per Week, Screen Time per Day (Hours),
+# Social Interaction Score, Happiness Score
+FEATURE_FIELDS = (
+    'age',
+    'gender',
+    'exercise_level',
+    'diet_type',
+    'sleep_hours',
+    'stress_level',
+    'mental_health_condition',
+    'work_hours_per_week',
+    'screen_time_per_day',
+    'self_reported_social_interaction_score',
+    'happiness_score',
+)
+
+FEATURE_DEFAULTS = {
+    'age': 25,
+    'gender': 'male',
+    'exercise_level': 'moderate',
+    'diet_type': 'balanced',
+    'sleep_hours': 7,
+    'stress_level': 'moderate',
+    'mental_health_condition': 'none',
+    'work_hours_per_week': 40,
+    'screen_time_per_day': 6.0,
+    'self_reported_social_interaction_score': 5,
+    'happiness_score': 5,
+}
+
+CATEGORY_ENCODINGS = {
+    'gender': ({'male': 0, 'female': 1, 'other': 2}, 0),
+    'exercise_level': ({'low': 0, 'moderate': 1, 'high': 2}, 1),
+    'diet_type': ({'vegetarian': 0, 'vegan': 1, 'balanced': 2, 'junk_food': 3, 'keto': 4}, 2),
+    'stress_level': ({'low': 0, 'moderate': 1, 'high': 2}, 1),
+    'mental_health_condition': ({'none': 0, 'ptsd': 1, 'depression': 2, 'anxiety': 3, 'bipolar': 4}, 0),
+}
+
+# Model class labels -> numeric cluster IDs (see SEGMENT_CHOICES)
+LABEL_TO_SEGMENT_ID = {
+    'Older_HighStress_Exhausted': 0,
+    'Young_HighStress_ActiveSocial': 1,
+    'MidLife_LowStress_Depressed': 2,
+    'MidLife_Thriving_WellnessSeeker': 3,
+    'WorkingProfessional_Sedentary_Stable': 4,
+}
+DEFAULT_SEGMENT_ID = 4
+
+
+def segment_model_path():
+    return getattr(
+        settings,
+        'SEGMENT_MODEL_PATH',
+        os.path.join(settings.BASE_DIR, 'Datasets,Models', 'final_RF.pkl'),
+    )
+
+
+def encode_features(profile):
+    """
+    Feature row for one user profile.
+
+    Args:
+        profile: dict (e.g. serializer validated_data) or object with the
+            FEATURE_FIELDS attributes; missing or null values use FEATURE_DEFAULTS
+    """
+    if isinstance(profile, dict):
+        values = [profile.get(field) for field in FEATURE_FIELDS]
+    else:
+        values = [getattr(profile, field, None) for field in FEATURE_FIELDS]
+
+    row = []
+    for field, value in zip(FEATURE_FIELDS, values):
+        if value is None:
+            value = FEATURE_DEFAULTS[field]
+        if field in CATEGORY_ENCODINGS:
+            mapping, default = CATEGORY_ENCODINGS[field]
+            value = mapping.get(value, default)
+        row.append(value)
+    return row
+
+
+def feature_matrix(rows):
+    """
+    Encode many profiles at once, column by column.
+
+    Args:
+        rows: sequence of value tuples in FEATURE_FIELDS order, e.g. from
+            CustomUser.objects.values_list(*FEATURE_FIELDS)
+
+    Returns:
+        float array of shape (len(rows), len(FEATURE_FIELDS))
+    """
+    columns = np.array(rows, dtype=object).reshape(-1, len(FEATURE_FIELDS))
+    matrix = np.empty(columns.shape, dtype=float)
+    for index, field in enumerate(FEATURE_FIELDS):
+        column = columns[:, index]
+        if field in CATEGORY_ENCODINGS:
+            mapping, default = CATEGORY_ENCODINGS[field]
+            mapping = {**mapping, None: mapping.get(FEATURE_DEFAULTS[field], default)}
+            matrix[:, index] = [mapping.get(value, default) for value in column]
+        else:
+            column = np.where(column == None, FEATURE_DEFAULTS[field], column)  # noqa: E711
+            matrix[:, index] = column.astype(float)
+    return matrix
+
+
+def _segment_id(prediction):
+    # If prediction is already numeric (shouldn't be), use it directly
+    if isinstance(prediction, (int, np.integer)):
+        return int(prediction)
+    return LABEL_TO_SEGMENT_ID.get(prediction, DEFAULT_SEGMENT_ID)
+
+
+class SegmentClassifier:
+    """Lazily loaded segment model that reloads when its file changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._model = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def model(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._model is None or mtime != self._mtime:
+            with self._lock:
+                if self._model is None or mtime != self._mtime:
+                    self._model = joblib.load(self.path)
+                    self._mtime = mtime
+        return self._model
+
+    def reset(self):
+        """Drop the loaded model; the next prediction loads it again."""
+        with self._lock:
+            self._model = None
+            self._mtime = None
+
+    def predict_segments(self, batch):
+        """Segment IDs for many profiles with a single model call."""
+        rows = [encode_features(profile) for profile in batch]
+        if not rows:
+            return []
+        predictions = self.model().predict(np.array(rows))
+        return [_segment_id(prediction) for prediction in predictions]
+
+    def predict_matrix(self, matrix):
+        """Segment IDs for an already encoded feature matrix (see feature_matrix)."""
+        if not len(matrix):
+            return np.empty(0, dtype=int)
+        predictions = self.model().predict(matrix)
+        return np.array([_segment_id(prediction) for prediction in predictions], dtype=int)
+
+    def predict_segment(self, features):
+        """Segment ID for one profile."""
+        return self.predict_segments([features])[0]
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """The process-wide classifier for the configured model path."""
+    global _classifier
+    path = segment_model_path()
+    if _classifier is None or _classifier.path != path:
+        with _classifier_lock:
+            if _classifier is None or _classifier.path != path:
+                _classifier = SegmentClassifier(path)
+    return _classifier
+
+
+def predict_segment(features):
+    return get_classifier().predict_segment(features)
+
+
+def predict_segments(batch):
+    return get_classifier().predict_segments(batch)
+
+
+def warm_up():
+    """Load the model now so the first signup does not pay for it."""
+    get_classifier().model()
@@ -1,10 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-import joblib
-import os
-from django.conf import settings
-import numpy as np
+from .segmentation import predict_segment
 
 User = get_user_model()
 
@@ -64,68 +61,8 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password2')
 
-        # --- Load Random Forest model ---
-        model_path = os.path.join(settings.BASE_DIR, 'Datasets,Models', 'final_RF.pkl')
-        rf_model = joblib.load(model_path)
-
-        # --- Encode categorical features (must match training order) ---
-        # Feature order: Age, Gender, Exercise Level, Diet Type, Sleep Hours, 
-        # Stress Level, Mental Health Condition, Work Hours per Week, 
-        # Screen Time per Day (Hours), Social Interaction Score, Happiness Score
-        
-        gender = validated_data.get('gender', 'male')
-        gender_mapping = {'male': 0, 'female': 1, 'other': 2}
-        gender_encoded = gender_mapping.get(gender, 0)
-        
-        exercise_level = validated_data.get('exercise_level', 'moderate')
-        exercise_mapping = {'low': 0, 'moderate': 1, 'high': 2}
-        exercise_encoded = exercise_mapping.get(exercise_level, 1)
-        
-        diet_type = validated_data.get('diet_type', 'balanced')
-        diet_mapping = {'vegetarian': 0, 'vegan': 1, 'balanced': 2, 'junk_food': 3, 'keto': 4}
-        diet_encoded = diet_mapping.get(diet_type, 2)
-        
-        stress_level = validated_data.get('stress_level', 'moderate')
-        stress_mapping = {'low': 0, 'moderate': 1, 'high': 2}
-        stress_encoded = stress_mapping.get(stress_level, 1)
-        
-        mental_health = validated_data.get('mental_health_condition', 'none')
-        mental_mapping = {'none': 0, 'ptsd': 1, 'depression': 2, 'anxiety': 3, 'bipolar': 4}
-        mental_encoded = mental_mapping.get(mental_health, 0)
-
-        # --- Prepare feature vector (11 features in exact training order) ---
-        features = np.array([[
-            validated_data.get('age', 25),
-            gender_encoded,
-            exercise_encoded,
-            diet_encoded,
-            validated_data.get('sleep_hours', 7),
-            stress_encoded,
-            mental_encoded,
-            validated_data.get('work_hours_per_week', 40),
-            validated_data.get('screen_time_per_day', 6.0),
-            validated_data.get('self_reported_social_interaction_score', 5),
-            validated_data.get('happiness_score', 5)
-        ]])
-
-        # --- Predict segment label using Random Forest ---
-        segment_prediction = rf_model.predict(features)[0]
-        
-        # Map string label back to numeric cluster ID
-        label_to_id_mapping = {
-            'Older_HighStress_Exhausted': 0,
-            'Young_HighStress_ActiveSocial': 1,
-            'MidLife_LowStress_Depressed': 2,
-            'MidLife_Thriving_WellnessSeeker': 3,
-            'WorkingProfessional_Sedentary_Stable': 4
-        }
-        
-        # If prediction is already numeric (shouldn't be), use it directly
-        # Otherwise map the string label to its numeric ID
-        if isinstance(segment_prediction, (int, np.integer)):
-            segment_label = int(segment_prediction)
-        else:
-            segment_label = label_to_id_mapping.get(segment_prediction, 4)  # Default to 4 if unknown
+        # --- Predict segment label with the in-memory Random Forest ---
+        segment_label = predict_segment(validated_data)
         
         validated_data['segment_label'] = segment_label
 
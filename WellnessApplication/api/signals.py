@@ -1,193 +1,376 @@
 """
 Signals for automatic statistics updates.
-Updates UserStatistics when activities are completed.
+Updates UserStatistics when activities are created, changed or deleted.
+
+Each change is folded into the stored counters as a delta (the row's new
+contribution minus its old one) under a row lock, so the work done per save
+does not depend on the size of the user's history. Streaks come from the
+user's activity UserStreak (api/streaks.py), which extends in O(1) and only
+rebuilds for back-dated or withdrawn completions; UserStatistics keeps a
+copy. `_update_user_statistics` remains the full recompute used by the
+`reconcile_user_statistics` command to repair drift.
+
+The same delta is applied to the per-day UserDailyActivity rollup (see
+api/daily_activity.py), from which streak rebuilds and rolling windows are
+read, so neither needs the activity history either.
+
+Bulk writers wrap their work in `deferred_statistics()`: inside it, changes
+only mark the user dirty, and each dirty user is refreshed once on commit.
+Rows inserted with `bulk_create` are reported through `activities_bulk_created`.
 """
-from django.db.models.signals import post_save, post_delete
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from workout.models import Activity, WorkoutSession
-from .models import UserStatistics
+from django.utils import timezone
+from workout.models import Activity
+from .daily_activity import SOURCE_FIELDS, apply_day_deltas, day_deltas, rebuild_daily_activity
+from .models import UserDailyActivity, UserStatistics, UserStreak
+from .streaks import move_day, rebuild_streak
 
 User = get_user_model()
 
+# Activity columns that feed UserStatistics and the daily rollup.
+CONTRIBUTION_FIELDS = SOURCE_FIELDS
+
+# UserStatistics counters that are plain sums of per-activity contributions.
+COUNTER_FIELDS = (
+    'total_activities_assigned',
+    'total_activities_completed',
+    'total_exercises',
+    'total_meditations',
+    'total_journaling',
+    'total_minutes_exercised',
+    'total_minutes_meditated',
+    'motivation_delta_sum',
+    'motivation_delta_count',
+    'enjoyment_rating_sum',
+    'enjoyment_rating_count',
+    'difficulty_rating_sum',
+    'difficulty_rating_count',
+)
+
+TYPE_COUNTERS = {
+    'exercise': 'total_exercises',
+    'meditation': 'total_meditations',
+    'journaling': 'total_journaling',
+}
+
+TYPE_MINUTES = {
+    'exercise': 'total_minutes_exercised',
+    'meditation': 'total_minutes_meditated',
+}
+
+# UserStatistics counters summed from the daily rollup by a full recompute.
+ROLLUP_TOTALS = {
+    'total_activities_completed': 'completed_count',
+    'total_exercises': 'exercise_count',
+    'total_meditations': 'meditation_count',
+    'total_journaling': 'journaling_count',
+    'total_minutes_exercised': 'exercise_minutes',
+    'total_minutes_meditated': 'meditation_minutes',
+    'motivation_delta_sum': 'motivation_delta_sum',
+    'motivation_delta_count': 'motivation_delta_count',
+    'enjoyment_rating_sum': 'enjoyment_rating_sum',
+    'enjoyment_rating_count': 'enjoyment_rating_count',
+    'difficulty_rating_sum': 'difficulty_rating_sum',
+    'difficulty_rating_count': 'difficulty_rating_count',
+}
+
+# Lengths of the rolling windows, in local calendar days including today.
+ROLLING_WEEK_DAYS = 7
+ROLLING_MONTH_DAYS = 30
+
+_deferred = threading.local()
+
+
+def _deferred_state():
+    if not hasattr(_deferred, 'depth'):
+        _deferred.depth = 0
+        _deferred.user_ids = set()
+    return _deferred
+
+
+@contextmanager
+def deferred_statistics():
+    """
+    Coalesce statistics refreshes for the enclosed block.
+
+    Activity changes inside the block only mark their user dirty. When the
+    outermost block exits, every dirty user is recomputed once, after the
+    surrounding transaction commits (immediately in autocommit mode). Usable
+    as a context manager or as a decorator; nested blocks share one buffer.
+    """
+    state = _deferred_state()
+    state.depth += 1
+    try:
+        yield
+    finally:
+        state.depth -= 1
+        if state.depth == 0 and state.user_ids:
+            user_ids = set(state.user_ids)
+            state.user_ids.clear()
+            transaction.on_commit(lambda: _refresh_users(user_ids))
+
+
+def _is_deferring():
+    return _deferred_state().depth > 0
+
+
+def _refresh_users(user_ids):
+    """
+    Recompute statistics once for each user that still exists.
+    """
+    for user in User.objects.filter(pk__in=user_ids):
+        with transaction.atomic():
+            UserStatistics.objects.select_for_update().filter(user=user).first()
+            _update_user_statistics(user)
+
+
+@receiver(pre_save, sender=Activity)
+def remember_activity_contribution(sender, instance, **kwargs):
+    """
+    Capture what the stored row contributed before it is overwritten.
+    """
+    instance._statistics_previous = None
+    if instance.pk is None or instance._state.adding or _is_deferring():
+        return
+
+    previous = Activity.objects.filter(pk=instance.pk).values(*CONTRIBUTION_FIELDS).first()
+    instance._statistics_previous = previous
+
 
 @receiver(post_save, sender=Activity)
 def update_statistics_on_activity_save(sender, instance, created, **kwargs):
     """
-    Update user statistics whenever an activity is completed.
+    Fold the saved activity's change into the user's statistics.
     Triggered when Activity is saved (created or updated).
     """
-    if instance.completed:
-        user = instance.user
-        _update_user_statistics(user)
+    if _is_deferring():
+        _deferred_state().user_ids.add(instance.user_id)
+        return
+
+    previous = getattr(instance, '_statistics_previous', None)
+    current = {field: getattr(instance, field) for field in CONTRIBUTION_FIELDS}
+    _apply_activity_change(instance.user, previous, current)
 
 
 @receiver(post_delete, sender=Activity)
 def update_statistics_on_activity_delete(sender, instance, **kwargs):
     """
-    Update user statistics when an activity is deleted.
+    Remove a deleted activity's contribution from the user's statistics.
     """
-    user = instance.user
-    _update_user_statistics(user)
+    if _is_deferring():
+        _deferred_state().user_ids.add(instance.user_id)
+        return
 
+    current = {field: getattr(instance, field) for field in CONTRIBUTION_FIELDS}
+    _apply_activity_change(instance.user, current, None)
 
-@receiver(post_save, sender=WorkoutSession)
-def update_statistics_on_workout_save(sender, instance, created, **kwargs):
+
+def _contribution(values):
     """
-    Update user statistics when a workout session is saved.
+    Counter values a single activity row adds to UserStatistics.
     """
-    user = instance.user
-    _update_user_statistics(user)
+    if values is None:
+        return {}
+
+    contribution = {'total_activities_assigned': 1}
+    if not values['completed']:
+        return contribution
+
+    contribution['total_activities_completed'] = 1
+
+    activity_type = values['activity_type']
+    if activity_type in TYPE_COUNTERS:
+        contribution[TYPE_COUNTERS[activity_type]] = 1
+    if activity_type in TYPE_MINUTES:
+        contribution[TYPE_MINUTES[activity_type]] = values['duration_minutes'] or 0
+
+    for field in ('motivation_delta', 'enjoyment_rating', 'difficulty_rating'):
+        if values[field] is not None:
+            contribution[f'{field}_sum'] = values[field]
+            contribution[f'{field}_count'] = 1
 
+    return contribution
 
-@receiver(post_delete, sender=WorkoutSession)
-def update_statistics_on_workout_delete(sender, instance, **kwargs):
+
+def _completion_day(values):
     """
-    Update user statistics when a workout session is deleted.
+    Local calendar day the activity counts towards for streaks, if any.
     """
-    user = instance.user
-    _update_user_statistics(user)
+    if values is None or not values['completed'] or values['completion_date'] is None:
+        return None
+    return timezone.localdate(values['completion_date'])
 
 
-def _update_user_statistics(user):
+def _apply_activity_change(user, previous, current):
     """
-    Calculate and update all statistics for a user.
-    This is called by signal handlers to keep statistics in sync.
+    Apply the difference between an activity's old and new contribution.
+
+    `previous` / `current` are dicts of CONTRIBUTION_FIELDS, or None when the
+    row did not exist before (create) or does not exist after (delete).
     """
-    from django.db.models import Sum, Avg
-    from django.utils import timezone
-    from datetime import timedelta
+    old = _contribution(previous)
+    new = _contribution(current)
+    delta = {
+        field: new.get(field, 0) - old.get(field, 0)
+        for field in COUNTER_FIELDS
+    }
+    delta = {field: change for field, change in delta.items() if change}
 
-    # Get or create statistics object
-    stats, _ = UserStatistics.objects.get_or_create(user=user)
+    previous_day = _completion_day(previous)
+    current_day = _completion_day(current)
+    days = day_deltas(previous, current)
+    if not delta and not days and previous_day == current_day:
+        return
 
-    all_activities = Activity.objects.filter(user=user)
-    completed_activities = all_activities.filter(completed=True)
-
-    # Core activity counts
-    stats.total_activities_completed = completed_activities.count()
-
-    # By-type completion counts
-    stats.total_exercises = completed_activities.filter(activity_type='exercise').count()
-    stats.total_meditations = completed_activities.filter(activity_type='meditation').count()
-    stats.total_journaling = completed_activities.filter(activity_type='journaling').count()
-
-    # Time metrics by type
-    stats.total_minutes_exercised = (
-        completed_activities.filter(activity_type='exercise').aggregate(total=Sum('duration_minutes'))['total'] or 0
-    )
-    stats.total_minutes_meditated = (
-        completed_activities.filter(activity_type='meditation').aggregate(total=Sum('duration_minutes'))['total'] or 0
-    )
-
-    # Averages
-    stats.avg_motivation_improvement = round(
-        completed_activities.exclude(motivation_delta__isnull=True).aggregate(avg=Avg('motivation_delta'))['avg'] or 0.0,
-        2,
-    )
-    stats.avg_enjoyment_rating = round(
-        completed_activities.exclude(enjoyment_rating__isnull=True).aggregate(avg=Avg('enjoyment_rating'))['avg'] or 0.0,
-        2,
-    )
-    stats.avg_difficulty_rating = round(
-        completed_activities.exclude(difficulty_rating__isnull=True).aggregate(avg=Avg('difficulty_rating'))['avg'] or 0.0,
-        2,
-    )
-
-    # Completion rate (% assigned that were completed)
-    stats.total_activities_assigned = all_activities.count()
-    if stats.total_activities_assigned > 0:
-        stats.overall_completion_rate = round(
-            (stats.total_activities_completed / stats.total_activities_assigned) * 100.0,
-            2,
-        )
-    else:
-        stats.overall_completion_rate = 0.0
+    _apply_counter_delta(user, delta, previous_day, current_day, seed=current is not None, days=days)
 
-    # Weekly and monthly rolling windows
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
 
-    week_activities = completed_activities.filter(completion_date__gte=week_ago)
-    month_activities = completed_activities.filter(completion_date__gte=month_ago)
+def activities_bulk_created(user, activities):
+    """
+    Fold rows inserted with `bulk_create` (which sends no save signals) into
+    the user's statistics with a single update.
+    """
+    if not activities:
+        return
+    if _is_deferring():
+        _deferred_state().user_ids.add(user.pk)
+        return
 
-    stats.activities_this_week = week_activities.count()
-    stats.minutes_this_week = week_activities.aggregate(total=Sum('duration_minutes'))['total'] or 0
-    stats.activities_this_month = month_activities.count()
-    stats.minutes_this_month = month_activities.aggregate(total=Sum('duration_minutes'))['total'] or 0
+    rows = [{field: getattr(activity, field) for field in CONTRIBUTION_FIELDS} for activity in activities]
+    if any(_completion_day(row) for row in rows):
+        # Completed rows move streaks; rebuild rather than replay them one by one.
+        _refresh_users({user.pk})
+        return
 
-    # Streak metrics
-    stats.current_streak_days = _calculate_streak(user)
-    stats.longest_streak_days = _calculate_longest_streak(user)
+    delta = Counter()
+    for row in rows:
+        delta.update(_contribution(row))
+    _apply_counter_delta(user, delta)
 
-    # Last completed activity date
-    last_activity = completed_activities.order_by('-completion_date').first()
-    if last_activity:
-        stats.last_activity_date = last_activity.completion_date.date() if last_activity.completion_date else None
 
-    stats.save()
+def _apply_counter_delta(user, delta, previous_day=None, current_day=None, seed=True, days=None):
+    """
+    Add `delta` to the stored counters and `days` (per-day deltas) to the
+    daily rollup, and move streaks from `previous_day` to `current_day`.
+    Without a stored row, `seed` builds one from history.
+    """
+    with transaction.atomic():
+        stats = UserStatistics.objects.select_for_update().filter(user=user).first()
+        if stats is None:
+            if seed:
+                # No baseline to apply a delta to; build it from the history once.
+                _update_user_statistics(user)
+            # Deletes have nothing to subtract from (e.g. the user is being deleted).
+            return
+
+        if days:
+            apply_day_deltas(user.pk, days)
+
+        for field, change in delta.items():
+            value = getattr(stats, field) + change
+            if field != 'motivation_delta_sum':
+                # Never go negative on drifted rows; reconciliation repairs them.
+                value = max(0, value)
+            setattr(stats, field, value)
+
+        if previous_day != current_day and not (previous_day is None and current_day == stats.last_activity_date):
+            # Another completion already counted current_day otherwise.
+            streak = move_day(user.pk, UserStreak.Stream.ACTIVITY, previous_day, current_day)
+            _set_streaks(stats, streak or rebuild_streak(user.pk, UserStreak.Stream.ACTIVITY))
+
+        _refresh_derived_fields(stats)
+        _refresh_rolling_windows(stats, user)
+        stats.save()
+
+
+def _set_streaks(stats, streak):
+    """
+    Copy the user's activity streak onto the statistics row.
+    """
+    stats.current_streak_days = streak.current()
+    stats.longest_streak_days = streak.longest_streak
+    stats.last_activity_date = streak.last_date
 
 
-def _calculate_streak(user):
+def _refresh_derived_fields(stats):
     """
-    Calculate current consecutive days streak.
-    A streak is broken if there's a day without any completed activity.
+    Recompute averages and the completion rate from the stored sums.
     """
-    from django.utils import timezone
-    from datetime import timedelta
+    for prefix, average_field in (
+        ('motivation_delta', 'avg_motivation_improvement'),
+        ('enjoyment_rating', 'avg_enjoyment_rating'),
+        ('difficulty_rating', 'avg_difficulty_rating'),
+    ):
+        count = getattr(stats, f'{prefix}_count')
+        total = getattr(stats, f'{prefix}_sum')
+        setattr(stats, average_field, round(total / count, 2) if count else 0.0)
 
-    activity_dates = set(
-        Activity.objects.filter(
-            user=user,
-            completed=True,
-            completion_date__isnull=False,
-        ).values_list('completion_date__date', flat=True)
-    )
-
-    if not activity_dates:
-        return 0
+    if stats.total_activities_assigned > 0:
+        stats.overall_completion_rate = round(
+            (stats.total_activities_completed / stats.total_activities_assigned) * 100.0,
+            2,
+        )
+    else:
+        stats.overall_completion_rate = 0.0
 
-    today = timezone.now().date()
-    yesterday = today - timedelta(days=1)
-    start_date = today if today in activity_dates else (yesterday if yesterday in activity_dates else None)
 
-    if start_date is None:
-        return 0
+def _refresh_rolling_windows(stats, user):
+    """
+    Weekly and monthly rolling windows from at most 30 daily rollup rows.
+    """
+    month_start = timezone.localdate() - timedelta(days=ROLLING_MONTH_DAYS - 1)
+    _set_rolling_windows(stats, UserDailyActivity.objects.filter(user=user, date__gte=month_start).only(
+        'date', 'completed_count', 'total_minutes',
+    ))
 
-    streak = 0
-    current_date = start_date
-    while current_date in activity_dates:
-        streak += 1
-        current_date -= timedelta(days=1)
 
-    return streak
+def _set_rolling_windows(stats, days):
+    """
+    Activities and minutes of the last 7 and 30 local days (today included).
+    """
+    today = timezone.localdate()
+    week_start = today - timedelta(days=ROLLING_WEEK_DAYS - 1)
+    month_start = today - timedelta(days=ROLLING_MONTH_DAYS - 1)
+
+    stats.activities_this_week = stats.minutes_this_week = 0
+    stats.activities_this_month = stats.minutes_this_month = 0
+    for day in days:
+        if day.date < month_start:
+            continue
+        stats.activities_this_month += day.completed_count
+        stats.minutes_this_month += day.total_minutes
+        if day.date >= week_start:
+            stats.activities_this_week += day.completed_count
+            stats.minutes_this_week += day.total_minutes
 
 
-def _calculate_longest_streak(user):
+def _update_user_statistics(user):
     """
-    Calculate the longest consecutive days streak ever achieved.
+    Calculate and update all statistics for a user from their full history.
+    Used to seed new statistics rows, to flush deferred refreshes and to
+    reconcile drift. Rebuilds the user's daily rollup on the way.
     """
-    activity_dates = sorted(set(
-        Activity.objects.filter(
-        user=user,
-            completed=True,
-            completion_date__isnull=False,
-        ).values_list('completion_date__date', flat=True)
-    ))
+    # A refresh made now also covers any pending deferred one.
+    _deferred_state().user_ids.discard(user.pk)
 
-    if not activity_dates:
-        return 0
+    stats, _ = UserStatistics.objects.get_or_create(user=user)
+    days = rebuild_daily_activity([user.pk])[user.pk]
 
-    max_streak = 1
-    current_streak = 1
+    for field, column in ROLLUP_TOTALS.items():
+        setattr(stats, field, sum(getattr(day, column) for day in days))
+    stats.total_activities_assigned = Activity.objects.filter(user=user).count()
 
-    for i in range(1, len(activity_dates)):
-        # Check if dates are consecutive
-        if (activity_dates[i] - activity_dates[i-1]).days == 1:
-            current_streak += 1
-            max_streak = max(max_streak, current_streak)
-        else:
-            current_streak = 1
+    _refresh_derived_fields(stats)
+    _set_rolling_windows(stats, days)
+    _set_streaks(stats, rebuild_streak(user.pk, UserStreak.Stream.ACTIVITY, days={day.date for day in days}))
 
-    return max_streak
+    stats.save()
+    return stats
@@ -0,0 +1,199 @@
+"""
+Statistics engine for GET /api/statistics/.
+
+Builds the full statistics payload for a window with a fixed number of
+queries: one conditional aggregate for the overview/breakdowns/ratings, one
+range read of the UserDailyActivity rollup for the per-day series, one for
+the user's activity UserStreak row, one for workout sessions and one for the
+recent activity list. The query count does not depend on the window
+length, and the series reads at most one row per day in the window.
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Q, Sum
+
+from workout.models import Activity, WorkoutSession
+from .models import UserDailyActivity, UserStreak
+from .streaks import get_streak
+
+
+ACTIVITY_TYPES = ('exercise', 'meditation', 'journaling')
+
+
+def build_user_statistics(user, period, start_date, end_date):
+    """Return the statistics response payload for `user` between the two datetimes."""
+    period_activities = Activity.objects.filter(
+        user=user,
+        created_at__gte=start_date,
+        created_at__lte=end_date,
+    )
+
+    totals = _aggregate_totals(period_activities)
+    daily_activity_count, daily_duration = _daily_series(user, start_date.date(), end_date.date())
+
+    total_completed = totals['total_completed']
+    total_assigned = totals['total_assigned']
+    total_duration = totals['total_duration'] or 0
+    completion_rate = (total_completed / total_assigned * 100) if total_assigned > 0 else 0
+
+    overview = {
+        'total_activities_completed': total_completed,
+        'total_activities_assigned': total_assigned,
+        'completion_rate': round(completion_rate, 1),
+        'total_duration_minutes': total_duration,
+        'total_duration_hours': round(total_duration / 60, 1),
+    }
+
+    activity_breakdown = {
+        act_type: totals[f'{act_type}_count'] for act_type in ACTIVITY_TYPES
+    }
+    duration_by_type = {
+        act_type: totals[f'{act_type}_minutes'] or 0 for act_type in ACTIVITY_TYPES
+    }
+
+    motivating = totals['motivating']
+    motivation_trends = {
+        'average_motivation_before': round(totals['avg_before'] or 0, 2),
+        'average_motivation_after': round(totals['avg_after'] or 0, 2),
+        'average_improvement': round(totals['avg_delta'] or 0, 2),
+        'activities_with_improvement': motivating,
+        'improvement_rate': round(
+            (motivating / total_completed * 100) if total_completed > 0 else 0,
+            1
+        ),
+    }
+
+    sessions = WorkoutSession.objects.filter(
+        user=user,
+        created_at__gte=start_date,
+        created_at__lte=end_date
+    ).aggregate(total=Count('id'), avg_completion=Avg('completion_rate'))
+
+    engagement = {
+        'current_streak_days': calculate_current_streak(user),
+        'total_sessions': sessions['total'],
+        'avg_session_completion_rate': round(sessions['avg_completion'] or 0, 1),
+        'engagement_score': round(user.engagement_score, 2),
+        'motivation_score': user.motivation_score,
+    }
+
+    ratings = {
+        'average_enjoyment': round(totals['avg_enjoyment'] or 0, 2),
+        'average_difficulty': round(totals['avg_difficulty'] or 0, 2),
+        'highly_enjoyed_activities': totals['highly_enjoyed'],
+        'well_balanced_activities': totals['well_balanced'],
+    }
+
+    days_in_period = (end_date - start_date).days
+    weeks_in_period = max(days_in_period / 7, 1)
+
+    goal_progress = {
+        'average_activities_per_week': round(total_completed / weeks_in_period, 1),
+        'total_workouts_lifetime': user.workouts_completed,
+        'total_meditations_lifetime': user.meditation_sessions,
+    }
+
+    recent_activities = [
+        {
+            'id': row['id'],
+            'name': row['activity_name'],
+            'type': row['activity_type'],
+            'completed_date': row['completion_date'].isoformat() if row['completion_date'] else None,
+            'duration_minutes': row['duration_minutes'],
+            'motivation_delta': row['motivation_delta'],
+            'enjoyment_rating': row['enjoyment_rating'],
+        }
+        for row in period_activities.filter(completed=True).order_by('-completion_date').values(
+            'id', 'activity_name', 'activity_type', 'completion_date',
+            'duration_minutes', 'motivation_delta', 'enjoyment_rating',
+        )[:5]
+    ]
+
+    return {
+        'period': period,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'overview': overview,
+        'activity_breakdown': {
+            **activity_breakdown,
+            'duration_by_type': duration_by_type,
+        },
+        'daily_activity_count': daily_activity_count,
+        'daily_duration': daily_duration,
+        'motivation_trends': motivation_trends,
+        'engagement': engagement,
+        'ratings': ratings,
+        'goal_progress': goal_progress,
+        'recent_activities': recent_activities,
+    }
+
+
+def _aggregate_totals(period_activities):
+    """Overview, per-type breakdown, motivation and rating figures in one query."""
+    completed = Q(completed=True)
+    with_motivation = completed & Q(motivation_before__isnull=False, motivation_after__isnull=False)
+
+    per_type = {}
+    for act_type in ACTIVITY_TYPES:
+        of_type = completed & Q(activity_type=act_type)
+        per_type[f'{act_type}_count'] = Count('id', filter=of_type)
+        per_type[f'{act_type}_minutes'] = Sum('duration_minutes', filter=of_type)
+
+    return period_activities.aggregate(
+        total_assigned=Count('id'),
+        total_completed=Count('id', filter=completed),
+        total_duration=Sum('duration_minutes', filter=completed),
+        avg_before=Avg('motivation_before', filter=with_motivation),
+        avg_after=Avg('motivation_after', filter=with_motivation),
+        avg_delta=Avg('motivation_delta', filter=with_motivation),
+        motivating=Count('id', filter=completed & Q(is_motivating=True)),
+        avg_enjoyment=Avg('enjoyment_rating', filter=completed),
+        avg_difficulty=Avg('difficulty_rating', filter=completed),
+        highly_enjoyed=Count('id', filter=completed & Q(enjoyment_rating__gte=4)),
+        well_balanced=Count('id', filter=completed & Q(difficulty_rating__in=[2, 3])),
+        **per_type,
+    )
+
+
+def _daily_series(user, first_day, last_day):
+    """Per-day count and duration series from the user's daily rollup rows."""
+    buckets = {
+        day.date: day
+        for day in UserDailyActivity.objects.filter(user=user, date__gte=first_day, date__lte=last_day)
+    }
+
+    daily_activity_count = []
+    daily_duration = []
+
+    empty = UserDailyActivity()
+    current_date = first_day
+    while current_date <= last_day:
+        day = buckets.get(current_date, empty)
+
+        daily_activity_count.append({
+            'date': current_date.isoformat(),
+            'count': day.completed_count,
+            'exercise': day.exercise_count,
+            'meditation': day.meditation_count,
+            'journaling': day.journaling_count,
+        })
+        daily_duration.append({
+            'date': current_date.isoformat(),
+            'total_minutes': day.total_minutes,
+            'exercise_minutes': day.exercise_minutes,
+            'meditation_minutes': day.meditation_minutes,
+        })
+
+        current_date += timedelta(days=1)
+
+    return daily_activity_count, daily_duration
+
+
+def calculate_current_streak(user):
+    """
+    Current activity streak in days, counted back from today.
+
+    Today may still be empty (the streak then continues from yesterday). Read
+    from the user's activity UserStreak row, so every endpoint agrees.
+    """
+    return get_streak(user.pk, UserStreak.Stream.ACTIVITY).current()
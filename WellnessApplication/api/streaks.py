@@ -0,0 +1,107 @@
+"""
+Per-user streak tracker shared by every endpoint that reports streaks.
+
+One UserStreak row per (user, stream) stores the run of consecutive days
+ending on the stream's latest day and the longest run so far. A day at or
+after `last_date` updates the row in O(1). A back-dated day, or a day
+withdrawn by a deleted, un-completed or moved event, rebuilds the row from
+the stream's distinct days. Reads are one row (`get_streak`), built from
+history the first time a user's stream is read.
+
+Streams:
+  - activity: days with a completed activity (the UserDailyActivity rollup),
+    kept current by api.signals
+  - journal:  days with a journal entry, kept current by journal.signals
+"""
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import UserDailyActivity, UserStreak
+
+
+def stream_days(user_id, stream):
+    """Distinct days with at least one event in `stream`."""
+    if stream == UserStreak.Stream.JOURNAL:
+        from journal.models import JournalEntry
+
+        days = JournalEntry.objects.filter(user_id=user_id).values_list('entry_date', flat=True)
+        return set(days.distinct().order_by())
+    return set(UserDailyActivity.objects.filter(user_id=user_id).values_list('date', flat=True))
+
+
+def get_streak(user_id, stream):
+    """The user's UserStreak for `stream`, built from history if there is none yet."""
+    streak = UserStreak.objects.filter(user_id=user_id, stream=stream).first()
+    return streak if streak is not None else rebuild_streak(user_id, stream)
+
+
+def rebuild_streak(user_id, stream, days=None):
+    """
+    Recompute the stored streak from the stream's days (`days` when the
+    caller already has them) and save it.
+    """
+    if days is None:
+        days = stream_days(user_id, stream)
+    current, longest, last_date = _runs(days)
+    streak, _ = UserStreak.objects.update_or_create(
+        user_id=user_id,
+        stream=stream,
+        defaults={'current_streak': current, 'longest_streak': longest, 'last_date': last_date},
+    )
+    return streak
+
+
+def move_day(user_id, stream, previous_day, current_day):
+    """
+    Record that an event moved from `previous_day` to `current_day` (either
+    may be None for a new or removed event).
+
+    Returns:
+        the updated UserStreak, or None when a day is withdrawn from a stream
+        without a row (there is nothing to withdraw from, e.g. while the user
+        is being deleted; the row is built on its next read).
+    """
+    with transaction.atomic():
+        streak = UserStreak.objects.select_for_update().filter(user_id=user_id, stream=stream).first()
+        if streak is None:
+            return rebuild_streak(user_id, stream) if previous_day is None else None
+        if previous_day == current_day or (previous_day is None and current_day == streak.last_date):
+            # Nothing moved, or the day already has an event.
+            return streak
+        if previous_day is None and _extend(streak, current_day):
+            streak.save(update_fields=['current_streak', 'longest_streak', 'last_date', 'updated_at'])
+            return streak
+        return rebuild_streak(user_id, stream)
+
+
+def _extend(streak, day):
+    """
+    Add a new event day to the stored runs. Returns False when `day` is
+    before `last_date`, which only a rebuild can place.
+    """
+    last_day = streak.last_date
+    if last_day is not None and day < last_day:
+        return False
+
+    if last_day is None or day > last_day + timedelta(days=1):
+        streak.current_streak = 1
+    elif day == last_day + timedelta(days=1):
+        streak.current_streak += 1
+
+    streak.longest_streak = max(streak.longest_streak, streak.current_streak)
+    streak.last_date = day
+    return True
+
+
+def _runs(days):
+    """(run ending on the last day, longest run, last day) of a set of days."""
+    if not days:
+        return 0, 0, None
+
+    ordered = sorted(days)
+    longest = current = 1
+    for previous, day in zip(ordered, ordered[1:]):
+        current = current + 1 if day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+    return current, longest, ordered[-1]
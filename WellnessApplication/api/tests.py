@@ -1,3 +1,735 @@
-from django.test import TestCase
+from datetime import timedelta
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+import numpy as np
+
+from api.daily_activity import DAY_FIELDS, rebuild_daily_activity
+from api.models import RLTransition, UserDailyActivity, UserStatistics, UserStreak
+from api.rl_agent import RLModelManager, WellnessRLAgent
+from api.rl_registry import AgentRegistry
+from api.rl_training import record_transition, train_pending_transitions
+from api.sampling import RandomRowSampler, bitmap_contains
+from api.segmentation import SegmentClassifier, encode_features
+from api.signals import _update_user_statistics
+from api.statistics import calculate_current_streak
+from api.streaks import get_streak
+from notifications.models import MotivationalQuote
+from workout.models import Activity
+
+
+User = get_user_model()
+
+
+class UserStatisticsEndpointTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='stats_user',
+            email='stats_user@example.com',
+            password='StrongPassword123!',
+        )
+        User.objects.filter(pk=self.user.pk).update(date_joined=timezone.now() - timedelta(days=400))
+        self.user.refresh_from_db()
+        self.client.force_authenticate(user=self.user)
+
+        self.statistics_url = '/api/statistics/'
+
+    def _create_activity(self, days_ago, activity_type='exercise', completed=True, minutes=10):
+        moment = timezone.now() - timedelta(days=days_ago)
+        activity = Activity.objects.create(
+            user=self.user,
+            activity_name='Brisk Walking',
+            activity_type=activity_type,
+            description='Walking set',
+            duration_minutes=minutes,
+            duration_seconds=minutes * 60,
+            intensity='Moderate',
+            completed=completed,
+            completion_date=moment if completed else None,
+            motivation_before=2,
+            motivation_after=4,
+            enjoyment_rating=4,
+            difficulty_rating=3,
+        )
+        Activity.objects.filter(pk=activity.pk).update(created_at=moment)
+        return activity
+
+    def _query_count(self, period):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.statistics_url, {'period': period})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response
+
+    def test_statistics_payload_buckets_completed_activities_by_day(self):
+        self._create_activity(0, 'exercise', minutes=20)
+        self._create_activity(0, 'meditation', minutes=10)
+        self._create_activity(1, 'exercise', minutes=15)
+        self._create_activity(2, 'meditation', completed=False)
+
+        response = self.client.get(self.statistics_url, {'period': '7days'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['overview']['total_activities_completed'], 3)
+        self.assertEqual(response.data['overview']['total_activities_assigned'], 4)
+        self.assertEqual(response.data['activity_breakdown']['duration_by_type']['exercise'], 35)
+        self.assertEqual(response.data['engagement']['current_streak_days'], 2)
+        self.assertEqual(response.data['ratings']['highly_enjoyed_activities'], 3)
+
+        today = response.data['daily_activity_count'][-1]
+        self.assertEqual(today['date'], timezone.localdate().isoformat())
+        self.assertEqual((today['count'], today['exercise'], today['meditation']), (2, 1, 1))
+        self.assertEqual(response.data['daily_duration'][-1]['total_minutes'], 30)
+        self.assertEqual(len(response.data['daily_activity_count']), 8)
+
+    def test_statistics_query_count_does_not_grow_with_window(self):
+        for days_ago in range(0, 360, 3):
+            self._create_activity(days_ago, 'exercise' if days_ago % 2 else 'meditation')
+
+        week_queries, _ = self._query_count('7days')
+        quarter_queries, _ = self._query_count('90days')
+        all_queries, response = self._query_count('all')
+
+        self.assertEqual(len(response.data['daily_activity_count']), 401)
+        self.assertEqual(week_queries, quarter_queries)
+        self.assertEqual(week_queries, all_queries)
+        self.assertLessEqual(all_queries, 6)
+
+
+class IncrementalUserStatisticsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='incremental_user',
+            email='incremental_user@example.com',
+            password='StrongPassword123!',
+        )
+
+    def _create_activity(self, days_ago=0, activity_type='exercise', completed=False, **extra):
+        return Activity.objects.create(
+            user=self.user,
+            activity_name='Box Breathing',
+            activity_type=activity_type,
+            description='Breathing set',
+            duration_minutes=extra.pop('duration_minutes', 10),
+            intensity='Low',
+            completed=completed,
+            completion_date=timezone.now() - timedelta(days=days_ago) if completed else None,
+            **extra,
+        )
+
+    def _complete(self, activity, days_ago=0, **ratings):
+        activity.completed = True
+        activity.completion_date = timezone.now() - timedelta(days=days_ago)
+        for field, value in ratings.items():
+            setattr(activity, field, value)
+        activity.save()
+
+    def _stored(self):
+        return UserStatistics.objects.values().get(user=self.user)
+
+    def _rebuilt(self):
+        _update_user_statistics(self.user)
+        return self._stored()
+
+    def _assert_matches_full_recompute(self):
+        incremental = self._stored()
+        rebuilt = self._rebuilt()
+        for field in ('id', 'last_updated', 'created_at'):
+            incremental.pop(field)
+            rebuilt.pop(field)
+        self.assertEqual(incremental, rebuilt)
+
+    def test_incremental_updates_match_full_recompute(self):
+        first = self._create_activity()
+        second = self._create_activity(activity_type='meditation')
+        third = self._create_activity()
+
+        self._complete(first, days_ago=1, motivation_before=2, motivation_after=4, enjoyment_rating=5)
+        self._complete(second, days_ago=0, difficulty_rating=2)
+        self._complete(third, days_ago=3, motivation_before=4, motivation_after=3)
+        self._assert_matches_full_recompute()
+
+        stats = self._stored()
+        self.assertEqual(stats['total_activities_completed'], 3)
+        self.assertEqual(stats['current_streak_days'], 2)
+        self.assertEqual(stats['avg_motivation_improvement'], 0.5)
+
+        second.enjoyment_rating = 3
+        second.save()
+        third.completed = False
+        third.completion_date = None
+        third.save()
+        first.delete()
+        self._assert_matches_full_recompute()
+
+    def test_completing_activity_query_count_independent_of_history(self):
+        def completion_queries():
+            pending = self._create_activity()
+            with CaptureQueriesContext(connection) as queries:
+                self._complete(pending, enjoyment_rating=4)
+            return len(queries)
+
+        for days_ago in range(2):
+            self._create_activity(days_ago=days_ago, completed=True)
+        short_history = completion_queries()
+
+        for days_ago in range(2, 40):
+            self._create_activity(days_ago=days_ago, completed=True)
+        long_history = completion_queries()
+
+        self.assertEqual(short_history, long_history)
+        stats = self._stored()
+        self.assertEqual(stats['total_activities_completed'], 42)
+        self.assertEqual(stats['current_streak_days'], 40)
+        self.assertEqual(stats['longest_streak_days'], 40)
+
+    def test_reconcile_command_repairs_drift(self):
+        self._create_activity(completed=True)
+        UserStatistics.objects.filter(user=self.user).update(total_exercises=7, current_streak_days=9)
+
+        out = StringIO()
+        call_command('reconcile_user_statistics', stdout=out)
+
+        stats = self._stored()
+        self.assertEqual(stats['total_exercises'], 1)
+        self.assertEqual(stats['current_streak_days'], 1)
+        self.assertIn('Rows repaired: 1', out.getvalue())
+
+
+class UserDailyActivityRollupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='rollup_user',
+            email='rollup_user@example.com',
+            password='StrongPassword123!',
+        )
+
+    def _create_activity(self, days_ago=None, activity_type='exercise', minutes=10, **extra):
+        completed = days_ago is not None
+        return Activity.objects.create(
+            user=self.user,
+            activity_name='Brisk Walking',
+            activity_type=activity_type,
+            description='Walking set',
+            duration_minutes=minutes,
+            duration_seconds=minutes * 60,
+            intensity='Moderate',
+            completed=completed,
+            completion_date=timezone.now() - timedelta(days=days_ago) if completed else None,
+            **extra,
+        )
+
+    def _stored_days(self):
+        return {
+            row.pop('date'): row
+            for row in UserDailyActivity.objects.filter(user=self.user).values('date', *DAY_FIELDS)
+        }
+
+    def _rebuilt_days(self):
+        rebuilt = rebuild_daily_activity([self.user.pk])[self.user.pk]
+        return {day.date: {field: getattr(day, field) for field in DAY_FIELDS} for day in rebuilt}
+
+    def test_incremental_rollup_matches_rebuild(self):
+        walk = self._create_activity(0, motivation_after=4, motivation_delta=2)
+        breathe = self._create_activity(0, 'meditation', minutes=15, enjoyment_rating=5)
+        later = self._create_activity()
+
+        later.completed = True
+        later.completion_date = timezone.now() - timedelta(days=2)
+        later.difficulty_rating = 3
+        later.save()
+        walk.motivation_delta = -1
+        walk.save()
+        breathe.completion_date = timezone.now() - timedelta(days=1)
+        breathe.save()
+
+        today = timezone.localdate()
+        stored = self._stored_days()
+        self.assertEqual(stored[today]['exercise_count'], 1)
+        self.assertEqual(stored[today]['motivation_delta_sum'], -1)
+        self.assertEqual(stored[today - timedelta(days=1)]['meditation_minutes'], 15)
+        self.assertEqual(stored, self._rebuilt_days())
+
+    def test_day_row_removed_with_its_last_completion(self):
+        walk = self._create_activity(3)
+        run = self._create_activity(3)
+        day = timezone.localdate() - timedelta(days=3)
+
+        run.delete()
+        self.assertEqual(self._stored_days()[day]['completed_count'], 1)
+
+        walk.completed = False
+        walk.save()
+        self.assertNotIn(day, self._stored_days())
+
+    def test_statistics_read_rollup_rows(self):
+        for days_ago in (0, 1, 2, 10, 11):
+            self._create_activity(days_ago)
+
+        stats = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((stats.current_streak_days, stats.longest_streak_days), (3, 3))
+        self.assertEqual((stats.activities_this_week, stats.activities_this_month), (3, 5))
+
+        with CaptureQueriesContext(connection) as queries:
+            _update_user_statistics(self.user)
+        activity_reads = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and '"workout_activity"' in query['sql']
+        ]
+        # One grouped rebuild of the rollup and one assigned-count query.
+        self.assertEqual(len(activity_reads), 2)
+
+    def test_backfill_command_rebuilds_rows(self):
+        self._create_activity(0)
+        self._create_activity(4, 'meditation')
+        expected = self._stored_days()
+        UserDailyActivity.objects.filter(user=self.user).delete()
+
+        out = StringIO()
+        call_command('backfill_daily_activity', '--batch-size', '1', stdout=out)
+
+        self.assertEqual(self._stored_days(), expected)
+        self.assertIn('Day rows: 2.', out.getvalue())
+
+
+class UserStreakTrackerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='streak_user',
+            email='streak_user@example.com',
+            password='StrongPassword123!',
+        )
+
+    def _complete(self, days_ago):
+        return Activity.objects.create(
+            user=self.user,
+            activity_name='Brisk Walking',
+            activity_type='exercise',
+            description='Walking set',
+            duration_minutes=10,
+            intensity='Moderate',
+            completed=True,
+            completion_date=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def _streak(self):
+        return UserStreak.objects.get(user=self.user, stream=UserStreak.Stream.ACTIVITY)
+
+    def test_new_days_extend_without_reading_history(self):
+        self._complete(3)
+        with mock.patch('api.streaks.stream_days') as stream_days:
+            self._complete(2)
+            self._complete(1)
+            self._complete(1)
+            self._complete(0)
+        stream_days.assert_not_called()
+
+        streak = self._streak()
+        self.assertEqual((streak.current_streak, streak.longest_streak), (4, 4))
+        self.assertEqual(streak.last_date, timezone.localdate())
+
+    def test_backdated_and_withdrawn_days_rebuild(self):
+        self._complete(0)
+        self._complete(2)
+        self.assertEqual(self._streak().current(), 1)
+
+        gap = self._complete(1)
+        self.assertEqual((self._streak().current(), self._streak().longest_streak), (3, 3))
+
+        gap.delete()
+        self.assertEqual((self._streak().current(), self._streak().longest_streak), (1, 1))
+
+    def test_every_reader_reports_the_same_streak(self):
+        for days_ago in (1, 2, 3, 7):
+            self._complete(days_ago)
+
+        stats = UserStatistics.objects.get(user=self.user)
+        streak = get_streak(self.user.pk, UserStreak.Stream.ACTIVITY)
+        self.assertEqual(stats.current_streak_days, 3)
+        self.assertEqual(calculate_current_streak(self.user), 3)
+        self.assertEqual(stats.longest_streak_days, streak.longest_streak)
+
+        # The stored run lapses once it no longer reaches yesterday.
+        self.assertEqual(streak.current(timezone.localdate() + timedelta(days=1)), 0)
+
+    def test_missing_row_is_built_on_first_read(self):
+        self._complete(0)
+        UserStreak.objects.filter(user=self.user).delete()
+
+        self.assertEqual(calculate_current_streak(self.user), 1)
+        self.assertTrue(UserStreak.objects.filter(user=self.user).exists())
+
+
+class NumpyQTableBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.states = [
+            {'age': 34, 'gender': 1, 'sleep_hours': 6.5, 'engagement': 0.72, 'segment': 2},
+            {'age': '71', 'stress_level': 2, 'screen_time_per_day': None, 'happiness_score': 9},
+            {'age': None, 'work_hours_per_week': 65, 'social_interaction_score': 4, 'segment': 9},
+        ]
+
+    def test_encode_states_matches_encode_state(self):
+        agent = WellnessRLAgent(backend='numpy')
+
+        encoded = agent.encode_states(self.states)
+
+        self.assertEqual(
+            [tuple(row) for row in encoded.tolist()],
+            [agent.encode_state(state) for state in self.states],
+        )
+        self.assertEqual(agent.state_tuples(agent.state_indices(encoded)), [tuple(row) for row in encoded.tolist()])
+
+    def test_numpy_backend_matches_dict_backend(self):
+        dict_agent = WellnessRLAgent()
+        numpy_agent = WellnessRLAgent(backend='numpy')
+
+        for step in range(30):
+            state = self.states[step % 3]
+            next_state = self.states[(step + 1) % 3]
+            for agent in (dict_agent, numpy_agent):
+                agent.update_q_value(state, step % 6, 0.25 * (step % 4), next_state)
+
+        expected = dict_agent.get_q_table_dict()
+        actual = numpy_agent.get_q_table_dict()
+        self.assertEqual(expected.keys(), actual.keys())
+        for state_key, actions in expected.items():
+            for action, value in actions.items():
+                self.assertAlmostEqual(actual[state_key][action], value, places=5)
+
+        dict_agent.epsilon = numpy_agent.epsilon = 0.0
+        self.assertEqual(
+            numpy_agent.select_actions(self.states).tolist(),
+            [int(dict_agent.select_action(state)) for state in self.states],
+        )
+
+    def test_batched_selection_follows_global_seed(self):
+        agent = WellnessRLAgent(backend='numpy')
+        states = self.states * 4
+
+        np.random.seed(7)
+        first = agent.select_actions(states).tolist()
+        np.random.seed(7)
+        self.assertEqual(agent.select_actions(states).tolist(), first)
+        np.random.seed(7)
+        self.assertEqual(agent.select_action(states[0]), first[0])
+
+    def test_batched_update_is_synchronous(self):
+        agent = WellnessRLAgent(backend='numpy')
+
+        agent.update_q_values(
+            [self.states[0], self.states[1], self.states[0]],
+            np.array([1, 2, 1]),
+            np.array([1.0, 0.5, 1.0]),
+            [self.states[1], self.states[0], self.states[1]],
+        )
+
+        rows = agent.q_table.rows(agent.state_indices(agent.encode_states(self.states[:2])))
+        self.assertAlmostEqual(float(rows[0, 1]), 0.2, places=6)
+        self.assertAlmostEqual(float(rows[1, 2]), 0.05, places=6)
+        self.assertEqual(agent.training_history['episodes'], 3)
+
+
+class RLModelPersistenceTests(SimpleTestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.state = {'age': 28, 'gender': 1, 'engagement': 0.8, 'segment': 1}
+
+    def tearDown(self):
+        for name in os.listdir(self.model_dir):
+            os.remove(os.path.join(self.model_dir, name))
+        os.rmdir(self.model_dir)
+
+    def test_binary_round_trip_is_memory_mapped_and_trainable(self):
+        manager = RLModelManager(model_dir=self.model_dir, backend='numpy')
+        agent = manager.load_agent()
+        agent.update_q_value(self.state, 2, 1.0, self.state)
+        agent.decay_epsilon()
+        manager.save_agent(agent)
+        manager.save_agent(agent)
+        manager.save_agent(agent)
+
+        loaded = manager.load_agent()
+
+        # Loaded zero-copy from the read-only memory map.
+        self.assertFalse(loaded.q_table.values.flags.writeable)
+        self.assertEqual(loaded.get_q_table_dict(), agent.get_q_table_dict())
+        self.assertEqual(loaded.epsilon, agent.epsilon)
+        self.assertEqual(loaded.training_history['episodes'], 1)
+        # The latest two generations of array files are kept.
+        self.assertEqual(len([name for name in os.listdir(self.model_dir) if name.endswith('.npy')]), 4)
+
+        loaded.update_q_value(self.state, 2, 1.0, self.state)
+        self.assertGreater(loaded.get_q_table_dict()[str(loaded.encode_state(self.state))][2], 0.1)
+
+    def test_load_rereads_header_when_its_arrays_were_removed(self):
+        manager = RLModelManager(model_dir=self.model_dir, backend='numpy')
+        agent = manager.load_agent()
+        agent.update_q_value(self.state, 2, 1.0, self.state)
+        manager.save_agent(agent)
+        stale = dict(manager._read_meta(), keys_file='gone.keys.npy', values_file='gone.values.npy')
+
+        with mock.patch.object(manager, '_read_meta', side_effect=[stale, manager._read_meta()]):
+            loaded = manager.load_saved_agent()
+
+        self.assertEqual(loaded.get_q_table_dict(), agent.get_q_table_dict())
+
+    def test_migrate_command_converts_legacy_json(self):
+        legacy = WellnessRLAgent()
+        legacy.update_q_value(self.state, 4, 0.5, self.state)
+        q_table = legacy.get_q_table_dict()
+        q_table['(2, 0, 2, 4, 3, 5, 4)'] = {'1': 0.04}
+        with open(os.path.join(self.model_dir, 'wellness_rl_agent.json'), 'w') as f:
+            json.dump({'q_table': q_table, 'epsilon': 0.25, 'training_history': legacy.training_history}, f)
+
+        out = StringIO()
+        call_command('migrate_rl_model', model_dir=self.model_dir, stdout=out)
+
+        agent = RLModelManager(model_dir=self.model_dir).load_agent()
+        state_key = str(legacy.encode_state(self.state))
+        self.assertEqual(list(agent.get_q_table_dict()), [state_key])
+        self.assertAlmostEqual(agent.q_table[legacy.encode_state(self.state)][4], 0.05, places=6)
+        self.assertEqual(agent.epsilon, 0.25)
+        self.assertIn('States migrated: 1. States dropped (not 13-part encodings): 1.', out.getvalue())
+
+
+class RLTrainingQueueTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='trainer_user',
+            email='trainer_user@example.com',
+            password='StrongPassword123!',
+        )
+        self.model_dir = tempfile.mkdtemp()
+        self.manager = RLModelManager(model_dir=self.model_dir, backend='numpy')
+
+    def tearDown(self):
+        for name in os.listdir(self.model_dir):
+            os.remove(os.path.join(self.model_dir, name))
+        os.rmdir(self.model_dir)
+
+    def test_trainer_drains_queue_in_batches_and_checkpoints(self):
+        states = [{'age': 20 + step, 'engagement': step / 10, 'segment': step % 5} for step in range(7)]
+        for step in range(7):
+            record_transition(
+                self.user, RLTransition.Source.SESSION_FEEDBACK,
+                states[step], step % 6, 0.5, states[(step + 1) % 7],
+            )
+
+        report = train_pending_transitions(self.manager, batch_size=3, checkpoint_every=2)
+
+        self.assertEqual(report['transitions'], 7)
+        self.assertEqual(report['batches'], 3)
+        self.assertEqual(report['checkpoints'], 2)
+        self.assertFalse(RLTransition.objects.filter(processed_at__isnull=True).exists())
+
+        agent = self.manager.load_agent()
+        self.assertEqual(agent.training_history['episodes'], 7)
+        self.assertEqual(len(agent.q_table), 7)
+        self.assertAlmostEqual(agent.epsilon, 0.3 * 0.995 ** 7)
+
+        self.assertEqual(train_pending_transitions(self.manager)['transitions'], 0)
+
+    def test_train_command_reports_throughput(self):
+        record_transition(self.user, RLTransition.Source.ENGAGEMENT_FEEDBACK, {}, 5, 0.4, {})
+
+        out = StringIO()
+        call_command('train_rl_agent', model_dir=self.model_dir, stdout=out)
+
+        self.assertIn('Transitions: 1.', out.getvalue())
+        self.assertIn('transitions/s', out.getvalue())
+
+
+class AgentRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.state = {'age': 45, 'engagement': 0.6, 'segment': 3}
+
+    def tearDown(self):
+        for name in os.listdir(self.model_dir):
+            os.remove(os.path.join(self.model_dir, name))
+        os.rmdir(self.model_dir)
+
+    def _train_once(self, agent):
+        agent.update_q_value(self.state, 1, 1.0, self.state)
+        return agent.training_history['episodes']
+
+    def test_workers_hot_reload_after_another_process_saves(self):
+        worker = AgentRegistry(self.model_dir, check_interval=0)
+        cached = AgentRegistry(self.model_dir, check_interval=3600)
+        self.assertEqual(worker.version, 0)
+        self.assertEqual(cached.version, 0)
+
+        AgentRegistry(self.model_dir).update(self._train_once)
+
+        self.assertEqual(worker.version, 1)
+        self.assertEqual(worker.get_agent().training_history['episodes'], 1)
+        # Within its check interval a worker keeps serving its cached agent.
+        self.assertEqual(cached.version, 0)
+        cached.invalidate()
+        self.assertEqual(cached.version, 1)
+
+    def test_failed_reload_keeps_last_good_agent(self):
+        registry = AgentRegistry(self.model_dir, check_interval=0)
+        registry.update(self._train_once)
+        good = registry.get_agent()
+
+        AgentRegistry(self.model_dir).update(self._train_once)
+        with mock.patch.object(registry.manager, 'load_saved_agent', side_effect=ValueError('corrupt')):
+            with self.assertLogs('api.rl_registry', level='ERROR'):
+                self.assertIs(registry.get_agent(), good)
+
+        self.assertEqual(registry.version, 2)
+
+    def test_updates_from_separate_registries_build_on_latest_version(self):
+        first = AgentRegistry(self.model_dir)
+        second = AgentRegistry(self.model_dir)
+        second.get_agent()
+
+        self.assertEqual(first.update(self._train_once), 1)
+        self.assertEqual(second.update(self._train_once), 2)
+        self.assertEqual(second.version, 2)
+
+
+class StubSegmentModel:
+    def __init__(self, label):
+        self.label = label
+        self.rows = []
+
+    def predict(self, rows):
+        self.rows.append(rows)
+        return np.array([self.label] * len(rows))
+
+
+class SegmentClassifierTests(SimpleTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.pkl')
+        os.close(handle)
+        self.classifier = SegmentClassifier(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_encode_features_maps_categories_and_fills_defaults(self):
+        row = encode_features({'age': 31, 'gender': 'female', 'diet_type': 'keto', 'stress_level': 'high'})
+        self.assertEqual(row, [31, 1, 1, 4, 7, 2, 0, 40, 6.0, 5, 5])
+
+    def test_model_is_loaded_once_across_predictions(self):
+        model = StubSegmentModel('MidLife_LowStress_Depressed')
+        with mock.patch('api.segmentation.joblib.load', return_value=model) as load:
+            segments = [self.classifier.predict_segment({'age': age}) for age in range(20, 25)]
+
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(segments, [2] * 5)
+
+    def test_model_is_reloaded_when_file_changes(self):
+        old, new = StubSegmentModel('Older_HighStress_Exhausted'), StubSegmentModel('Young_HighStress_ActiveSocial')
+        with mock.patch('api.segmentation.joblib.load', side_effect=[old, new]) as load:
+            self.assertEqual(self.classifier.predict_segment({}), 0)
+            mtime = os.stat(self.path).st_mtime_ns + 1_000_000_000
+            os.utime(self.path, ns=(mtime, mtime))
+            self.assertEqual(self.classifier.predict_segment({}), 1)
+
+        self.assertEqual(load.call_count, 2)
+
+    def test_predict_segments_uses_one_model_call(self):
+        model = StubSegmentModel('Unknown_Label')
+        with mock.patch('api.segmentation.joblib.load', return_value=model):
+            segments = self.classifier.predict_segments([{'age': 20}, {'age': 40}, {'age': 60}])
+
+        self.assertEqual(segments, [4, 4, 4])
+        self.assertEqual(len(model.rows), 1)
+        self.assertEqual(model.rows[0].shape, (3, 11))
+        self.assertEqual(self.classifier.predict_segments([]), [])
+
+
+class ResegmentUsersCommandTests(APITestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.pkl')
+        os.close(handle)
+        User = get_user_model()
+        self.moved = User.objects.create_user(username='moved', email='moved@example.com', password='x', segment_label=0)
+        self.kept = User.objects.create_user(username='kept', email='kept@example.com', password='x', segment_label=3)
+        self.unlabelled = User.objects.create_user(username='new', email='new@example.com', password='x')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _run(self, *args):
+        out = StringIO()
+        classifier = SegmentClassifier(self.path)
+        model = StubSegmentModel('MidLife_Thriving_WellnessSeeker')
+        with mock.patch('api.segmentation.joblib.load', return_value=model), \
+                mock.patch('api.management.commands.resegment_users.get_classifier', return_value=classifier):
+            call_command('resegment_users', '--chunk-size', '2', *args, stdout=out)
+        return model, out.getvalue()
+
+    def test_rescores_in_chunks_and_saves_changed_labels(self):
+        model, output = self._run()
+
+        self.assertEqual([rows.shape for rows in model.rows], [(2, 11), (1, 11)])
+        labels = dict(get_user_model().objects.values_list('username', 'segment_label'))
+        self.assertEqual(labels, {'moved': 3, 'kept': 3, 'new': 3})
+        self.assertIn('Labels changed: 2.', output)
+        self.assertRegex(output, r'0\s+0\s+0\s+0\s+1\s+0')
+        self.assertRegex(output, r'none\s+0\s+0\s+0\s+1\s+0')
+
+    def test_dry_run_leaves_labels_untouched(self):
+        _, output = self._run('--dry-run')
+
+        self.moved.refresh_from_db()
+        self.assertEqual(self.moved.segment_label, 0)
+        self.assertIn('Labels would change: 2.', output)
+
+
+class RandomRowSamplerTests(APITestCase):
+    def setUp(self):
+        MotivationalQuote.objects.all().delete()
+        self.quotes = [
+            MotivationalQuote.objects.create(text=f'Quote {index}', author='')
+            for index in range(5)
+        ]
+        self.sampler = RandomRowSampler(MotivationalQuote)
+
+    def test_sample_uses_cached_ids_without_order_by_random(self):
+        self.sampler.ids()
+
+        with CaptureQueriesContext(connection) as queries:
+            quote = self.sampler.sample()
+
+        self.assertIn(quote, self.quotes)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('RANDOM', queries[0]['sql'].upper())
+
+    def test_save_and_delete_invalidate_cached_ids(self):
+        self.assertEqual(len(self.sampler.ids()), 5)
+
+        added = MotivationalQuote.objects.create(text='Quote 5', author='')
+        self.assertIn(added.pk, self.sampler.ids())
+
+        added.delete()
+        self.assertNotIn(added.pk, self.sampler.ids())
+
+    def test_unseen_ids_do_not_repeat_until_pool_is_exhausted(self):
+        seen = b''
+        picks = []
+        for _ in range(5):
+            pk, seen = self.sampler.sample_unseen_id(seen)
+            picks.append(pk)
+
+        self.assertCountEqual(picks, [quote.pk for quote in self.quotes])
+        self.assertTrue(all(bitmap_contains(seen, pk) for pk in picks))
+
+        pk, seen = self.sampler.sample_unseen_id(seen)
+        self.assertIn(pk, picks)
+        self.assertEqual([bitmap_contains(seen, quote.pk) for quote in self.quotes].count(True), 1)
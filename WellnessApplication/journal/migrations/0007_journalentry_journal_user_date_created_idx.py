@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0006_alter_journalprompt_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['user', '-entry_date', '-created_at', 'id'], name='journal_user_date_created_idx'),
+        ),
+    ]
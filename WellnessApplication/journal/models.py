@@ -136,6 +136,8 @@ class JournalEntry(models.Model):
             models.Index(fields=['user', 'mood']),
             models.Index(fields=['user', 'is_favorite']),
             models.Index(fields=['user', 'is_archived']),
+            # Keyset pagination of a user's entries (JournalEntryPagination)
+            models.Index(fields=['user', '-entry_date', '-created_at', 'id'], name='journal_user_date_created_idx'),
         ]
 
     def __str__(self):
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from api.listing import SparseFieldsetMixin
 from journal.models import JournalEntry, JournalPrompt, JournalReadEvent, JournalTag
 
 
@@ -40,7 +41,18 @@ _DISTORTION_LABEL = {key: label for key, label in _DISTORTION_CHOICES}
 _DISTORTION_KEY_BY_LABEL = {label: key for key, label in _DISTORTION_CHOICES}
 
 
-class JournalEntrySerializer(serializers.ModelSerializer):
+class JournalEntrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # ?fields= on list requests (see api.listing): the long text columns are
+    # only loaded when a requested field reads them.
+    heavy_columns = (
+        'content', 'situation', 'automatic_thought', 'evidence_for',
+        'evidence_against', 'balanced_thought', 'behavioral_response',
+    )
+    column_sources = {
+        'excerpt': ('content',),
+        'has_thought_record': ('situation', 'automatic_thought'),
+    }
+
     tags = JournalTagSerializer(many=True, read_only=True)
     mood = serializers.ChoiceField(
         choices=JournalEntry.MOOD_CHOICES,
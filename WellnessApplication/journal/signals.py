@@ -0,0 +1,37 @@
+"""
+Keep the user's journal streak (api/streaks.py) in step with their entries.
+
+A new entry extends the streak in O(1); moving an entry to another day or
+deleting one rebuilds it from the user's entry dates.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.models import UserStreak
+from api.streaks import move_day
+from journal.models import JournalEntry
+
+
+@receiver(pre_save, sender=JournalEntry)
+def remember_entry_date(sender, instance, **kwargs):
+    """
+    Capture the stored entry date before it is overwritten.
+    """
+    instance._streak_previous_date = None
+    if instance.pk is None or instance._state.adding:
+        return
+    instance._streak_previous_date = (
+        JournalEntry.objects.filter(pk=instance.pk).values_list('entry_date', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=JournalEntry)
+def update_journal_streak_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_streak_previous_date', None)
+    if created or previous != instance.entry_date:
+        move_day(instance.user_id, UserStreak.Stream.JOURNAL, previous, instance.entry_date)
+
+
+@receiver(post_delete, sender=JournalEntry)
+def update_journal_streak_on_delete(sender, instance, **kwargs):
+    move_day(instance.user_id, UserStreak.Stream.JOURNAL, instance.entry_date, None)
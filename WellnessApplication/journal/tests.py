@@ -1,4 +1,8 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -132,6 +136,34 @@ class JournalAPITestCase(APITestCase):
         self.assertEqual(response.data['reread_entries_count'], 1)
         self.assertEqual(response.data['reread_ratio_percent'], 50.0)
 
+    def test_insights_streaks_follow_entries(self):
+        today = timezone.localdate()
+        entries = [
+            JournalEntry.objects.create(
+                user=self.user,
+                title=f'Entry {days_ago}',
+                content='A short reflection written for the streak test.',
+                mood=3,
+                entry_date=today - timedelta(days=days_ago),
+            )
+            for days_ago in (5, 4, 3, 1, 0)
+        ]
+
+        response = self.client.get(self.insights_url)
+        self.assertEqual(response.data['current_streak_days'], 2)
+        self.assertEqual(response.data['longest_streak_days'], 3)
+
+        entries[3].entry_date = today - timedelta(days=2)
+        entries[3].save()
+        response = self.client.get(self.insights_url)
+        self.assertEqual(response.data['current_streak_days'], 1)
+        self.assertEqual(response.data['longest_streak_days'], 4)
+
+        entries[4].delete()
+        response = self.client.get(self.insights_url)
+        self.assertEqual(response.data['current_streak_days'], 0)
+        self.assertEqual(response.data['longest_streak_days'], 4)
+
     def test_random_prompt_endpoint_returns_category_filtered_prompt(self):
         JournalPrompt.objects.create(
             category='gratitude',
@@ -144,3 +176,51 @@ class JournalAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['category'], 'gratitude')
         self.assertIn('prompt_text', response.data)
+
+
+class JournalListingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='listing_user',
+            email='listing_user@example.com',
+            password='StrongPassword123!',
+        )
+        self.client.force_authenticate(user=self.user)
+        self.entries_url = '/api/journal/entries/'
+
+        today = timezone.localdate()
+        for index in range(5):
+            JournalEntry.objects.create(
+                user=self.user,
+                title=f'Entry {index}',
+                content=f'Journal entry number {index} with enough text to be valid.',
+                mood=3,
+                entry_date=today - timedelta(days=index),
+            )
+
+    def test_list_is_unpaginated_by_default(self):
+        response = self.client.get(self.entries_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_pages_follow_entry_date(self):
+        titles = []
+        url = f'{self.entries_url}?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.extend(entry['title'] for entry in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(titles, [f'Entry {index}' for index in range(5)])
+
+    def test_sparse_fields_skip_heavy_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.entries_url, {'fields': 'id,title,entry_date'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'title', 'entry_date'})
+        entry_query = next(query['sql'] for query in queries if 'FROM "journal_journalentry"' in query['sql'])
+        self.assertNotIn('"content"', entry_query)
+        self.assertNotIn('"evidence_for"', entry_query)
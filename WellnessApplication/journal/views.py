@@ -11,6 +11,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.listing import KeysetPagination
+from api.models import UserStreak
+from api.sampling import RandomRowSampler
+from api.streaks import get_streak
 from journal.models import JournalEntry, JournalPrompt, JournalReadEvent, JournalTag
 from journal.serializers import (
     CBTGuideSerializer,
@@ -23,37 +27,6 @@ from journal.serializers import (
 )
 
 
-def _compute_streaks(entry_dates):
-    if not entry_dates:
-        return 0, 0
-
-    unique_dates = sorted(set(entry_dates))
-
-    longest_streak = 1
-    running_streak = 1
-    for index in range(1, len(unique_dates)):
-        if (unique_dates[index] - unique_dates[index - 1]).days == 1:
-            running_streak += 1
-            longest_streak = max(longest_streak, running_streak)
-        else:
-            running_streak = 1
-
-    today = timezone.localdate()
-    check_date = today
-    date_set = set(unique_dates)
-
-    # If today has no entry yet, allow the streak to continue from yesterday.
-    if check_date not in date_set:
-        check_date = today - timedelta(days=1)
-
-    current_streak = 0
-    while check_date in date_set:
-        current_streak += 1
-        check_date -= timedelta(days=1)
-
-    return current_streak, longest_streak
-
-
 _ENTRY_CBT_DESCRIPTION = """
 **Mood scale**
 
@@ -118,6 +91,13 @@ See `GET /api/journal/cbt-guide/` for the full step-by-step guide and valid dist
 """
 
 
+class JournalEntryPagination(KeysetPagination):
+    # Backed by journal_user_date_created_idx. The cursor seeks on entry_date
+    # only and skips the boundary day's earlier entries by offset, so a page
+    # also reads the entries already sent from that day.
+    ordering = ('-entry_date', '-created_at', 'id')
+
+
 @extend_schema_view(
     list=extend_schema(
         tags=['Journal'],
@@ -125,9 +105,22 @@ See `GET /api/journal/cbt-guide/` for the full step-by-step guide and valid dist
         description=(
             'Returns journal entries for the authenticated user with optional filters.\n\n'
             'Filter `?has_thought_record=true` to return only CBT thought-record entries.\n\n'
+            'Without `page_size` or `cursor` every matching entry is returned as a plain list; with '
+            'either, entries come in cursor-paginated pages (newest `entry_date` first) with '
+            '`next`/`previous` cursors. `?fields=id,title,excerpt` returns only those fields and skips '
+            'loading long text columns nobody asked for.\n\n'
             + _ENTRY_CBT_DESCRIPTION
         ),
-        parameters=[JournalEntryFilterSerializer],
+        parameters=[
+            JournalEntryFilterSerializer,
+            OpenApiParameter(
+                name='fields',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Comma-separated entry fields to return.',
+            ),
+        ],
         responses={200: JournalEntrySerializer(many=True)},
     ),
     create=extend_schema(
@@ -166,6 +159,8 @@ See `GET /api/journal/cbt-guide/` for the full step-by-step guide and valid dist
 class JournalEntryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = JournalEntrySerializer
+    # Opt-in: lists are only paginated when ?page_size= or ?cursor= is given.
+    pagination_class = JournalEntryPagination
 
     def get_queryset(self):
         queryset = JournalEntry.objects.filter(user=self.request.user).prefetch_related('tags')
@@ -206,6 +201,11 @@ class JournalEntryViewSet(viewsets.ModelViewSet):
             else:
                 queryset = queryset.filter(Q(situation='') | Q(automatic_thought=''))
 
+        if self.action == 'list':
+            deferred = JournalEntrySerializer.deferred_columns(self.request)
+            if deferred:
+                queryset = queryset.defer(*deferred)
+
         return queryset.distinct()
 
     def perform_create(self, serializer):
@@ -284,8 +284,8 @@ class JournalInsightsView(APIView):
         entries_last_7_days = entries.filter(entry_date__gte=today - timedelta(days=6)).count()
         entries_last_30_days = entries.filter(entry_date__gte=today - timedelta(days=29)).count()
 
-        entry_dates = list(entries.values_list('entry_date', flat=True))
-        current_streak, longest_streak = _compute_streaks(entry_dates)
+        streak = get_streak(user.pk, UserStreak.Stream.JOURNAL)
+        current_streak, longest_streak = streak.current(today), streak.longest_streak
 
         average_word_count = float(entries.aggregate(avg=Avg('word_count'))['avg'] or 0.0)
 
@@ -370,6 +370,10 @@ class JournalInsightsView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+# Active prompt IDs per category, cached in memory instead of ORDER BY RANDOM().
+PROMPT_SAMPLER = RandomRowSampler(JournalPrompt, filters={'is_active': True}, category_field='category')
+
+
 @extend_schema(
     tags=['Journal'],
     summary='Get random journaling prompt',
@@ -392,7 +396,6 @@ class RandomJournalPromptView(APIView):
     def get(self, request):
         category = request.query_params.get('category')
 
-        queryset = JournalPrompt.objects.filter(is_active=True)
         if category:
             valid_categories = {choice[0] for choice in JournalPrompt.CATEGORY_CHOICES}
             if category not in valid_categories:
@@ -400,9 +403,8 @@ class RandomJournalPromptView(APIView):
                     {'detail': 'Invalid category.'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            queryset = queryset.filter(category=category)
 
-        prompt = queryset.order_by('?').first()
+        prompt = PROMPT_SAMPLER.sample(category or None)
         if not prompt:
             return Response(
                 {'detail': 'No active prompts available for the selected category.'},
@@ -4,7 +4,8 @@ from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from notifications.models import MotivationalQuote, Notification
+from notifications.models import MotivationalQuote, Notification, NotificationState
+from notifications.rules import dedup_keys
 
 
 class Command(BaseCommand):
@@ -36,6 +37,7 @@ class Command(BaseCommand):
         )
 
         today = timezone.localdate().isoformat()
+        keys = dedup_keys(timezone.now())
         to_create = []
 
         for user in users:
@@ -53,6 +55,7 @@ class Command(BaseCommand):
                         "author": quote_author,
                         "startup_seeded": True,
                     },
+                    dedup_key=keys[Notification.Type.MOTIVATIONAL_QUOTE],
                 )
             )
 
@@ -69,13 +72,17 @@ class Command(BaseCommand):
                         "date": today,
                         "startup_seeded": True,
                     },
+                    dedup_key=keys[Notification.Type.EXERCISE_REMINDER],
                 )
             )
 
         Notification.objects.bulk_create(
             to_create,
             batch_size=options["batch_size"],
+            # Re-running the command in the same rule window skips existing rows.
+            ignore_conflicts=True,
         )
+        NotificationState.record_created({user.pk for user in users})
 
         self.stdout.write(
             self.style.SUCCESS(
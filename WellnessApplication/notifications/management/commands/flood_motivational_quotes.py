@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 
 from notifications.models import MotivationalQuote
 from notifications.quote_catalog import MOTIVATIONAL_QUOTES
+from notifications.rules import QUOTE_SAMPLER
 
 
 class Command(BaseCommand):
@@ -28,6 +29,8 @@ class Command(BaseCommand):
                 to_create,
                 batch_size=options['batch_size'],
             )
+            # bulk_create sends no post_save signals.
+            QUOTE_SAMPLER.invalidate()
 
         total = MotivationalQuote.objects.count()
         self.stdout.write(
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notifications.rules import generate_notifications, generate_weekly_digests, weekly_digests_pending
+
+
+class Command(BaseCommand):
+    help = "Evaluate the notification rules for every user and create the notifications that are due."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Users evaluated (and notifications inserted) per chunk.",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            default=None,
+            help="Only evaluate this user ID (repeatable).",
+        )
+        parser.add_argument(
+            "--weekly-digest",
+            action="store_true",
+            help=(
+                "Also send the weekly stats for the latest week ending on a Sunday to every user "
+                "who had joined by then and does not have them yet. Pair with "
+                "NOTIFICATIONS_WEEKLY_DIGEST_JOB = True."
+            ),
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and re-evaluate every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=300.0,
+            help="Seconds to wait between runs with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be greater than zero.")
+
+        while True:
+            # Sent weeks are read back from the stored digests, so a restart
+            # mid-week does not send the week again.
+            if options["weekly_digest"] and weekly_digests_pending():
+                today = timezone.localdate()
+                week = today - timedelta(days=(today.weekday() + 1) % 7)
+                started = time.perf_counter()
+                digests = generate_weekly_digests(chunk_size=options["batch_size"])
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Weekly digests for the week ending {week}: {digests} "
+                        f"in {time.perf_counter() - started:.2f}s."
+                    )
+                )
+
+            started = time.perf_counter()
+            breakdown = generate_notifications(
+                user_ids=options["user_ids"],
+                chunk_size=options["batch_size"],
+            )
+            elapsed = time.perf_counter() - started
+
+            details = ", ".join(f"{key}: {count}" for key, count in sorted(breakdown.items()))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Notifications generated: {sum(breakdown.values())}"
+                    + (f" ({details})" if details else "")
+                    + f" in {elapsed:.2f}s."
+                )
+            )
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,64 @@
+"""
+Add Notification.dedup_key and backfill it for existing rows.
+
+Each existing notification gets the key of the rule window it was created in;
+when a user already has a row for that window, only the oldest keeps the key
+so the unique constraint can be added.
+"""
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _dedup_key(notification_type, created_at):
+    # Mirrors notifications.rules.dedup_keys at the time of this migration.
+    day = timezone.localdate(created_at)
+    if notification_type == 'motivational_quote':
+        return f'quote:{int(created_at.timestamp()) // (48 * 3600)}'
+    if notification_type == 'exercise_reminder':
+        return f'exercise:{day.isoformat()}'
+    if notification_type == 'weekly_stats':
+        iso = day.isocalendar()
+        return f'weekly:{iso[0]}-W{iso[1]:02d}'
+    if notification_type == 'journal_reminder':
+        return f'journal:{day.toordinal() // 3}'
+    return None
+
+
+def backfill_dedup_keys(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    seen = set()
+    batch = []
+    for notification in Notification.objects.order_by('id').only('id', 'user_id', 'notification_type', 'created_at').iterator(chunk_size=2000):
+        key = _dedup_key(notification.notification_type, notification.created_at)
+        if key is None or (notification.user_id, notification.notification_type, key) in seen:
+            continue
+        seen.add((notification.user_id, notification.notification_type, key))
+        notification.dedup_key = key
+        batch.append(notification)
+        if len(batch) >= 1000:
+            Notification.objects.bulk_update(batch, ['dedup_key'])
+            batch = []
+    if batch:
+        Notification.objects.bulk_update(batch, ['dedup_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedup_key',
+            field=models.CharField(blank=True, help_text='Rule window this notification belongs to (e.g. exercise:2026-03-15); unique per user and type.', max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_dedup_keys, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'notification_type', 'dedup_key'), name='notif_user_type_dedup_uniq'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_dedup_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_quote_at', models.DateTimeField()),
+                ('next_exercise_check_at', models.DateTimeField()),
+                ('next_weekly_at', models.DateTimeField()),
+                ('next_journal_check_at', models.DateTimeField()),
+                ('next_due_at', models.DateTimeField(db_index=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_schedule', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
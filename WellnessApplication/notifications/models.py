@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Greatest, Least
 from django.utils import timezone
 
 
@@ -26,6 +27,9 @@ class Notification(models.Model):
     payload = models.JSONField(default=dict, blank=True,
         help_text='Extra structured data (e.g. weekly stats dict, quote author).')
 
+    dedup_key = models.CharField(max_length=64, null=True, blank=True,
+        help_text='Rule window this notification belongs to (e.g. exercise:2026-03-15); unique per user and type.')
+
     is_read     = models.BooleanField(default=False, db_index=True)
     read_at     = models.DateTimeField(null=True, blank=True)
     created_at  = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -39,6 +43,12 @@ class Notification(models.Model):
                 name='notif_user_type_created_idx',
             ),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'notification_type', 'dedup_key'],
+                name='notif_user_type_dedup_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f'[{self.notification_type}] {self.user.username} – {self.title}'
@@ -48,6 +58,98 @@ class Notification(models.Model):
             self.is_read = True
             self.read_at = timezone.now()
             self.save(update_fields=['is_read', 'read_at'])
+            NotificationState.record_read(self.user_id, 1)
+
+
+class NotificationState(models.Model):
+    """
+    Per-user change counter for notification polling.
+
+    `version` is bumped whenever notifications are created or marked read, so
+    GET /api/notifications/ can answer If-None-Match with 304 from this row
+    alone; `unread_count` is kept alongside for the unread-count endpoint.
+    Rows are created lazily, counting the user's unread notifications once.
+    """
+    user         = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_state',
+    )
+    version      = models.PositiveBigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at   = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'Notification state for {self.user_id}: v{self.version}, {self.unread_count} unread'
+
+    def etag(self, variant=''):
+        """Quoted entity tag for this version; `variant` distinguishes list filters."""
+        return f'"{self.user_id}-{self.version}{variant}"'
+
+    @classmethod
+    def for_user(cls, user_id):
+        state = cls.objects.filter(user_id=user_id).first()
+        if state is None:
+            cls._seed([user_id])
+            state = cls.objects.get(user_id=user_id)
+        return state
+
+    @classmethod
+    def record_created(cls, user_ids):
+        """
+        Bump versions after notifications were inserted for `user_ids`.
+
+        Unread counts are recounted in the same UPDATE rather than incremented,
+        because inserts that skip conflicting dedup keys do not report which
+        rows were actually created.
+        """
+        user_ids = list(user_ids)
+        unread = (
+            Notification.objects.filter(user_id=models.OuterRef('user_id'), is_read=False)
+            .order_by()
+            .values('user_id')
+            .annotate(count=models.Count('id'))
+            .values('count')
+        )
+        existing = set(cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        cls.objects.filter(user_id__in=existing).update(
+            version=models.F('version') + 1,
+            unread_count=Coalesce(models.Subquery(unread), 0),
+            updated_at=timezone.now(),
+        )
+        cls._seed([user_id for user_id in user_ids if user_id not in existing])
+
+        from notifications.push import get_broker
+        transaction.on_commit(lambda: get_broker().publish(user_ids))
+
+    @classmethod
+    def record_read(cls, user_id, count):
+        """Bump the version after `count` notifications were marked read."""
+        if not count:
+            return
+        updated = cls.objects.filter(user_id=user_id).update(
+            version=models.F('version') + 1,
+            unread_count=Greatest(models.F('unread_count') - count, 0),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            cls._seed([user_id])
+
+    @classmethod
+    def _seed(cls, user_ids):
+        if not user_ids:
+            return
+        unread = dict(
+            Notification.objects.filter(user_id__in=user_ids, is_read=False)
+            .values('user_id')
+            .annotate(count=models.Count('id'))
+            .order_by()
+            .values_list('user_id', 'count')
+        )
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, version=1, unread_count=unread.get(user_id, 0)) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
 
 
 class MotivationalQuote(models.Model):
@@ -59,3 +161,64 @@ class MotivationalQuote(models.Model):
 
     def __str__(self):
         return f'"{self.text[:60]}" — {self.author or "Unknown"}'
+
+
+class QuoteRotation(models.Model):
+    """
+    Bitmap of the quote IDs a user has already been sent, so quotes do not
+    repeat until the whole pool has been seen (see api.sampling).
+    """
+    user       = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='quote_rotation',
+    )
+    seen       = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Quote rotation for {self.user_id}'
+
+
+class NotificationSchedule(models.Model):
+    """
+    When each notification rule can next produce something for a user.
+
+    Written after every rule evaluation; `next_due_at` is the earliest of the
+    four, so a poll skips evaluation with one indexed read while it lies in
+    the future, and the scheduler only picks users that are due. Activity
+    completion and new journal entries push their rule's time forward (see
+    notifications/signals.py).
+    """
+    RULE_FIELDS = ('next_quote_at', 'next_exercise_check_at', 'next_weekly_at', 'next_journal_check_at')
+
+    user                   = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_schedule',
+    )
+    next_quote_at          = models.DateTimeField()
+    next_exercise_check_at = models.DateTimeField()
+    next_weekly_at         = models.DateTimeField()
+    next_journal_check_at  = models.DateTimeField()
+    next_due_at            = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'Notification schedule for {self.user_id}: next due {self.next_due_at}'
+
+    def save(self, *args, **kwargs):
+        self.next_due_at = min(getattr(self, field) for field in self.RULE_FIELDS)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def is_idle(cls, user_id, now=None):
+        """True while no rule can be due for the user (one indexed read)."""
+        return cls.objects.filter(user_id=user_id, next_due_at__gt=now or timezone.now()).exists()
+
+    @classmethod
+    def postpone(cls, user_id, field, until):
+        """Move one rule's time forward to at least `until`."""
+        others = [models.F(name) for name in cls.RULE_FIELDS if name != field]
+        cls.objects.filter(user_id=user_id, **{f'{field}__lt': until}).update(
+            **{field: until, 'next_due_at': Least(models.Value(until), *others)}
+        )
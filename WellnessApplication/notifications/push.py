@@ -0,0 +1,190 @@
+"""
+Push channel for new notifications (Server-Sent Events).
+
+GET /api/notifications/stream/ keeps the connection open and sends each new
+Notification as an SSE event whose `id` is the notification id. Clients
+resume after a reconnect by sending `Last-Event-ID` (EventSource does this
+automatically); without it the stream starts after the newest notification.
+A comment line is sent every NOTIFICATIONS_STREAM_HEARTBEAT seconds so
+proxies keep the connection open, and the server closes it after
+NOTIFICATIONS_STREAM_TIMEOUT seconds so clients reconnect periodically.
+
+Waking waiting streams goes through a broker (NOTIFICATIONS_PUSH_BROKER):
+  - VersionPollingBroker (default) watches NotificationState.version, so it
+    sees notifications created by any process, including the
+    generate_notifications scheduler. Each check is one indexed read.
+  - InProcessBroker is woken directly by NotificationState.record_created in
+    the same process, with no polling; use it when notifications are only
+    created by the process serving the streams.
+
+Serve with an ASGI server so an open stream does not hold a worker thread.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from notifications.models import Notification, NotificationState
+from notifications.serializers import NotificationSerializer
+
+# Notifications read per query while catching a stream up.
+STREAM_PAGE_SIZE = 50
+
+# ── brokers ───────────────────────────────────────────────────────────────────
+
+class InProcessBroker:
+	"""Wakes streams in this process when NotificationState.record_created runs here."""
+
+	def __init__(self):
+		self._waiters = {}
+		self._lock = threading.Lock()
+
+	def publish(self, user_ids):
+		with self._lock:
+			waiters = [waiter for user_id in user_ids for waiter in self._waiters.get(user_id, ())]
+		for loop, event in waiters:
+			loop.call_soon_threadsafe(event.set)
+
+	async def wait(self, user_id, version, timeout):
+		loop = asyncio.get_running_loop()
+		waiter = (loop, asyncio.Event())
+		with self._lock:
+			self._waiters.setdefault(user_id, set()).add(waiter)
+		try:
+			await asyncio.wait_for(waiter[1].wait(), timeout)
+			return True
+		except asyncio.TimeoutError:
+			return False
+		finally:
+			with self._lock:
+				self._waiters[user_id].discard(waiter)
+				if not self._waiters[user_id]:
+					del self._waiters[user_id]
+
+
+class VersionPollingBroker:
+	"""Polls the user's NotificationState version; works across processes."""
+
+	def __init__(self, interval=None):
+		self.interval = interval or getattr(settings, 'NOTIFICATIONS_STREAM_POLL_INTERVAL', 2.0)
+
+	def publish(self, user_ids):
+		pass
+
+	async def wait(self, user_id, version, timeout):
+		deadline = time.monotonic() + timeout
+		while True:
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				return False
+			await asyncio.sleep(min(self.interval, remaining))
+			if await _current_version(user_id) != version:
+				return True
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+	global _broker
+	if _broker is None:
+		with _broker_lock:
+			if _broker is None:
+				path = getattr(settings, 'NOTIFICATIONS_PUSH_BROKER', 'notifications.push.VersionPollingBroker')
+				_broker = import_string(path)()
+	return _broker
+
+
+def reset_broker():
+	"""Forget the broker so the next stream builds it from settings again."""
+	global _broker
+	with _broker_lock:
+		_broker = None
+
+
+# ── stream ────────────────────────────────────────────────────────────────────
+
+@sync_to_async
+def _current_version(user_id):
+	return NotificationState.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+
+
+@sync_to_async
+def _authenticate(request):
+	try:
+		result = JWTAuthentication().authenticate(request)
+	except AuthenticationFailed:
+		return None
+	return result[0] if result else None
+
+
+@sync_to_async
+def _start_cursor(user_id, last_event_id):
+	NotificationState.for_user(user_id)
+	if last_event_id is not None:
+		return last_event_id
+	return Notification.objects.filter(user_id=user_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+@sync_to_async
+def _notifications_after(user_id, cursor):
+	rows = Notification.objects.filter(user_id=user_id, id__gt=cursor).order_by('id')[:STREAM_PAGE_SIZE]
+	return NotificationSerializer(rows, many=True).data
+
+
+def _event(notification):
+	return f"id: {notification['id']}\nevent: notification\ndata: {json.dumps(notification)}\n\n"
+
+
+async def _event_stream(user_id, cursor):
+	broker    = get_broker()
+	heartbeat = getattr(settings, 'NOTIFICATIONS_STREAM_HEARTBEAT', 15.0)
+	deadline  = time.monotonic() + getattr(settings, 'NOTIFICATIONS_STREAM_TIMEOUT', 300.0)
+
+	yield f'retry: {int(heartbeat * 1000)}\n\n'
+	version = None
+	while time.monotonic() < deadline:
+		current = await _current_version(user_id)
+		if current != version:
+			version = current
+			while True:
+				page = await _notifications_after(user_id, cursor)
+				for notification in page:
+					cursor = notification['id']
+					yield _event(notification)
+				if len(page) < STREAM_PAGE_SIZE:
+					break
+
+		timeout = min(heartbeat, max(deadline - time.monotonic(), 0))
+		if not await broker.wait(user_id, version, timeout):
+			yield ': heartbeat\n\n'
+
+
+async def notification_stream(request):
+	if request.method != 'GET':
+		return JsonResponse({'status': 'error', 'message': 'Method not allowed.'}, status=405)
+
+	user = await _authenticate(request)
+	if user is None:
+		return JsonResponse({'status': 'error', 'message': 'Authentication required.'}, status=401)
+
+	last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+	try:
+		last_event_id = int(last_event_id) if last_event_id else None
+	except ValueError:
+		return JsonResponse({'status': 'error', 'message': 'Last-Event-ID must be a notification id.'}, status=400)
+
+	cursor = await _start_cursor(user.pk, last_event_id)
+	response = StreamingHttpResponse(_event_stream(user.pk, cursor), content_type='text/event-stream')
+	response['Cache-Control'] = 'no-cache'
+	response['X-Accel-Buffering'] = 'no'
+	return response
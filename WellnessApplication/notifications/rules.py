@@ -0,0 +1,502 @@
+"""
+Notification rules engine.
+
+Rules (hard-and-fast):
+  1. Motivational quote   – at most one per 48-hour window per user.
+  2. Exercise reminder    – if no completed exercise Activity exists for today.
+  3. Weekly stats         – one per week (Mon–Sun), generated on Sunday or first
+						   request after Sunday.
+  4. Journal reminder     – if the user has no JournalEntry in the last 3 days
+						   (at most one per 3-day window).
+
+Every rule's window is a dedup key on the notification (see `dedup_keys`),
+unique per (user, type, key) in the database. Rows whose key already exists
+are skipped before building them and, for concurrent runs, by the insert
+itself (bulk_create with ignore_conflicts), so two devices polling at once
+cannot create duplicates.
+
+After each evaluation the user's NotificationSchedule records when each rule
+can next fire, so polls and the scheduler skip users with nothing due.
+
+Rules are evaluated for a set of users at once: each input (existing keys,
+exercise today, latest journal entry, weekly totals) is one grouped query
+over the whole chunk of users, so the query count does not depend on how
+many users are evaluated. A single poll is the same code path with a
+one-user chunk. Exercise and weekly totals are read from the per-day
+UserDailyActivity rollup rather than from individual activities.
+"""
+
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, F, Max, OuterRef, Q, Sum, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from api.sampling import RandomRowSampler
+from notifications.models import (
+	MotivationalQuote,
+	Notification,
+	NotificationSchedule,
+	NotificationState,
+	QuoteRotation,
+)
+
+
+FALLBACK_QUOTE = ('Small steps every day lead to big changes over time.', '')
+
+QUOTE_WINDOW_SECONDS = 48 * 3600
+JOURNAL_WINDOW_DAYS  = 3
+
+# Quotes are picked from an in-memory ID list, without repeats per user until
+# the whole catalog has been seen (QuoteRotation).
+QUOTE_SAMPLER = RandomRowSampler(MotivationalQuote)
+
+
+# ── helpers ───────────────────────────────────────────────────────────────────
+
+def _week_number(dt):
+	"""ISO week number + year as a unique string, e.g. '2026-W11'."""
+	iso = dt.isocalendar()
+	return f'{iso[0]}-W{iso[1]:02d}'
+
+
+def dedup_keys(now):
+	"""{notification_type: dedup key of the rule window containing `now`}."""
+	today = timezone.localdate(now)
+	return {
+		Notification.Type.MOTIVATIONAL_QUOTE: f'quote:{int(now.timestamp()) // QUOTE_WINDOW_SECONDS}',
+		Notification.Type.EXERCISE_REMINDER:  f'exercise:{today.isoformat()}',
+		Notification.Type.WEEKLY_STATS:       f'weekly:{_week_number(today)}',
+		Notification.Type.JOURNAL_REMINDER:   f'journal:{today.toordinal() // JOURNAL_WINDOW_DAYS}',
+	}
+
+
+def day_start(day):
+	"""Aware datetime of local midnight at the start of `day`."""
+	return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def journal_check_after_entry(entry_date):
+	"""When a user whose latest journal entry is `entry_date` first becomes due a reminder."""
+	return day_start(entry_date + timedelta(days=JOURNAL_WINDOW_DAYS + 1))
+
+
+def next_due_times(now, last_entry):
+	"""
+	{NotificationSchedule field: next time the rule can fire} for a user just
+	evaluated at `now`, whose latest journal entry is `last_entry`.
+	"""
+	today          = timezone.localdate(now)
+	quote_window   = int(now.timestamp()) // QUOTE_WINDOW_SECONDS
+	days_to_sunday = (6 - today.weekday()) or 7
+
+	if last_entry is None or last_entry < today - timedelta(days=JOURNAL_WINDOW_DAYS):
+		# Reminded in this window; the next window starts the next reminder.
+		next_journal = day_start(date.fromordinal((today.toordinal() // JOURNAL_WINDOW_DAYS + 1) * JOURNAL_WINDOW_DAYS))
+	else:
+		next_journal = journal_check_after_entry(last_entry)
+
+	return {
+		'next_quote_at': datetime.fromtimestamp((quote_window + 1) * QUOTE_WINDOW_SECONDS, tz=dt_timezone.utc),
+		'next_exercise_check_at': day_start(today + timedelta(days=1)),
+		'next_weekly_at': day_start(today + timedelta(days=days_to_sunday)),
+		'next_journal_check_at': next_journal,
+	}
+
+
+def _existing_keys(user_ids, keys):
+	"""{(user_id, notification_type)} that already have their current key."""
+	return set(
+		Notification.objects.filter(user_id__in=user_ids, dedup_key__in=list(keys.values()))
+		.values_list('user_id', 'notification_type')
+	)
+
+
+def _users_exercised_on(user_ids, day):
+	from api.models import UserDailyActivity
+
+	return set(
+		UserDailyActivity.objects.filter(user_id__in=user_ids, date=day, exercise_count__gt=0)
+		.values_list('user_id', flat=True)
+	)
+
+
+def _latest_journal_dates(user_ids):
+	from journal.models import JournalEntry
+
+	rows = (
+		JournalEntry.objects.filter(user_id__in=user_ids)
+		.values('user_id')
+		.annotate(last=Max('entry_date'))
+		.order_by()
+	)
+	return {row['user_id']: row['last'] for row in rows}
+
+
+def _weekly_totals(user_ids, week_start, week_end):
+	"""
+	{user_id: weekly totals} summed from the daily activity rollup in one
+	GROUP BY user_id query (at most 7 rows per user); `user_ids=None` covers
+	every user with activity in the week.
+	"""
+	from api.models import UserDailyActivity
+
+	days = UserDailyActivity.objects.filter(date__gte=week_start, date__lte=week_end)
+	if user_ids is not None:
+		days = days.filter(user_id__in=user_ids)
+	rows = (
+		days
+		.values('user_id')
+		.annotate(
+			total=Sum('completed_count'),
+			exercises=Sum('exercise_count'),
+			meditations=Sum('meditation_count'),
+			journaling=Sum('journaling_count'),
+			total_minutes=Sum('total_minutes'),
+			motivation_after_sum=Sum('motivation_after_sum'),
+			motivation_after_count=Sum('motivation_after_count'),
+		)
+		.order_by()
+	)
+	totals = {}
+	for row in rows:
+		after_sum   = row.pop('motivation_after_sum')
+		after_count = row.pop('motivation_after_count')
+		row['avg_motivation_after'] = after_sum / after_count if after_count else None
+		totals[row['user_id']] = row
+	return totals
+
+
+def _quote_rotations(user_ids):
+	return {rotation.user_id: rotation for rotation in QuoteRotation.objects.filter(user_id__in=user_ids)}
+
+
+def _pick_quotes(user_ids, rotations):
+	"""
+	{user_id: (text, author, quote_id)} with a fresh quote per user, marking
+	each pick as seen in `rotations` (created unsaved for users without one).
+	"""
+	picks = {}
+	for user_id in user_ids:
+		rotation = rotations.get(user_id)
+		if rotation is None:
+			rotation = rotations[user_id] = QuoteRotation(user_id=user_id)
+		picks[user_id], rotation.seen = QUOTE_SAMPLER.sample_unseen_id(bytes(rotation.seen))
+
+	quotes = MotivationalQuote.objects.in_bulk({pk for pk in picks.values() if pk is not None})
+	if len(quotes) < len({pk for pk in picks.values() if pk is not None}):
+		# Some quotes were deleted in another process since the IDs were cached.
+		QUOTE_SAMPLER.invalidate()
+	return {
+		user_id: (quotes[pk].text, quotes[pk].author, pk) if pk in quotes else FALLBACK_QUOTE + (None,)
+		for user_id, pk in picks.items()
+	}
+
+
+def _save_rotations(rotations):
+	new = [rotation for rotation in rotations if rotation.pk is None]
+	existing = [rotation for rotation in rotations if rotation.pk is not None]
+	if new:
+		QuoteRotation.objects.bulk_create(new, ignore_conflicts=True)
+	if existing:
+		QuoteRotation.objects.bulk_update(existing, ['seen'])
+
+
+# ── notification builders ────────────────────────────────────────────────────
+
+def quote_notification(user_id, text, author, quote_id=None):
+	return Notification(
+		user_id=user_id,
+		notification_type=Notification.Type.MOTIVATIONAL_QUOTE,
+		title='Your daily motivation \U0001f4aa',
+		message=f'"{text}"' + (f'  \u2014 {author}' if author else ''),
+		payload={'quote': text, 'author': author, 'quote_id': quote_id},
+	)
+
+
+def exercise_reminder_notification(user_id, today):
+	return Notification(
+		user_id=user_id,
+		notification_type=Notification.Type.EXERCISE_REMINDER,
+		title="You haven't exercised today \U0001f3c3",
+		message=(
+			'Your body thrives on movement. Even a 20-minute walk counts \u2014 '
+			'open your recommended activities and pick something that fits your energy right now.'
+		),
+		payload={'date': today.isoformat()},
+	)
+
+
+def weekly_stats_notification(user_id, today, totals):
+	current_week = _week_number(today)
+	week_start   = today - timedelta(days=6)
+
+	total       = totals.get('total', 0)
+	exercises   = totals.get('exercises', 0)
+	meditations = totals.get('meditations', 0)
+	journaling  = totals.get('journaling', 0)
+	total_mins  = totals.get('total_minutes') or 0
+	avg_mot     = totals.get('avg_motivation_after')
+	if avg_mot is not None:
+		avg_mot = round(avg_mot, 1)
+
+	stats = {
+		'week': current_week,
+		'total_activities': total,
+		'exercises': exercises,
+		'meditations': meditations,
+		'journaling': journaling,
+		'total_minutes': total_mins,
+		'avg_motivation_after': avg_mot,
+	}
+
+	if total == 0:
+		msg = (
+			f'No activities completed this week ({week_start} \u2013 {today}). '
+			"A fresh week starts tomorrow \u2014 let's make it count!"
+		)
+	else:
+		msg = (
+			f'Week {current_week} recap: {total} activities completed '
+			f'({exercises} exercise, {meditations} meditation, {journaling} journaling), '
+			f'{total_mins} total minutes.'
+			+ (f' Average post-activity motivation: {avg_mot}/5.' if avg_mot else '')
+		)
+
+	return Notification(
+		user_id=user_id,
+		notification_type=Notification.Type.WEEKLY_STATS,
+		title=f'Your week in review \U0001f4ca ({current_week})',
+		message=msg,
+		payload=stats,
+	)
+
+
+def journal_reminder_notification(user_id, three_days_ago):
+	return Notification(
+		user_id=user_id,
+		notification_type=Notification.Type.JOURNAL_REMINDER,
+		title="It's been a while since you journaled \U0001f4d3",
+		message=(
+			"You haven't written a journal entry in over 3 days. "
+			'Even a few sentences can help you process your thoughts and track your progress. '
+			'Try a CBT thought-record or just free-write \u2014 whatever feels right today.'
+		),
+		payload={'last_entry_check': three_days_ago.isoformat()},
+	)
+
+
+# ── evaluation ────────────────────────────────────────────────────────────────
+
+def evaluate_rules(user_ids, now=None, rotations=None, schedules=None):
+	"""
+	Unsaved notifications that are due for `user_ids`, in rule order per user,
+	each with its dedup key. Idempotent: nothing is due again within a rule's
+	window.
+
+	Quote picks are marked as seen in `rotations` ({user_id: QuoteRotation},
+	loaded when not given), and unsaved NotificationSchedules are added to
+	`schedules` when a dict is given; saving them is up to the caller.
+	"""
+	user_ids = list(user_ids)
+	if not user_ids:
+		return []
+
+	now            = now or timezone.now()
+	today          = timezone.localdate(now)
+	three_days_ago = today - timedelta(days=3)
+	is_sunday      = today.weekday() == 6  # weekday 6 = Sunday in Python
+	keys           = dedup_keys(now)
+
+	existing   = _existing_keys(user_ids, keys)
+	exercised  = _users_exercised_on(user_ids, today)
+	journaled  = _latest_journal_dates(user_ids)
+	weekly_inline = is_sunday and not getattr(settings, 'NOTIFICATIONS_WEEKLY_DIGEST_JOB', False)
+	weekly     = _weekly_totals(user_ids, today - timedelta(days=6), today) if weekly_inline else {}
+
+	def is_new(user_id, notification_type):
+		return (user_id, notification_type) not in existing
+
+	# rule: motivational quote once per 48 h window
+	quote_due = [user_id for user_id in user_ids if is_new(user_id, Notification.Type.MOTIVATIONAL_QUOTE)]
+	if quote_due and rotations is None:
+		rotations = _quote_rotations(quote_due)
+	quotes = _pick_quotes(quote_due, rotations) if quote_due else {}
+
+	due = []
+	for user_id in user_ids:
+		if user_id in quotes:
+			due.append(quote_notification(user_id, *quotes[user_id]))
+
+		# rule: exercise reminder if no exercise completed today (once per calendar day)
+		if user_id not in exercised and is_new(user_id, Notification.Type.EXERCISE_REMINDER):
+			due.append(exercise_reminder_notification(user_id, today))
+
+		# rule: weekly stats on Sunday, once per week (unless the digest job sends them)
+		if weekly_inline and is_new(user_id, Notification.Type.WEEKLY_STATS):
+			due.append(weekly_stats_notification(user_id, today, weekly.get(user_id, {})))
+
+		# rule: journal reminder if no entry in 3 days (at most one per 3-day window)
+		last_entry = journaled.get(user_id)
+		if (last_entry is None or last_entry < three_days_ago) and is_new(user_id, Notification.Type.JOURNAL_REMINDER):
+			due.append(journal_reminder_notification(user_id, three_days_ago))
+
+	for notification in due:
+		notification.dedup_key = keys[notification.notification_type]
+
+	if schedules is not None:
+		for user_id in user_ids:
+			times = next_due_times(now, journaled.get(user_id))
+			schedules[user_id] = NotificationSchedule(user_id=user_id, next_due_at=min(times.values()), **times)
+	return due
+
+
+def generate_notifications(user_ids=None, chunk_size=500, now=None):
+	"""
+	Evaluate every rule for `user_ids` (default: every user whose schedule is
+	due) chunk by chunk and bulk-insert what is due. Returns a Counter of
+	created notifications by type.
+	"""
+	if user_ids is None:
+		user_ids = (
+			get_user_model().objects
+			.filter(Q(notification_schedule__isnull=True) | Q(notification_schedule__next_due_at__lte=now or timezone.now()))
+			.order_by('pk')
+			.values_list('pk', flat=True)
+			.iterator(chunk_size=chunk_size)
+		)
+
+	breakdown = Counter()
+	chunk = []
+	for user_id in user_ids:
+		chunk.append(user_id)
+		if len(chunk) == chunk_size:
+			_create_due(chunk, now, breakdown)
+			chunk = []
+	if chunk:
+		_create_due(chunk, now, breakdown)
+	return breakdown
+
+
+def generate_weekly_digests(now=None, chunk_size=500):
+	"""
+	Weekly stats for the latest ISO week ending on or before `now` (so on
+	Sunday, the current week; later, the week that just ended), for every user
+	who had joined by the end of that Sunday.
+
+	All totals come from one GROUP BY user_id query and the digests are
+	bulk-inserted in chunks; users that already have the week's digest are
+	skipped. Returns the number of digests created.
+	"""
+	sunday, key = _digest_week(now or timezone.now())
+
+	totals   = _weekly_totals(None, sunday - timedelta(days=6), sunday)
+	user_ids = (
+		_digest_recipients(sunday, key).order_by('pk')
+		.values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+	)
+
+	created = 0
+	chunk = []
+	for user_id in user_ids:
+		digest = weekly_stats_notification(user_id, sunday, totals.get(user_id, {}))
+		digest.dedup_key = key
+		chunk.append(digest)
+		if len(chunk) == chunk_size:
+			created += _insert_digests(chunk)
+			chunk = []
+	if chunk:
+		created += _insert_digests(chunk)
+
+	next_sunday = day_start(sunday + timedelta(days=7))
+	others = [F(name) for name in NotificationSchedule.RULE_FIELDS if name != 'next_weekly_at']
+	NotificationSchedule.objects.filter(next_weekly_at__lt=next_sunday).update(
+		next_weekly_at=next_sunday,
+		next_due_at=Least(Value(next_sunday), *others),
+	)
+	return created
+
+
+def weekly_digests_pending(now=None):
+	"""
+	Whether a user is still owed the digest `generate_weekly_digests` sends at
+	`now`. Read from the stored dedup keys, so a restarted scheduler does not
+	send a week again.
+	"""
+	sunday, key = _digest_week(now or timezone.now())
+	return _digest_recipients(sunday, key).exists()
+
+
+def _digest_week(now):
+	"""(Sunday ending the latest week on or before `now`, that week's dedup key)."""
+	today  = timezone.localdate(now)
+	sunday = today - timedelta(days=(today.weekday() + 1) % 7)
+	return sunday, f'weekly:{_week_number(sunday)}'
+
+
+def _digest_recipients(sunday, key):
+	"""Users who had joined by the end of `sunday` and do not have its digest yet."""
+	sent = Notification.objects.filter(
+		user=OuterRef('pk'),
+		notification_type=Notification.Type.WEEKLY_STATS,
+		dedup_key=key,
+	)
+	return get_user_model().objects.filter(
+		date_joined__lt=day_start(sunday + timedelta(days=1)),
+	).exclude(Exists(sent))
+
+
+def _insert_digests(digests):
+	inserted = _insert_new(digests)
+	NotificationState.record_created({digest.user_id for digest in inserted})
+	return len(inserted)
+
+
+def _insert_new(notifications):
+	"""
+	Insert `notifications`, skipping any whose dedup key a concurrent run
+	inserted since it was checked, and return the ones this call inserted:
+	those whose (user, type, key) was not stored before the insert and is
+	after it.
+	"""
+	def stored_keys():
+		return set(
+			Notification.objects.filter(
+				user_id__in={n.user_id for n in notifications},
+				dedup_key__in={n.dedup_key for n in notifications},
+			).values_list('user_id', 'notification_type', 'dedup_key')
+		)
+
+	before = stored_keys()
+	Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+	inserted = stored_keys() - before
+	return [n for n in notifications if (n.user_id, n.notification_type, n.dedup_key) in inserted]
+
+
+def generate_if_due(user_id, now=None):
+	"""generate_notifications for one user, skipped with a single read while nothing is due."""
+	if NotificationSchedule.is_idle(user_id, now=now):
+		return Counter()
+	return generate_notifications([user_id], now=now)
+
+
+def _create_due(user_ids, now, breakdown):
+	rotations = _quote_rotations(user_ids)
+	schedules = {}
+	due = evaluate_rules(user_ids, now=now, rotations=rotations, schedules=schedules)
+	if due:
+		# A concurrent run may have inserted the same keys since they were checked.
+		inserted = _insert_new(due)
+		breakdown.update(notification.notification_type for notification in inserted)
+		NotificationState.record_created({notification.user_id for notification in inserted})
+		quoted = {n.user_id for n in inserted if n.notification_type == Notification.Type.MOTIVATIONAL_QUOTE}
+		_save_rotations([rotations[user_id] for user_id in quoted])
+	NotificationSchedule.objects.bulk_create(
+		schedules.values(),
+		update_conflicts=True,
+		unique_fields=['user'],
+		update_fields=[*NotificationSchedule.RULE_FIELDS, 'next_due_at'],
+	)
@@ -100,3 +100,8 @@ class GenerateNotificationsResponseSerializer(serializers.Serializer):
         child=serializers.IntegerField(),
         help_text='Count per notification type.',
     )
+
+
+class UnreadCountResponseSerializer(serializers.Serializer):
+    unread_count = serializers.IntegerField(help_text='Unread notifications for the user.')
+    version = serializers.IntegerField(help_text='Changes whenever notifications are created or marked read.')
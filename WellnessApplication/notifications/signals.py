@@ -0,0 +1,36 @@
+"""
+Keep NotificationSchedule in step with the events that make rules unnecessary.
+
+Completing an exercise today means no exercise reminder is needed before
+tomorrow, and a new journal entry restarts the journal reminder's 3-day
+countdown, so both push the rule's next check forward instead of leaving it
+for the next evaluation to discover.
+"""
+
+from datetime import timedelta
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from journal.models import JournalEntry
+from notifications.models import NotificationSchedule
+from notifications.rules import day_start, journal_check_after_entry
+from workout.models import Activity
+
+
+@receiver(post_save, sender=Activity)
+def postpone_exercise_check(sender, instance, **kwargs):
+	if instance.activity_type != 'exercise' or not instance.completed or instance.completion_date is None:
+		return
+	today = timezone.localdate()
+	if timezone.localdate(instance.completion_date) == today:
+		NotificationSchedule.postpone(instance.user_id, 'next_exercise_check_at', day_start(today + timedelta(days=1)))
+
+
+@receiver(post_save, sender=JournalEntry)
+def postpone_journal_check(sender, instance, created, **kwargs):
+	if created:
+		NotificationSchedule.postpone(
+			instance.user_id, 'next_journal_check_at', journal_check_after_entry(instance.entry_date)
+		)
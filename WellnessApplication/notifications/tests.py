@@ -1,10 +1,38 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import asyncio
 from io import StringIO
+from unittest import mock
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from notifications.models import MotivationalQuote
+from journal.models import JournalEntry
+from notifications.models import (
+	MotivationalQuote,
+	Notification,
+	NotificationSchedule,
+	NotificationState,
+	QuoteRotation,
+)
+from notifications.push import InProcessBroker
 from notifications.quote_catalog import MOTIVATIONAL_QUOTES
+from workout.models import Activity
+from notifications.rules import (
+	QUOTE_SAMPLER,
+	evaluate_rules,
+	generate_if_due,
+	generate_notifications,
+	generate_weekly_digests,
+	weekly_stats_notification,
+)
 
 
 class FloodMotivationalQuotesCommandTests(TestCase):
@@ -24,3 +52,419 @@ class FloodMotivationalQuotesCommandTests(TestCase):
 		call_command('flood_motivational_quotes')
 
 		self.assertEqual(MotivationalQuote.objects.count(), first_count)
+
+
+@override_settings(NOTIFICATIONS_WEEKLY_DIGEST_JOB=False)
+class GenerateNotificationsTests(TestCase):
+	# A Sunday, so all four rules are evaluated.
+	NOW = datetime(2026, 3, 15, 12, 0, tzinfo=dt_timezone.utc)
+
+	def _create_users(self, count, start=0):
+		user_model = get_user_model()
+		return [
+			user_model.objects.create_user(
+				username=f'notify-{index}',
+				email=f'notify-{index}@example.com',
+				password='pass1234',
+			)
+			for index in range(start, start + count)
+		]
+
+	def test_query_count_does_not_grow_with_users(self):
+		MotivationalQuote.objects.create(text='Keep going.', author='Someone')
+		few = [user.pk for user in self._create_users(2)]
+		many = [user.pk for user in self._create_users(20, start=2)]
+		QUOTE_SAMPLER.ids()  # the cached ID list is loaded once per process
+
+		with CaptureQueriesContext(connection) as few_queries:
+			evaluate_rules(few, now=self.NOW)
+		with CaptureQueriesContext(connection) as many_queries:
+			due = evaluate_rules(many, now=self.NOW)
+
+		self.assertEqual(len(few_queries), len(many_queries))
+		self.assertEqual(len(due), 20 * 4)
+
+	def test_second_run_creates_nothing(self):
+		self._create_users(3)
+
+		with mock.patch('django.utils.timezone.now', return_value=self.NOW):
+			first = generate_notifications(chunk_size=2)
+			second = generate_notifications(chunk_size=2)
+
+		self.assertEqual(first[Notification.Type.WEEKLY_STATS], 3)
+		self.assertEqual(sum(first.values()), 12)
+		self.assertEqual(sum(second.values()), 0)
+		self.assertEqual(Notification.objects.count(), 12)
+
+	def test_concurrent_evaluations_insert_each_window_once(self):
+		user = self._create_users(1)[0]
+
+		# Two polls evaluate before either inserts, as with two devices at once.
+		first = evaluate_rules([user.pk], now=self.NOW)
+		second = evaluate_rules([user.pk], now=self.NOW)
+		Notification.objects.bulk_create(first, ignore_conflicts=True)
+		Notification.objects.bulk_create(second, ignore_conflicts=True)
+
+		self.assertEqual(len(first), 4)
+		self.assertEqual(Notification.objects.filter(user=user).count(), 4)
+		self.assertEqual(
+			set(Notification.objects.filter(user=user).values_list('dedup_key', flat=True)),
+			{n.dedup_key for n in first},
+		)
+
+	def test_breakdown_skips_rows_a_concurrent_run_inserted(self):
+		user = self._create_users(1)[0]
+
+		def evaluate_then_lose_race(user_ids, **kwargs):
+			due = evaluate_rules(user_ids, **kwargs)
+			rival = next(n for n in due if n.notification_type == Notification.Type.EXERCISE_REMINDER)
+			Notification.objects.create(
+				user_id=rival.user_id,
+				notification_type=rival.notification_type,
+				title=rival.title,
+				message=rival.message,
+				dedup_key=rival.dedup_key,
+			)
+			return due
+
+		with mock.patch('notifications.rules.evaluate_rules', side_effect=evaluate_then_lose_race):
+			breakdown = generate_notifications([user.pk], now=self.NOW)
+
+		self.assertEqual(sum(breakdown.values()), 3)
+		self.assertNotIn(Notification.Type.EXERCISE_REMINDER, breakdown)
+		self.assertEqual(Notification.objects.filter(user=user).count(), 4)
+
+	def test_quotes_rotate_without_repeats(self):
+		MotivationalQuote.objects.all().delete()
+		QUOTE_SAMPLER.invalidate()
+		quote_ids = [
+			MotivationalQuote.objects.create(text=f'Rotation quote {index}').pk
+			for index in range(3)
+		]
+		user = self._create_users(1)[0]
+
+		received = []
+		for _ in range(3):
+			Notification.objects.filter(user=user).delete()
+			generate_notifications([user.pk])
+			quote = Notification.objects.get(user=user, notification_type=Notification.Type.MOTIVATIONAL_QUOTE)
+			received.append(quote.payload['quote_id'])
+
+		self.assertCountEqual(received, quote_ids)
+		self.assertTrue(QuoteRotation.objects.filter(user=user).exists())
+
+	def test_command_reports_breakdown(self):
+		self._create_users(2)
+		output = StringIO()
+
+		call_command('generate_notifications', stdout=output)
+
+		self.assertIn('Notifications generated:', output.getvalue())
+		self.assertTrue(Notification.objects.filter(notification_type=Notification.Type.EXERCISE_REMINDER).exists())
+
+
+class NotificationListPollingTests(APITestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username='poller',
+			email='poller@example.com',
+			password='pass1234',
+		)
+		self.client.force_authenticate(user=self.user)
+
+	def test_poll_evaluates_rules_by_default(self):
+		response = self.client.get(reverse('notification-list'))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(Notification.objects.filter(user=self.user).exists())
+
+	@override_settings(NOTIFICATIONS_EVALUATE_ON_POLL=False)
+	def test_poll_is_read_only_when_scheduler_runs(self):
+		response = self.client.get(reverse('notification-list'))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertFalse(Notification.objects.filter(user=self.user).exists())
+
+
+class NotificationVersionTests(APITestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username='versioned',
+			email='versioned@example.com',
+			password='pass1234',
+		)
+		self.client.force_authenticate(user=self.user)
+		generate_notifications([self.user.pk])
+
+	@override_settings(NOTIFICATIONS_EVALUATE_ON_POLL=False)
+	def test_matching_etag_returns_304_without_reading_notifications(self):
+		first = self.client.get(reverse('notification-list'))
+		self.assertEqual(first.status_code, 200)
+		self.assertIn('Last-Modified', first)
+
+		with CaptureQueriesContext(connection) as queries:
+			second = self.client.get(reverse('notification-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+		self.assertEqual(second.status_code, 304)
+		self.assertFalse(any('"notifications_notification"' in query['sql'] for query in queries))
+
+	@override_settings(NOTIFICATIONS_EVALUATE_ON_POLL=False)
+	def test_mark_read_changes_etag_and_unread_count(self):
+		unread = Notification.objects.filter(user=self.user, is_read=False).count()
+		count = self.client.get(reverse('notification-unread-count'))
+		self.assertEqual(count.data['unread_count'], unread)
+
+		etag = self.client.get(reverse('notification-list'))['ETag']
+		notification = Notification.objects.filter(user=self.user).first()
+		self.client.post(reverse('notification-mark-read'), {'ids': [notification.pk]}, format='json')
+
+		response = self.client.get(reverse('notification-list'), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response['ETag'], etag)
+		self.assertEqual(NotificationState.objects.get(user=self.user).unread_count, unread - 1)
+
+		self.client.post(reverse('notification-mark-all-read'))
+		count = self.client.get(reverse('notification-unread-count'))
+		self.assertEqual(count.data['unread_count'], 0)
+
+
+@override_settings(NOTIFICATIONS_STREAM_TIMEOUT=0.3, NOTIFICATIONS_STREAM_HEARTBEAT=0.1, NOTIFICATIONS_STREAM_POLL_INTERVAL=0.05)
+class NotificationStreamTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username='streamer',
+			email='streamer@example.com',
+			password='pass1234',
+		)
+		self.token = str(RefreshToken.for_user(self.user).access_token)
+		generate_notifications([self.user.pk])
+		self.ids = list(Notification.objects.filter(user=self.user).order_by('id').values_list('id', flat=True))
+
+	async def _read_stream(self, **headers):
+		response = await self.async_client.get(
+			reverse('notification-stream'),
+			headers={'Authorization': f'Bearer {self.token}', **headers},
+		)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], 'text/event-stream')
+		return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+	async def test_resumes_after_last_event_id_and_sends_heartbeats(self):
+		body = await self._read_stream(**{'Last-Event-ID': str(self.ids[0])})
+
+		sent = [int(line[4:]) for line in body.splitlines() if line.startswith('id: ')]
+		self.assertEqual(sent, self.ids[1:])
+		self.assertIn(': heartbeat', body)
+
+	async def test_pushes_notifications_created_while_connected(self):
+		next_week = timezone.now() + timedelta(days=7)
+
+		async def create_later():
+			await asyncio.sleep(0.1)
+			await sync_to_async(generate_notifications)([self.user.pk], now=next_week)
+
+		_, body = await asyncio.gather(create_later(), self._read_stream())
+
+		created = await sync_to_async(
+			lambda: list(Notification.objects.filter(user=self.user, id__gt=self.ids[-1]).order_by('id').values_list('id', flat=True))
+		)()
+		sent = [int(line[4:]) for line in body.splitlines() if line.startswith('id: ')]
+		self.assertTrue(created)
+		self.assertEqual(sent, created)
+
+	async def test_sends_every_pending_notification_before_waiting(self):
+		await sync_to_async(Notification.objects.bulk_create)([
+			Notification(
+				user=self.user,
+				notification_type=Notification.Type.MOTIVATIONAL_QUOTE,
+				title='Quote',
+				message=f'Quote {index}',
+				dedup_key=f'backlog:{index}',
+			)
+			for index in range(60)
+		])
+
+		body = await self._read_stream(**{'Last-Event-ID': str(self.ids[-1])})
+
+		sent = [int(line[4:]) for line in body.splitlines() if line.startswith('id: ')]
+		self.assertEqual(len(sent), 60)
+		self.assertEqual(sent, sorted(sent))
+
+	async def test_requires_authentication(self):
+		response = await self.async_client.get(reverse('notification-stream'))
+
+		self.assertEqual(response.status_code, 401)
+		self.assertEqual(response.json()['status'], 'error')
+
+
+class InProcessBrokerTests(TestCase):
+	def test_publish_wakes_waiting_stream(self):
+		broker = InProcessBroker()
+
+		async def scenario():
+			waiting = asyncio.ensure_future(broker.wait(7, None, timeout=1))
+			await asyncio.sleep(0)
+			broker.publish([7])
+			return await waiting, await broker.wait(7, None, timeout=0.01)
+
+		woke, timed_out = asyncio.run(scenario())
+		self.assertTrue(woke)
+		self.assertFalse(timed_out)
+
+
+class NotificationScheduleTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username='scheduled',
+			email='scheduled@example.com',
+			password='pass1234',
+		)
+
+	def test_poll_with_nothing_due_is_one_query(self):
+		self.assertTrue(generate_if_due(self.user.pk))
+		schedule = NotificationSchedule.objects.get(user=self.user)
+		self.assertGreater(schedule.next_due_at, timezone.now())
+
+		with CaptureQueriesContext(connection) as queries:
+			breakdown = generate_if_due(self.user.pk)
+
+		self.assertFalse(breakdown)
+		self.assertEqual(len(queries), 1)
+
+	def test_scheduler_only_evaluates_due_users(self):
+		generate_notifications([self.user.pk])
+		NotificationSchedule.objects.filter(user=self.user).update(next_due_at=timezone.now() - timedelta(minutes=1))
+		Notification.objects.filter(user=self.user, notification_type=Notification.Type.MOTIVATIONAL_QUOTE).delete()
+		other = get_user_model().objects.create_user(username='idle', email='idle@example.com', password='pass1234')
+		generate_notifications([other.pk])
+		Notification.objects.filter(user=other).delete()
+
+		breakdown = generate_notifications()
+
+		self.assertEqual(breakdown[Notification.Type.MOTIVATIONAL_QUOTE], 1)
+		self.assertFalse(Notification.objects.filter(user=other).exists())
+
+	def test_exercise_and_journal_push_checks_forward(self):
+		NotificationSchedule.objects.create(
+			user=self.user,
+			next_quote_at=timezone.now() + timedelta(days=1),
+			next_exercise_check_at=timezone.now(),
+			next_weekly_at=timezone.now() + timedelta(days=1),
+			next_journal_check_at=timezone.now(),
+		)
+
+		Activity.objects.create(
+			user=self.user,
+			activity_name='Brisk Walking',
+			activity_type='exercise',
+			description='Walking set',
+			duration_minutes=20,
+			duration_seconds=1200,
+			intensity='Moderate',
+			completed=True,
+			completion_date=timezone.now(),
+		)
+		JournalEntry.objects.create(user=self.user, title='Today', content='Wrote something.')
+
+		schedule = NotificationSchedule.objects.get(user=self.user)
+		self.assertGreater(schedule.next_exercise_check_at, timezone.now())
+		self.assertGreater(schedule.next_journal_check_at, timezone.now() + timedelta(days=3))
+		self.assertGreater(schedule.next_due_at, timezone.now())
+		self.assertFalse(generate_if_due(self.user.pk))
+
+
+class WeeklyDigestTests(TestCase):
+	# The Monday after the week of 2026-03-09 .. 2026-03-15.
+	NOW = datetime(2026, 3, 16, 9, 0, tzinfo=dt_timezone.utc)
+
+	def _create_user(self, index, date_joined=datetime(2026, 3, 1, tzinfo=dt_timezone.utc)):
+		return get_user_model().objects.create_user(
+			username=f'digest-{index}',
+			email=f'digest-{index}@example.com',
+			password='pass1234',
+			date_joined=date_joined,
+		)
+
+	def _complete(self, user, activity_type, minutes, motivation_after, day):
+		Activity.objects.create(
+			user=user,
+			activity_name='Session',
+			activity_type=activity_type,
+			description='Session',
+			duration_minutes=minutes,
+			duration_seconds=minutes * 60,
+			intensity='Moderate',
+			completed=True,
+			completion_date=datetime(2026, 3, day, 8, 0, tzinfo=dt_timezone.utc),
+			motivation_after=motivation_after,
+		)
+
+	def test_digest_totals_for_every_user_in_constant_queries(self):
+		active = self._create_user(0)
+		self._complete(active, 'exercise', 30, 4, day=10)
+		self._complete(active, 'meditation', 10, 5, day=15)
+		self._complete(active, 'exercise', 20, 1, day=16)  # next week
+		self._create_user(1)
+
+		with CaptureQueriesContext(connection) as few_queries:
+			created = generate_weekly_digests(now=self.NOW)
+		Notification.objects.all().delete()
+		NotificationState.objects.all().delete()
+		for index in range(2, 12):
+			self._create_user(index)
+		with CaptureQueriesContext(connection) as many_queries:
+			generate_weekly_digests(now=self.NOW)
+
+		self.assertEqual(created, 2)
+		self.assertEqual(len(few_queries), len(many_queries))
+		digest = Notification.objects.get(user=active)
+		self.assertEqual(digest.dedup_key, 'weekly:2026-W11')
+		self.assertEqual(digest.payload['total_activities'], 2)
+		self.assertEqual(digest.payload['exercises'], 1)
+		self.assertEqual(digest.payload['total_minutes'], 40)
+		self.assertEqual(digest.payload['avg_motivation_after'], 4.5)
+		self.assertEqual(generate_weekly_digests(now=self.NOW), 0)
+
+	def test_digest_count_skips_rows_a_concurrent_run_inserted(self):
+		users = [self._create_user(index) for index in range(3)]
+
+		def build_then_lose_race(user_id, today, totals):
+			if user_id == users[0].pk:
+				Notification.objects.create(
+					user_id=user_id,
+					notification_type=Notification.Type.WEEKLY_STATS,
+					title='Weekly stats',
+					message='Sent by another run.',
+					dedup_key='weekly:2026-W11',
+				)
+			return weekly_stats_notification(user_id, today, totals)
+
+		with mock.patch('notifications.rules.weekly_stats_notification', side_effect=build_then_lose_race):
+			created = generate_weekly_digests(now=self.NOW)
+
+		self.assertEqual(created, 2)
+		self.assertEqual(Notification.objects.filter(notification_type=Notification.Type.WEEKLY_STATS).count(), 3)
+
+	def test_restarted_command_does_not_resend_the_week(self):
+		self._create_user(0)
+		wednesday = datetime(2026, 3, 18, 9, 0, tzinfo=dt_timezone.utc)
+
+		with mock.patch('django.utils.timezone.now', return_value=self.NOW):
+			call_command('generate_notifications', '--weekly-digest', stdout=StringIO())
+		self._create_user(1, date_joined=datetime(2026, 3, 17, 10, 0, tzinfo=dt_timezone.utc))
+		output = StringIO()
+		with mock.patch('django.utils.timezone.now', return_value=wednesday):
+			call_command('generate_notifications', '--weekly-digest', stdout=output)
+
+		self.assertNotIn('Weekly digests', output.getvalue())
+		digests = Notification.objects.filter(notification_type=Notification.Type.WEEKLY_STATS)
+		self.assertEqual(list(digests.values_list('user__username', 'dedup_key')), [('digest-0', 'weekly:2026-W11')])
+
+	@override_settings(NOTIFICATIONS_WEEKLY_DIGEST_JOB=True)
+	def test_polls_leave_weekly_stats_to_the_job(self):
+		user = self._create_user(0)
+		sunday = datetime(2026, 3, 15, 12, 0, tzinfo=dt_timezone.utc)
+
+		due = evaluate_rules([user.pk], now=sunday)
+
+		self.assertNotIn(Notification.Type.WEEKLY_STATS, {n.notification_type for n in due})
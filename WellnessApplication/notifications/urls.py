@@ -1,14 +1,18 @@
 from django.urls import path
 
+from notifications.push import notification_stream
 from notifications.views import (
     GenerateNotificationsView,
     MarkAllNotificationsReadView,
     MarkNotificationsReadView,
     NotificationListView,
+    UnreadCountView,
 )
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification-list'),
+    path('stream/', notification_stream, name='notification-stream'),
+    path('unread-count/', UnreadCountView.as_view(), name='notification-unread-count'),
     path('generate/', GenerateNotificationsView.as_view(), name='notification-generate'),
     path('mark-read/', MarkNotificationsReadView.as_view(), name='notification-mark-read'),
     path('mark-all-read/', MarkAllNotificationsReadView.as_view(), name='notification-mark-all-read'),
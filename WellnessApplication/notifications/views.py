@@ -1,23 +1,23 @@
 """
-Notification views + rules engine.
+Notification views.
 
-Rules (hard-and-fast):
-  1. Motivational quote   – at most one per 48 hours per user.
-  2. Exercise reminder    – if no completed exercise Activity exists for today.
-  3. Weekly stats         – one per week (Mon–Sun), generated on Sunday or first
-						   request after Sunday.
-  4. Journal reminder     – if the user has no JournalEntry in the last 3 days.
-
-The client calls POST /api/notifications/generate/ (or the server can call it
-via a scheduled task / cron) to evaluate and persist new notifications.
+Rules live in notifications/rules.py. They are evaluated for all users by the
+`generate_notifications` management command (run it with --loop or from
+cron), on POST /api/notifications/generate/ for the calling user, and, while
+settings.NOTIFICATIONS_EVALUATE_ON_POLL is True, on every list poll.
 GET /api/notifications/          → list unread (or all) notifications.
+GET /api/notifications/unread-count/ → unread count from NotificationState.
 POST /api/notifications/mark-read/ → mark one or many as read.
-"""
 
-from datetime import timedelta
+Every create and mark-read bumps the user's NotificationState version, which
+the list endpoint sends as its ETag; a matching If-None-Match is answered
+with 304 without reading the notification table.
+"""
 
-from django.db.models import Sum
+from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from drf_spectacular.utils import OpenApiParameter, PolymorphicProxySerializer, extend_schema
 from drf_spectacular.types import OpenApiTypes
 from rest_framework import status
@@ -25,7 +25,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from notifications.models import Notification, MotivationalQuote
+from notifications.models import Notification, NotificationState
+from notifications.rules import generate_if_due
 from notifications.serializers import (
 	ExerciseReminderNotificationSchemaSerializer,
 	GenerateNotificationsResponseSerializer,
@@ -34,193 +35,11 @@ from notifications.serializers import (
 	MarkReadResponseSerializer,
 	MotivationalQuoteNotificationSchemaSerializer,
 	NotificationSerializer,
+	UnreadCountResponseSerializer,
 	WeeklyStatsNotificationSchemaSerializer,
 )
 
 
-# ── helpers ───────────────────────────────────────────────────────────────────
-
-def _latest_notification(user, ntype):
-	return (
-		Notification.objects.filter(user=user, notification_type=ntype)
-		.order_by('-created_at')
-		.first()
-	)
-
-
-def _hours_since(notification):
-	if notification is None:
-		return float('inf')
-	return (timezone.now() - notification.created_at).total_seconds() / 3600
-
-
-def _week_number(dt):
-	"""ISO week number + year as a unique string, e.g. '2026-W11'."""
-	iso = dt.isocalendar()
-	return f'{iso[0]}-W{iso[1]:02d}'
-
-
-# ── rule: motivational quote every 48 h ──────────────────────────────────────
-
-def _maybe_quote(user):
-	last = _latest_notification(user, Notification.Type.MOTIVATIONAL_QUOTE)
-	if _hours_since(last) < 48:
-		return None
-
-	quote = MotivationalQuote.objects.order_by('?').first()
-	if not quote:
-		text   = 'Small steps every day lead to big changes over time.'
-		author = ''
-	else:
-		text   = quote.text
-		author = quote.author
-
-	return Notification(
-		user=user,
-		notification_type=Notification.Type.MOTIVATIONAL_QUOTE,
-		title='Your daily motivation \U0001f4aa',
-		message=f'"{text}"' + (f'  \u2014 {author}' if author else ''),
-		payload={'quote': text, 'author': author},
-	)
-
-
-# ── rule: exercise reminder if no exercise completed today ───────────────────
-
-def _maybe_exercise_reminder(user):
-	from workout.models import Activity
-
-	today = timezone.localdate()
-	exercised_today = Activity.objects.filter(
-		user=user,
-		activity_type='exercise',
-		completed=True,
-		completion_date__date=today,
-	).exists()
-
-	if exercised_today:
-		return None
-
-	# Avoid spamming – only one per calendar day
-	last = _latest_notification(user, Notification.Type.EXERCISE_REMINDER)
-	if last and last.created_at.date() == today:
-		return None
-
-	return Notification(
-		user=user,
-		notification_type=Notification.Type.EXERCISE_REMINDER,
-		title="You haven't exercised today \U0001f3c3",
-		message=(
-			'Your body thrives on movement. Even a 20-minute walk counts \u2014 '
-			'open your recommended activities and pick something that fits your energy right now.'
-		),
-		payload={'date': today.isoformat()},
-	)
-
-
-# ── rule: weekly stats on Sunday (or first poll after Sunday) ────────────────
-
-def _maybe_weekly_stats(user):
-	from workout.models import Activity
-
-	today        = timezone.localdate()
-	current_week = _week_number(today)
-
-	last = _latest_notification(user, Notification.Type.WEEKLY_STATS)
-	if last and _week_number(last.created_at.date()) == current_week:
-		return None  # already sent this week
-
-	# Only generate from Sunday onward (weekday 6 = Sunday in Python)
-	if today.weekday() != 6:
-		return None
-
-	# Calculate week window (Mon–Sun)
-	week_start = today - timedelta(days=6)
-
-	activities = Activity.objects.filter(
-		user=user,
-		completed=True,
-		completion_date__date__gte=week_start,
-		completion_date__date__lte=today,
-	)
-
-	total       = activities.count()
-	exercises   = activities.filter(activity_type='exercise').count()
-	meditations = activities.filter(activity_type='meditation').count()
-	journaling  = activities.filter(activity_type='journaling').count()
-	total_mins  = activities.aggregate(t=Sum('duration_minutes'))['t'] or 0
-
-	motivated_qs = activities.filter(motivation_after__isnull=False)
-	if motivated_qs.exists():
-		avg_mot = round(
-			sum(a.motivation_after for a in motivated_qs) / motivated_qs.count(), 1
-		)
-	else:
-		avg_mot = None
-
-	stats = {
-		'week': current_week,
-		'total_activities': total,
-		'exercises': exercises,
-		'meditations': meditations,
-		'journaling': journaling,
-		'total_minutes': total_mins,
-		'avg_motivation_after': avg_mot,
-	}
-
-	if total == 0:
-		msg = (
-			f'No activities completed this week ({week_start} \u2013 {today}). '
-			"A fresh week starts tomorrow \u2014 let's make it count!"
-		)
-	else:
-		msg = (
-			f'Week {current_week} recap: {total} activities completed '
-			f'({exercises} exercise, {meditations} meditation, {journaling} journaling), '
-			f'{total_mins} total minutes.'
-			+ (f' Average post-activity motivation: {avg_mot}/5.' if avg_mot else '')
-		)
-
-	return Notification(
-		user=user,
-		notification_type=Notification.Type.WEEKLY_STATS,
-		title=f'Your week in review \U0001f4ca ({current_week})',
-		message=msg,
-		payload=stats,
-	)
-
-
-# ── rule: journal reminder if no entry in 3 days ─────────────────────────────
-
-def _maybe_journal_reminder(user):
-	from journal.models import JournalEntry
-
-	three_days_ago = timezone.localdate() - timedelta(days=3)
-	has_recent = JournalEntry.objects.filter(
-		user=user,
-		entry_date__gte=three_days_ago,
-	).exists()
-
-	if has_recent:
-		return None
-
-	# At most one reminder per 3-day window
-	last = _latest_notification(user, Notification.Type.JOURNAL_REMINDER)
-	if last and (timezone.now() - last.created_at).days < 3:
-		return None
-
-	return Notification(
-		user=user,
-		notification_type=Notification.Type.JOURNAL_REMINDER,
-		title="It's been a while since you journaled \U0001f4d3",
-		message=(
-			"You haven't written a journal entry in over 3 days. "
-			'Even a few sentences can help you process your thoughts and track your progress. '
-			'Try a CBT thought-record or just free-write \u2014 whatever feels right today.'
-		),
-		payload={'last_entry_check': three_days_ago.isoformat()},
-	)
-
-
 # ── views ─────────────────────────────────────────────────────────────────────
 
 class NotificationListView(APIView):
@@ -233,15 +52,19 @@ class NotificationListView(APIView):
 			'Returns notifications for the authenticated user, newest first.\n\n'
 			'**All four notification rules are evaluated automatically on every poll** — '
 			'the backend creates any due notifications before returning the list. '
-			'The frontend only ever needs to call this one endpoint.\n\n'
+			'The frontend only ever needs to call this one endpoint. Deployments running the '
+			'`generate_notifications` scheduler can turn this off with '
+			'`NOTIFICATIONS_EVALUATE_ON_POLL = False`, making the poll a plain read.\n\n'
 			'**Rules evaluated on each poll:**\n\n'
 			'| Type | Rule |\n'
 			'|---|---|\n'
-			'| `motivational_quote` | Created at most once every **48 hours** |\n'
+			'| `motivational_quote` | Created at most once per **48-hour** window |\n'
 			'| `exercise_reminder` | Created if no exercise completed **today** (once per day) |\n'
 			'| `weekly_stats` | Created once per week on **Sunday** with a full activity summary |\n'
 			'| `journal_reminder` | Created if no journal entry in the last **3 days** |\n\n'
-			'Use `?unread_only=true` to fetch only unread notifications.'
+			'Use `?unread_only=true` to fetch only unread notifications.\n\n'
+			'Responses carry an `ETag` and `Last-Modified`. Send the ETag back in '
+			'`If-None-Match` to get `304 Not Modified` while nothing has changed.'
 		),
 		parameters=[
 			OpenApiParameter(
@@ -267,23 +90,49 @@ class NotificationListView(APIView):
 		},
 	)
 	def get(self, request):
-		# Evaluate all rules on every poll — idempotent, so safe to run every time.
 		user = request.user
-		to_create = [
-			n for n in [
-				_maybe_quote(user),
-				_maybe_exercise_reminder(user),
-				_maybe_weekly_stats(user),
-				_maybe_journal_reminder(user),
-			] if n is not None
-		]
-		if to_create:
-			Notification.objects.bulk_create(to_create)
+		if getattr(settings, 'NOTIFICATIONS_EVALUATE_ON_POLL', True):
+			# Idempotent, so safe to run every time; disable once the scheduler runs.
+			generate_if_due(user.pk)
+
+		unread_only = request.query_params.get('unread_only', '').lower() in ('true', '1')
+		state = NotificationState.for_user(user.pk)
+		etag = state.etag('-unread' if unread_only else '')
+		last_modified = state.updated_at.timestamp()
+
+		# Only the ETag is compared: Last-Modified has one-second resolution.
+		not_modified = get_conditional_response(request, etag=etag)
+		if not_modified is not None:
+			return not_modified
 
 		qs = Notification.objects.filter(user=user)
-		if request.query_params.get('unread_only', '').lower() in ('true', '1'):
+		if unread_only:
 			qs = qs.filter(is_read=False)
-		return Response(NotificationSerializer(qs[:50], many=True).data)
+		response = Response(NotificationSerializer(qs[:50], many=True).data)
+		response['ETag'] = etag
+		response['Last-Modified'] = http_date(last_modified)
+		return response
+
+
+class UnreadCountView(APIView):
+	permission_classes = [IsAuthenticated]
+
+	@extend_schema(
+		tags=['Notifications'],
+		summary='Unread notification count',
+		description=(
+			'Returns the number of unread notifications from a per-user counter, without '
+			'evaluating rules or reading the notification table. `version` changes whenever '
+			'notifications are created or marked read.'
+		),
+		responses={200: UnreadCountResponseSerializer},
+	)
+	def get(self, request):
+		state = NotificationState.for_user(request.user.pk)
+		return Response(
+			{'unread_count': state.unread_count, 'version': state.version},
+			status=status.HTTP_200_OK,
+		)
 
 
 class GenerateNotificationsView(APIView):
@@ -296,7 +145,7 @@ class GenerateNotificationsView(APIView):
 			"Runs all four notification rules against the authenticated user's data "
 			'and persists any new notifications that are due.\n\n'
 			'**Rules evaluated:**\n'
-			'- Motivational quote if \u2265 48 h since last one\n'
+			'- Motivational quote once per 48-hour window\n'
 			'- Exercise reminder if no exercise completed today\n'
 			'- Weekly stats if today is Sunday and none sent yet this week\n'
 			'- Journal reminder if no entry in the last 3 days\n\n'
@@ -307,28 +156,10 @@ class GenerateNotificationsView(APIView):
 		responses={200: GenerateNotificationsResponseSerializer},
 	)
 	def post(self, request):
-		user = request.user
-		rules = [
-			_maybe_quote,
-			_maybe_exercise_reminder,
-			_maybe_weekly_stats,
-			_maybe_journal_reminder,
-		]
-
-		to_create = []
-		breakdown = {}
-		for rule in rules:
-			notif = rule(user)
-			if notif:
-				to_create.append(notif)
-				key = notif.notification_type
-				breakdown[key] = breakdown.get(key, 0) + 1
-
-		if to_create:
-			Notification.objects.bulk_create(to_create)
+		breakdown = generate_if_due(request.user.pk)
 
 		return Response(
-			{'generated': len(to_create), 'breakdown': breakdown},
+			{'generated': sum(breakdown.values()), 'breakdown': dict(breakdown)},
 			status=status.HTTP_200_OK,
 		)
 
@@ -356,6 +187,7 @@ class MarkNotificationsReadView(APIView):
 			)
 			.update(is_read=True, read_at=timezone.now())
 		)
+		NotificationState.record_read(request.user.pk, updated)
 		return Response({'marked_read': updated}, status=status.HTTP_200_OK)
 
 
@@ -374,4 +206,5 @@ class MarkAllNotificationsReadView(APIView):
 			.filter(user=request.user, is_read=False)
 			.update(is_read=True, read_at=timezone.now())
 		)
+		NotificationState.record_read(request.user.pk, updated)
 		return Response({'marked_read': updated}, status=status.HTTP_200_OK)
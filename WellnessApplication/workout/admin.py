@@ -1,9 +1,26 @@
 from django.contrib import admin
-from .models import Activity, WorkoutSession
+from api.signals import deferred_statistics
+from .models import Activity, RecommendationDailyStats, WorkoutSession
+
+
+class DeferredStatisticsAdminMixin:
+    """Refresh each touched user's statistics once per admin request, e.g. for bulk actions."""
+
+    def changelist_view(self, request, extra_context=None):
+        with deferred_statistics():
+            return super().changelist_view(request, extra_context)
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        with deferred_statistics():
+            return super().changeform_view(request, object_id, form_url, extra_context)
+
+    def delete_view(self, request, object_id, extra_context=None):
+        with deferred_statistics():
+            return super().delete_view(request, object_id, extra_context)
 
 
 @admin.register(Activity)
-class ActivityAdmin(admin.ModelAdmin):
+class ActivityAdmin(DeferredStatisticsAdminMixin, admin.ModelAdmin):
     list_display = ['activity_name', 'user', 'activity_type', 'completed', 'motivation_delta', 'engagement_contribution', 'created_at']
     list_filter = ['activity_type', 'completed', 'intensity', 'user_segment']
     search_fields = ['activity_name', 'user__username', 'description']
@@ -55,3 +72,9 @@ class WorkoutSessionAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(RecommendationDailyStats)
+class RecommendationDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'generated', 'reused', 'reuse_ratio']
+    readonly_fields = ['date', 'generated', 'reused']
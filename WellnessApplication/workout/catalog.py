@@ -0,0 +1,194 @@
+"""
+Read-only activity and program catalogs, loaded once per process.
+
+The registry freezes `ACTIVITIES_BY_SEGMENT` and `PROGRAM_RECOMMENDATIONS`
+(dicts become read-only mappings, lists become tuples) and precomputes the
+lookups the recommendation views need, so selecting candidates is a dict
+lookup instead of a scan of the catalog.
+
+Content can be replaced without a deploy by pointing WORKOUT_CATALOG_PATH at
+a JSON or YAML file with an `activities_by_segment` and/or a
+`program_recommendations` section, in the same shape as the Python modules;
+a missing section falls back to the built-in one. The file is reloaded when
+its mtime changes.
+"""
+import json
+import os
+import threading
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from workout.activities import ACTIVITIES_BY_SEGMENT
+from workout.programs import PROGRAM_RECOMMENDATIONS
+
+
+CATALOG_TYPES = ('exercise', 'meditation', 'journaling')
+CATALOG_GROUPS = ('physical', 'mental')
+
+DEFAULT_ACTIVITY_SEGMENT = "Moderate Anxiety, Moderate Activity"
+
+SEGMENT_TO_ACTIVITY_KEY = {
+    "Older High Stress Exhausted": "High Anxiety, Low Activity",
+    "Young High Stress Active Social": "Low Anxiety, High Activity",
+    "Mid Life Low Stress Depressed": "Physical Health Risk",
+    "Mid Life Thriving Wellness Seeker": "Moderate Anxiety, Moderate Activity",
+    "Working Professional Sedentary Stable": "Moderate Anxiety, Moderate Activity",
+}
+
+
+def get_activity_segment_key(segment_name):
+    """Map model segment labels to activity-catalog segment keys."""
+    return SEGMENT_TO_ACTIVITY_KEY.get(segment_name, DEFAULT_ACTIVITY_SEGMENT)
+
+
+def freeze(value):
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Mutable deep copy of a frozen catalog value."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class CatalogRegistry:
+    """
+    Frozen catalogs plus indexes by segment and group, type, intensity and
+    duration (minutes). Lookups return tuples, empty for unknown keys.
+    """
+
+    def __init__(self, activities_by_segment, program_recommendations):
+        _validate_activities(activities_by_segment)
+        self.activities_by_segment = freeze(activities_by_segment)
+        self.program_recommendations = freeze(program_recommendations)
+
+        by_group, by_type, by_intensity, by_duration = {}, {}, {}, {}
+        for segment, groups in self.activities_by_segment.items():
+            for group, items in groups.items():
+                by_group[(segment, group)] = items
+                for item in items:
+                    by_type.setdefault((segment, item['type']), []).append(item)
+                    by_intensity.setdefault((segment, item.get('intensity')), []).append(item)
+                    by_duration.setdefault((segment, item.get('duration')), []).append(item)
+
+        self._by_group = by_group
+        self._by_type = _tuples(by_type)
+        self._by_intensity = _tuples(by_intensity)
+        self._by_duration = _tuples(by_duration)
+
+        self._mental_without_journaling = {}
+        self._session_pools = {}
+        for segment in self.activities_by_segment:
+            physical = self.activities(segment, 'physical')
+            mental = self.activities(segment, 'mental')
+            without_journaling = tuple(item for item in mental if item['type'] != 'journaling')
+            self._mental_without_journaling[segment] = without_journaling
+            # If a segment has too few meditation items, include journaling templates
+            # so we can still build multi-activity sessions.
+            pool = mental if len(without_journaling) < 2 and mental else without_journaling
+            self._session_pools[segment] = (physical, pool)
+
+    def segments(self):
+        return tuple(self.activities_by_segment)
+
+    def items(self):
+        """Every catalog activity, in catalog order."""
+        return tuple(item for items in self._by_group.values() for item in items)
+
+    def activities(self, segment, group):
+        return self._by_group.get((segment, group), ())
+
+    def by_type(self, segment, activity_type):
+        return self._by_type.get((segment, activity_type), ())
+
+    def by_intensity(self, segment, intensity):
+        return self._by_intensity.get((segment, intensity), ())
+
+    def by_duration(self, segment, minutes):
+        return self._by_duration.get((segment, minutes), ())
+
+    def mental_activities(self, segment, include_journaling=True):
+        if include_journaling:
+            return self.activities(segment, 'mental')
+        return self._mental_without_journaling.get(segment, ())
+
+    def session_pool(self, segment):
+        """(physical, mental) candidates for a recommended session."""
+        return self._session_pools.get(segment, ((), ()))
+
+    def program(self, segment_name):
+        """Baseline program recommendation for a user segment name, if any."""
+        return self.program_recommendations.get(segment_name)
+
+
+def _tuples(index):
+    return {key: tuple(items) for key, items in index.items()}
+
+
+def _validate_activities(activities_by_segment):
+    if not isinstance(activities_by_segment, dict):
+        raise ImproperlyConfigured("Activity catalog must map segment names to activity groups.")
+    for segment, groups in activities_by_segment.items():
+        for group, items in groups.items():
+            if group not in CATALOG_GROUPS:
+                raise ImproperlyConfigured(f"Unknown activity group '{group}' in segment '{segment}'.")
+            for item in items:
+                if not item.get('name') or item.get('type') not in CATALOG_TYPES:
+                    raise ImproperlyConfigured(
+                        f"Activity catalog item in '{segment}/{group}' needs a name and a type "
+                        f"from {', '.join(CATALOG_TYPES)}."
+                    )
+
+
+def load_catalog_file(path):
+    """Build a registry from a JSON or YAML catalog file."""
+    with open(path, encoding='utf-8') as handle:
+        if str(path).lower().endswith(('.yaml', '.yml')):
+            import yaml
+            data = yaml.safe_load(handle)
+        else:
+            data = json.load(handle)
+
+    if not isinstance(data, dict):
+        raise ImproperlyConfigured(f"Catalog file {path} must contain a mapping.")
+    return CatalogRegistry(
+        data.get('activities_by_segment', ACTIVITIES_BY_SEGMENT),
+        data.get('program_recommendations', PROGRAM_RECOMMENDATIONS),
+    )
+
+
+_registry = None
+_registry_source = None
+_registry_lock = threading.Lock()
+
+
+def _catalog_source():
+    path = getattr(settings, 'WORKOUT_CATALOG_PATH', None)
+    if not path:
+        return None
+    return (str(path), os.stat(path).st_mtime_ns)
+
+
+def get_catalog():
+    """The process-wide catalog registry (built-in, or from WORKOUT_CATALOG_PATH)."""
+    global _registry, _registry_source
+    source = _catalog_source()
+    if _registry is None or source != _registry_source:
+        with _registry_lock:
+            if _registry is None or source != _registry_source:
+                if source is None:
+                    _registry = CatalogRegistry(ACTIVITIES_BY_SEGMENT, PROGRAM_RECOMMENDATIONS)
+                else:
+                    _registry = load_catalog_file(source[0])
+                _registry_source = source
+    return _registry
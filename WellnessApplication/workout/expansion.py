@@ -0,0 +1,368 @@
+"""
+Split catalog activities into atomic, timer-friendly units.
+
+Catalog items in `workout/activities.py` are static, so parsing their
+instruction text is done once per distinct item and memoized. Expansion only
+depends on an item's name, description, type and instructions; the
+engagement-adjusted `duration` (applied to copies of catalog items) is
+applied afterwards, so adjusted copies share the cached result. Cached units
+are read-only; `expand_catalog_activity` hands out fresh copies.
+"""
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+
+DURATION_UNIT = r'(?:seconds?|secs?|minutes?|mins?)'
+
+# Activity name cleanup, e.g. "Brisk Walking: 20 Minutes", "5-Min Gentle Stretching"
+NAME_DURATION_PATTERNS = (
+    re.compile(r'\s*[:\-]\s*\d+\s*(?:minutes?|mins?|min)\b', re.IGNORECASE),
+    re.compile(r'\s*\(\s*\d+\s*(?:minutes?|mins?|min)\s*\)', re.IGNORECASE),
+    re.compile(r'\s+\d+\s*(?:minutes?|mins?|min)\b\s*$', re.IGNORECASE),
+    re.compile(r'^\s*\d+\s*[-]?\s*(?:minutes?|mins?|min)\b\s*', re.IGNORECASE),
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Instruction line patterns
+TIMED_STEP_PATTERN = re.compile(
+    r'^(?:[-*]\s*)?(?:\d+[\.)]\s*)?(?P<value>\d+)\s*'
+    r'(?P<unit>' + DURATION_UNIT + r')\s*:\s*(?P<step>.+)$',
+    re.IGNORECASE,
+)
+LABELED_DURATION_PATTERN = re.compile(
+    r'^(?:[-*]\s*)?(?P<label>[A-Za-z][A-Za-z\s\-/]+?)\s*\('
+    r'(?P<value>\d+)\s*(?P<unit>' + DURATION_UNIT + r')\)\s*:\s*(?P<details>.+)$',
+    re.IGNORECASE,
+)
+REPEAT_PATTERN = re.compile(r'repeat\s+(?P<count>\d+)\s+times', re.IGNORECASE)
+MOVEMENT_PATTERN = re.compile(
+    r'^(?:[-*]\s*)?(?:\d+[\.)]\s*)?(?P<label>[A-Za-z][A-Za-z0-9\s\'\-/]+?)\s*:\s*(?P<details>.+)$',
+    re.IGNORECASE,
+)
+REPETITION_PATTERN = re.compile(
+    r'(?P<low>\d+)\s*(?:-\s*(?P<high>\d+))?\s*(?:repetitions?|reps?)\b',
+    re.IGNORECASE,
+)
+HOLD_PATTERN = re.compile(
+    r'hold\s+(?:for\s+)?(?P<value>\d+)\s*(?P<unit>' + DURATION_UNIT + r')\b',
+    re.IGNORECASE,
+)
+DURATION_PATTERN = re.compile(
+    r'(?P<value>\d+)\s*(?P<unit>' + DURATION_UNIT + r')\b',
+    re.IGNORECASE,
+)
+REST_PATTERN = re.compile(
+    r'^(?:[-*]\s*)?(?:\d+[\.)]\s*)?rest(?:\s+for)?\s+(?P<value>\d+)\s*'
+    r'(?P<unit>' + DURATION_UNIT + r')\b(?P<details>.*)$',
+    re.IGNORECASE,
+)
+
+SECTION_PREFIXES = ('tips:', 'safety:', 'benefits:', 'goal:')
+
+
+def safe_duration_minutes(value):
+    """Convert duration values to a positive integer minute value."""
+    try:
+        return max(1, int(round(float(value))))
+    except (TypeError, ValueError):
+        return 10
+
+
+def normalize_activity_type(value):
+    """Normalize catalog activity type to Activity model choices."""
+    return 'exercise' if str(value).lower() == 'exercise' else 'meditation'
+
+
+def compact_whitespace(text):
+    return WHITESPACE_PATTERN.sub(' ', str(text or '')).strip()
+
+
+def duration_parts_to_seconds(amount, unit):
+    """Convert parsed duration pieces (e.g., 30 + seconds) into seconds."""
+    quantity = max(1, int(amount))
+    unit_text = str(unit or '').lower()
+    if unit_text.startswith('min'):
+        return quantity * 60
+    return quantity
+
+
+def estimate_repetition_seconds(low_reps, high_reps=None):
+    """Estimate step duration from repetition counts when no timer is provided."""
+    low = max(1, int(low_reps))
+    high = max(low, int(high_reps)) if high_reps is not None else low
+    average_reps = round((low + high) / 2)
+    # Controlled bodyweight tempo: around 4 seconds per repetition.
+    return min(180, max(20, average_reps * 4))
+
+
+def strip_duration_from_name(name):
+    """Remove duration markers from activity names (duration stays in dedicated fields)."""
+    cleaned = compact_whitespace(name)
+    if not cleaned:
+        return cleaned
+
+    for pattern in NAME_DURATION_PATTERNS:
+        cleaned = pattern.sub('', cleaned)
+
+    cleaned = compact_whitespace(cleaned).strip(':- ')
+    return cleaned or compact_whitespace(name)
+
+
+def build_step_name(parent_name, step_text, prefix=None, round_number=None):
+    """Create a short activity name for an extracted step."""
+    parent_name = strip_duration_from_name(parent_name)
+    label = compact_whitespace(step_text)
+    if '(' in label:
+        label = label.split('(', 1)[0].strip()
+    label = label.rstrip(':').strip()
+    if prefix:
+        label = prefix
+    if not label:
+        label = 'Step'
+
+    name = f"{parent_name} - {label}"
+    if round_number is not None:
+        name = f"{name} (Round {round_number})"
+    return name[:200]
+
+
+def extract_timed_units(parent_name, instructions, allow_rep_steps=False):
+    """Extract timed or repetition-based instruction lines into standalone units."""
+    timed_units = []
+    repeat_count = 1
+    repeat_step_templates = []
+
+    def emit_step(step_name, description, seconds, round_number=None, rounds_total=None):
+        duration_seconds = max(1, int(seconds))
+        line_description = description
+        if round_number is not None and rounds_total is not None:
+            line_description = f"{description} (Round {round_number} of {rounds_total})"
+
+        timed_units.append({
+            'activity_name': build_step_name(parent_name, step_name, round_number=round_number),
+            'description': line_description,
+            'duration_seconds': duration_seconds,
+            'instructions': [line_description],
+        })
+
+    def flush_repeat_templates(reset_repeat=True):
+        nonlocal repeat_step_templates, repeat_count
+
+        if repeat_step_templates:
+            rounds = repeat_count if repeat_count > 1 else 1
+            if rounds > 1:
+                for round_number in range(1, rounds + 1):
+                    for template in repeat_step_templates:
+                        emit_step(
+                            template['step_name'],
+                            template['description'],
+                            template['seconds'],
+                            round_number=round_number,
+                            rounds_total=rounds,
+                        )
+            else:
+                for template in repeat_step_templates:
+                    emit_step(
+                        template['step_name'],
+                        template['description'],
+                        template['seconds'],
+                    )
+
+            repeat_step_templates = []
+
+        if reset_repeat:
+            repeat_count = 1
+
+    def append_step(step_name, description, seconds, force_single=False):
+        nonlocal repeat_step_templates
+
+        if force_single:
+            flush_repeat_templates()
+            emit_step(step_name, description, seconds)
+            return
+
+        if repeat_count > 1:
+            repeat_step_templates.append({
+                'step_name': step_name,
+                'description': description,
+                'seconds': max(1, int(seconds)),
+            })
+            return
+
+        emit_step(step_name, description, seconds)
+
+    for raw_line in instructions:
+        line = compact_whitespace(raw_line)
+        if not line:
+            continue
+
+        repeat_match = REPEAT_PATTERN.search(line)
+        if repeat_match:
+            flush_repeat_templates(reset_repeat=False)
+            repeat_count = max(1, int(repeat_match.group('count')))
+            continue
+
+        if line.lower().startswith(SECTION_PREFIXES):
+            flush_repeat_templates()
+            continue
+
+        labeled_match = LABELED_DURATION_PATTERN.match(line)
+        if labeled_match:
+            label = compact_whitespace(labeled_match.group('label')).title()
+            details = compact_whitespace(labeled_match.group('details'))
+            seconds = duration_parts_to_seconds(
+                labeled_match.group('value'),
+                labeled_match.group('unit'),
+            )
+            append_step(label, details or label, seconds, force_single=True)
+            continue
+
+        timed_match = TIMED_STEP_PATTERN.match(line)
+        if timed_match:
+            seconds = duration_parts_to_seconds(
+                timed_match.group('value'),
+                timed_match.group('unit'),
+            )
+            step = compact_whitespace(timed_match.group('step'))
+            append_step(step, step, seconds)
+            continue
+
+        if allow_rep_steps:
+            movement_match = MOVEMENT_PATTERN.match(line)
+            if movement_match:
+                label = compact_whitespace(movement_match.group('label')).rstrip(':')
+                details = compact_whitespace(movement_match.group('details'))
+
+                seconds = None
+                hold_match = HOLD_PATTERN.search(details)
+                if hold_match:
+                    seconds = duration_parts_to_seconds(
+                        hold_match.group('value'),
+                        hold_match.group('unit'),
+                    )
+
+                if seconds is None:
+                    reps_match = REPETITION_PATTERN.search(details)
+                    if reps_match:
+                        seconds = estimate_repetition_seconds(
+                            reps_match.group('low'),
+                            reps_match.group('high'),
+                        )
+
+                if seconds is None and label.lower().startswith('rest'):
+                    rest_duration_match = DURATION_PATTERN.search(details)
+                    if rest_duration_match:
+                        seconds = duration_parts_to_seconds(
+                            rest_duration_match.group('value'),
+                            rest_duration_match.group('unit'),
+                        )
+
+                if seconds is not None:
+                    append_step(label, f"{label}: {details}", seconds)
+                    continue
+
+            rest_match = REST_PATTERN.match(line)
+            if rest_match:
+                rest_text = f"Rest for {rest_match.group('value')} {rest_match.group('unit')}"
+                rest_details = compact_whitespace(rest_match.group('details'))
+                if rest_details:
+                    rest_text = f"{rest_text} {rest_details}".strip()
+
+                seconds = duration_parts_to_seconds(
+                    rest_match.group('value'),
+                    rest_match.group('unit'),
+                )
+                append_step('Rest', rest_text, seconds)
+                continue
+
+        line_lower = line.lower()
+        if 'cool-down' in line_lower or 'cool down' in line_lower or line_lower.startswith('total:'):
+            flush_repeat_templates()
+
+    flush_repeat_templates()
+    return timed_units
+
+
+def _freeze_unit(unit):
+    return MappingProxyType({**unit, 'instructions': tuple(unit['instructions'])})
+
+
+def _parse_catalog_activity(name, description, activity_type, instructions):
+    """
+    Duration-independent expansion of one catalog activity.
+
+    Returns (parent_name, parent_description, timed_units) with read-only
+    units; `timed_units` is empty when the instructions have no timed steps.
+    """
+    parent_name = strip_duration_from_name(name) or 'Unnamed Activity'
+    parent_description = compact_whitespace(description)
+
+    timed_units = extract_timed_units(
+        parent_name,
+        instructions,
+        allow_rep_steps=normalize_activity_type(activity_type) == 'exercise',
+    )
+    frozen = tuple(
+        _freeze_unit({
+            'activity_name': unit.get('activity_name', parent_name)[:200],
+            'description': unit.get('description') or parent_description,
+            'duration_seconds': max(1, int(unit['duration_seconds'])),
+            'instructions': unit.get('instructions') or list(instructions),
+        })
+        for unit in timed_units
+    )
+    return parent_name, parent_description, frozen
+
+
+_parse_cached = lru_cache(maxsize=512)(_parse_catalog_activity)
+
+
+def _item_instructions(item):
+    instructions = item.get('instructions', [])
+    if isinstance(instructions, tuple):
+        # Frozen catalog items (see workout.catalog)
+        return list(instructions)
+    if not isinstance(instructions, list):
+        instructions = [str(instructions)] if instructions else []
+    return instructions
+
+
+def expand_catalog_activity(item):
+    """
+    Split one catalog activity into atomic timer-friendly units when possible.
+
+    Returns a list of new unit dicts (activity_name, description,
+    duration_seconds, duration_minutes, instructions). Items without timed
+    steps become a single unit lasting the item's `duration` minutes.
+    """
+    instructions = _item_instructions(item)
+    key = (item.get('name', 'Unnamed Activity'), item.get('description', ''), item.get('type'))
+    try:
+        parent_name, parent_description, timed_units = _parse_cached(*key, tuple(instructions))
+    except TypeError:
+        # Unhashable instruction entries; parse without caching.
+        parent_name, parent_description, timed_units = _parse_catalog_activity(*key, instructions)
+
+    if not timed_units:
+        default_seconds = safe_duration_minutes(item.get('duration')) * 60
+        return [{
+            'activity_name': parent_name,
+            'description': parent_description,
+            'duration_seconds': default_seconds,
+            'duration_minutes': max(1, (default_seconds + 59) // 60),
+            'instructions': list(instructions),
+        }]
+
+    return [
+        {
+            **unit,
+            'duration_minutes': max(1, (unit['duration_seconds'] + 59) // 60),
+            'instructions': list(unit['instructions']),
+        }
+        for unit in timed_units
+    ]
+
+
+def clear_expansion_cache():
+    _parse_cached.cache_clear()
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from workout.catalog import get_catalog
+from workout.expansion import clear_expansion_cache, expand_catalog_activity
+
+
+class Command(BaseCommand):
+    help = "Measure catalog expansion throughput over the whole activity catalog, uncached and memoized."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--passes",
+            type=int,
+            default=200,
+            help="Full passes over the catalog per mode.",
+        )
+
+    def handle(self, *args, **options):
+        passes = options["passes"]
+        if passes <= 0:
+            raise CommandError("--passes must be greater than zero.")
+
+        items = get_catalog().items()
+        units = sum(len(expand_catalog_activity(item)) for item in items)
+
+        uncached = self._time(items, passes, clear_cache=True)
+        clear_expansion_cache()
+        memoized = self._time(items, passes, clear_cache=False)
+
+        self.stdout.write(f"Catalog: {len(items)} items, {units} expanded units")
+        self.stdout.write(f"{'mode':<10}{'ms/pass':>10}{'units/s':>14}")
+        for label, seconds in (("uncached", uncached), ("memoized", memoized)):
+            per_pass = seconds / passes
+            self.stdout.write(f"{label:<10}{per_pass * 1000:>10.3f}{units / per_pass:>14,.0f}")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {uncached / memoized:.1f}x"))
+
+    def _time(self, items, passes, clear_cache):
+        started = time.perf_counter()
+        for _ in range(passes):
+            if clear_cache:
+                clear_expansion_cache()
+            for item in items:
+                expand_catalog_activity(item)
+        return time.perf_counter() - started
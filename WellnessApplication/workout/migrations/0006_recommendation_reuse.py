@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0005_activity_duration_seconds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('generated', models.PositiveIntegerField(default=0)),
+                ('reused', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Recommendation Daily Stats',
+                'verbose_name_plural': 'Recommendation Daily Stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='program',
+            index=models.Index(fields=['user', 'created_at', 'program_type'], name='program_user_day_type_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0006_recommendation_reuse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='program',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='program_user_created_idx'),
+        ),
+    ]
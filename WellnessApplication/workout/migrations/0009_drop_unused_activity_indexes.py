@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0008_activity_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='activity',
+            name='activity_user_type_done_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='activity',
+            name='activity_done_date_idx',
+        ),
+    ]
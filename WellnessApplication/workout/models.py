@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from api.models import CustomUser
 
@@ -32,11 +33,64 @@ class Program(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Today's programs for a user (recommendation reuse)
+            models.Index(fields=['user', 'created_at', 'program_type'], name='program_user_day_type_idx'),
+            # Keyset pagination of a user's programs (ProgramPagination)
+            models.Index(fields=['user', '-created_at', 'id'], name='program_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_program_type_display()} - {self.name} ({self.user_id})"
 
 
+class RecommendationDailyStats(models.Model):
+    """
+    Per-day counters for GET /workout/activity/recommended/: how many requests
+    generated new programs and how many reused today's unfinished ones.
+    """
+    date      = models.DateField(unique=True)
+    generated = models.PositiveIntegerField(default=0)
+    reused    = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = 'Recommendation Daily Stats'
+        verbose_name_plural = 'Recommendation Daily Stats'
+
+    def __str__(self):
+        return f"Recommendations {self.date}: {self.generated} generated, {self.reused} reused"
+
+    @property
+    def reuse_ratio(self):
+        """Cache hits per generation (reused / generated)."""
+        if self.generated == 0:
+            return float(self.reused)
+        return round(self.reused / self.generated, 2)
+
+    @classmethod
+    def record(cls, field):
+        """
+        Increment today's `generated` or `reused` counter once the surrounding
+        transaction commits (immediately in autocommit mode). Every request
+        bumps the same row, so holding its lock until the request's
+        transaction ends would serialize them.
+        """
+        transaction.on_commit(lambda: cls._increment(field))
+
+    @classmethod
+    def _increment(cls, field):
+        today = timezone.localdate()
+        if cls.objects.filter(date=today).update(**{field: models.F(field) + 1}):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(date=today, **{field: 1})
+        except IntegrityError:
+            # Another request created today's row first.
+            cls.objects.filter(date=today).update(**{field: models.F(field) + 1})
+
+
 class Activity(models.Model):
     ACTIVITY_TYPES = [
         ('exercise', 'Exercise'),
@@ -114,6 +168,22 @@ class Activity(models.Model):
         ordering = ['-assigned_date']
         verbose_name = 'Activity'
         verbose_name_plural = 'Activities'
+        # Filter on completion_date with ranges, not __date lookups, so these apply.
+        # Completion indexes are partial on `completed`, which Django renders as a
+        # bare boolean term that a composite index could not use as an equality.
+        # workout/tests.py::ActivityQueryPlanTests checks the hot queries use them.
+        indexes = [
+            # Completed activities in a window: statistics signals, daily rollup rebuilds, recent completions
+            models.Index(
+                fields=['user', 'completion_date'],
+                condition=models.Q(completed=True),
+                name='activity_user_done_idx',
+            ),
+            # Latest activities regardless of state: recent engagement
+            models.Index(fields=['user', '-completion_date'], name='activity_user_recent_idx'),
+            # Activities assigned in a statistics period
+            models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.activity_name} - {self.user.username}"
@@ -186,6 +256,10 @@ class WorkoutSession(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Sessions in a statistics period
+            models.Index(fields=['user', 'created_at'], name='session_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - Session {self.created_at.date()}"
@@ -0,0 +1,173 @@
+"""
+Baseline Program Recommendations for Each Wellness Segment
+
+Physical and mental program templates from Table 4.1 in the report, keyed by
+user segment name. The RL agent adapts these per user.
+"""
+
+PROGRAM_RECOMMENDATIONS = {
+    "Older High Stress Exhausted": {
+        "physical_program": {
+            "name": "Light Yoga & Stretching Program",
+            "description": "Gentle movements to build activity habits",
+            "exercises": [
+                "Basic stretching routine",
+                "Light yoga poses (Child's pose, Cat-cow, Mountain pose)",
+                "Breathing-focused movements"
+            ],
+            "duration": "20-25 minutes",
+            "frequency": "2-3 times per week",
+            "intensity": "Low",
+            "progression": "Start with 2 days, gradually increase to 3"
+        },
+        "mental_program": {
+            "name": "Daily Mindfulness & Breathing",
+            "description": "Structured anxiety reduction through meditation",
+            "activities": [
+                "Guided meditation sessions",
+                "Deep breathing exercises (4-7-8 technique)",
+                "Progressive muscle relaxation"
+            ],
+            "duration": "10-15 minutes daily",
+            "frequency": "Daily",
+            "focus": "Anxiety reduction and stress management"
+        },
+        "reminders": [
+            "Gentle evening meditation reminder",
+            "Morning breathing exercise prompt",
+            "Weekly progress check-in"
+        ]
+    },
+
+    "Working Professional Sedentary Stable": {
+        "physical_program": {
+            "name": "Walk + Bodyweight Training",
+            "description": "Balanced approach combining cardio and strength",
+            "exercises": [
+                "Brisk walking (20-30 minutes)",
+                "Bodyweight exercises (push-ups, squats, planks)",
+                "Light resistance movements"
+            ],
+            "duration": "30-40 minutes",
+            "frequency": "3-4 times per week",
+            "intensity": "Moderate",
+            "progression": "Increase duration and add more bodyweight exercises"
+        },
+        "mental_program": {
+            "name": "CBT-based Journaling + Mindfulness",
+            "description": "Cognitive behavioral techniques with mindfulness",
+            "activities": [
+                "Daily mood and thought journaling",
+                "Weekly structured mindfulness sessions",
+                "Gratitude practice"
+            ],
+            "duration": "15-20 minutes",
+            "frequency": "Daily journaling, 2-3x weekly meditation",
+            "focus": "Thought pattern awareness and emotional regulation"
+        },
+        "reminders": [
+            "Evening journaling prompt",
+            "Mid-week mindfulness session",
+            "Progress celebration messages"
+        ]
+    },
+
+    "Young High Stress Active Social": {
+        "physical_program": {
+            "name": "Personalized Strength & Cardio Training",
+            "description": "Advanced training for active individuals",
+            "exercises": [
+                "Structured strength training routines",
+                "High-intensity cardio sessions",
+                "Sport-specific movements"
+            ],
+            "duration": "45-60 minutes",
+            "frequency": "5-6 times per week",
+            "intensity": "High",
+            "progression": "Progressive overload and periodization"
+        },
+        "mental_program": {
+            "name": "Light Breathing & Productivity Planning",
+            "description": "Minimal mental health maintenance for balanced individuals",
+            "activities": [
+                "Quick breathing exercises",
+                "Weekly goal setting sessions",
+                "Performance mindfulness"
+            ],
+            "duration": "5-10 minutes",
+            "frequency": "As needed",
+            "focus": "Performance optimization and stress prevention"
+        },
+        "reminders": [
+            "Pre-workout breathing exercise",
+            "Weekly goal review",
+            "Recovery day reminders"
+        ]
+    },
+
+    "Mid Life Low Stress Depressed": {
+        "physical_program": {
+            "name": "Beginner Bodyweight & Cardio",
+            "description": "Health-focused gradual fitness improvement",
+            "exercises": [
+                "Low-impact cardio (walking, swimming)",
+                "Basic bodyweight movements",
+                "Flexibility and mobility work"
+            ],
+            "duration": "20-30 minutes",
+            "frequency": "3-5 times per week",
+            "intensity": "Low to moderate",
+            "progression": "Very gradual increase in duration and intensity"
+        },
+        "mental_program": {
+            "name": "Motivation & Habit Tracking",
+            "description": "Building sustainable healthy habits",
+            "activities": [
+                "Daily habit tracking",
+                "Motivational content delivery",
+                "Short breathing routines"
+            ],
+            "duration": "10-15 minutes",
+            "frequency": "Daily tracking, 3x weekly breathing",
+            "focus": "Habit formation and motivation maintenance"
+        },
+        "reminders": [
+            "Daily habit check-in",
+            "Motivational quotes",
+            "Health milestone celebrations"
+        ]
+    },
+
+    "Mid Life Thriving Wellness Seeker": {
+        "physical_program": {
+            "name": "Balanced Yoga + Cardio + Strength",
+            "description": "Holistic approach to physical wellness",
+            "exercises": [
+                "Vinyasa yoga flows",
+                "Moderate cardio sessions",
+                "Functional strength training"
+            ],
+            "duration": "35-45 minutes",
+            "frequency": "4-5 times per week",
+            "intensity": "Moderate",
+            "progression": "Balanced progression across all fitness domains"
+        },
+        "mental_program": {
+            "name": "Journaling + Meditation + Gratitude",
+            "description": "Comprehensive mental wellness approach",
+            "activities": [
+                "Daily gratitude journaling",
+                "Guided meditation sessions",
+                "Weekly reflection practices"
+            ],
+            "duration": "20-25 minutes",
+            "frequency": "Daily",
+            "focus": "Holistic mental wellness and personal growth"
+        },
+        "reminders": [
+            "Morning gratitude prompt",
+            "Evening meditation reminder",
+            "Weekly wellness check-in"
+        ]
+    }
+}
@@ -2,7 +2,9 @@
 Serializers for workout app API endpoints.
 Used for request/response documentation and validation.
 """
+from django.db.models import Count, Q
 from rest_framework import serializers
+from api.listing import SparseFieldsetMixin
 from workout.models import Program, Activity, WorkoutSession
 
 
@@ -46,8 +48,10 @@ class ProgramActivitySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class ProgramSerializer(serializers.ModelSerializer):
-    """Program payload with contained activities."""
+class ProgramSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Program payload with contained activities (see api.listing for ?fields=/?expand=)."""
+    expandable_fields = ('activities',)
+
     program_id = serializers.IntegerField(source='id', read_only=True, help_text="Program ID")
     activities = ProgramActivitySerializer(many=True, read_only=True)
     total_activities = serializers.SerializerMethodField(help_text="Total activities in this program")
@@ -65,19 +69,46 @@ class ProgramSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # {program pk: (total, completed)}, so the three count fields share one lookup.
+        self._activity_counts_cache = {}
+
     def get_total_activities(self, obj):
-        return obj.activities.count()
+        return self._activity_counts(obj)[0]
 
     def get_completed_activities(self, obj):
-        return obj.activities.filter(completed=True).count()
+        return self._activity_counts(obj)[1]
 
     def get_completion_rate(self, obj):
-        total = obj.activities.count()
+        total, done = self._activity_counts(obj)
         if total == 0:
             return 0.0
-        done = obj.activities.filter(completed=True).count()
         return round(done / total, 2)
 
+    def _activity_counts(self, obj):
+        """
+        (total, completed) activities, from `total_activities_count` /
+        `completed_activities_count` annotations or the prefetched activities
+        when available, otherwise from one aggregate query.
+        """
+        cache = self._activity_counts_cache
+        if obj.pk in cache:
+            return cache[obj.pk]
+        if hasattr(obj, 'total_activities_count'):
+            counts = (obj.total_activities_count, obj.completed_activities_count)
+        elif 'activities' in getattr(obj, '_prefetched_objects_cache', {}):
+            activities = obj.activities.all()
+            counts = (len(activities), sum(1 for activity in activities if activity.completed))
+        else:
+            totals = obj.activities.aggregate(
+                total=Count('id'),
+                done=Count('id', filter=Q(completed=True)),
+            )
+            counts = (totals['total'], totals['done'])
+        cache[obj.pk] = counts
+        return counts
+
 
 class RecommendedProgramsResponseSerializer(serializers.Serializer):
     """Response for GET /workout/activity/recommended/ with persisted programs."""
@@ -86,6 +117,7 @@ class RecommendedProgramsResponseSerializer(serializers.Serializer):
     physical_program = ProgramSerializer(help_text="Persisted physical program")
     mental_program = ProgramSerializer(help_text="Persisted mental program")
     total_activities = serializers.IntegerField(help_text="Number of created activities")
+    reused = serializers.BooleanField(help_text="True when today's unfinished programs were returned instead of new ones")
     user_engagement = serializers.FloatField(help_text="Current user engagement score (0-1)")
     user_motivation = serializers.IntegerField(help_text="Current user motivation score (1-5)")
 
@@ -267,7 +299,11 @@ class RLTrainingInfoSerializer(serializers.Serializer):
     """RL agent training information"""
     action_trained = serializers.IntegerField(help_text="Action that was trained")
     reward_signal = serializers.FloatField(help_text="Reward calculated from feedback")
-    q_value_updated = serializers.BooleanField(help_text="Whether Q-table was updated")
+    q_value_updated = serializers.BooleanField(help_text="Whether Q-table was updated during this request")
+    transition_queued = serializers.BooleanField(
+        required=False,
+        help_text="Whether the feedback was queued for the train_rl_agent job",
+    )
     epsilon_current = serializers.FloatField(help_text="Current exploration rate")
     total_episodes = serializers.IntegerField(help_text="Total training episodes")
     total_reward = serializers.FloatField(help_text="Cumulative reward")
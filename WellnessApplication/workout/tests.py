@@ -1,14 +1,27 @@
 from django.test import SimpleTestCase
 from django.contrib.auth import get_user_model
 from django.test import override_settings
-from unittest.mock import MagicMock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from workout.views import RecommendedActivitiesView
-from workout.views import ActivityFeedbackBatchView
-from workout.models import Program, Activity, WorkoutSession
+import json
+import os
+import tempfile
+
+from workout import expansion
+from workout.catalog import CatalogRegistry, get_catalog
+from workout.expansion import clear_expansion_cache
+from workout.views import RecommendProgram, RecommendedActivitiesView
+from workout.models import Program, Activity, RecommendationDailyStats, WorkoutSession
+from api import signals as statistics_signals
+from api.models import RLTransition, UserStatistics
 
 
 class ActivityExpansionTests(SimpleTestCase):
@@ -97,6 +110,90 @@ class ActivityExpansionTests(SimpleTestCase):
 		self.assertEqual(len(units), 1)
 		self.assertEqual(units[0]["activity_name"], "Gentle Stretching")
 
+	def test_expansion_is_parsed_once_for_adjusted_copies(self):
+		item = {
+			"name": "Plank Series",
+			"type": "exercise",
+			"duration": 10,
+			"description": "Core hold",
+			"instructions": ["1. Plank: Hold for 30 seconds", "2. Side plank: Hold for 20 seconds"],
+		}
+		clear_expansion_cache()
+
+		first = self.view._expand_catalog_activity(item)
+		first[0]["instructions"].append("mutated")
+		adjusted = self.view._expand_catalog_activity(dict(item, duration=12))
+
+		self.assertEqual(expansion._parse_cached.cache_info().misses, 1)
+		self.assertEqual(expansion._parse_cached.cache_info().hits, 1)
+		self.assertEqual(adjusted[0]["instructions"], ["Plank: Hold for 30 seconds"])
+
+	def test_single_row_fallback_uses_adjusted_duration(self):
+		item = {"name": "Journaling", "type": "meditation", "duration": 10, "instructions": ["Write freely"]}
+
+		self.view._expand_catalog_activity(item)
+		units = self.view._expand_catalog_activity(dict(item, duration=12))
+
+		self.assertEqual(units[0]["duration_seconds"], 720)
+
+
+class CatalogRegistryTests(SimpleTestCase):
+	def _item(self, name, activity_type, intensity="Low", duration=5):
+		return {"name": name, "type": activity_type, "intensity": intensity, "duration": duration, "instructions": []}
+
+	def test_indexes_and_session_pool(self):
+		catalog = CatalogRegistry(
+			{
+				"Calm": {
+					"physical": [self._item("Walk", "exercise"), self._item("Run", "exercise", "High", 20)],
+					"mental": [self._item("Breathe", "meditation"), self._item("Journal", "journaling")],
+				},
+			},
+			{},
+		)
+
+		self.assertEqual([item["name"] for item in catalog.by_intensity("Calm", "High")], ["Run"])
+		self.assertEqual([item["name"] for item in catalog.by_duration("Calm", 5)], ["Walk", "Breathe", "Journal"])
+		self.assertEqual([item["name"] for item in catalog.by_type("Calm", "journaling")], ["Journal"])
+		self.assertEqual([item["name"] for item in catalog.mental_activities("Calm", include_journaling=False)], ["Breathe"])
+		# Only one meditation, so journaling templates stay in the session pool.
+		physical, mental = catalog.session_pool("Calm")
+		self.assertEqual(len(physical), 2)
+		self.assertEqual([item["name"] for item in mental], ["Breathe", "Journal"])
+		self.assertEqual(catalog.session_pool("Unknown"), ((), ()))
+
+		with self.assertRaises(TypeError):
+			catalog.activities("Calm", "physical")[0]["name"] = "Sprint"
+
+	def test_adapting_a_program_leaves_the_catalog_untouched(self):
+		view = RecommendProgram()
+		base = view.program_recommendations["Mid Life Thriving Wellness Seeker"]
+
+		adapted = view.adapt_program_with_rl_action(base, 4)
+
+		self.assertIn("Structured journaling for reflection", adapted["mental_program"]["activities"])
+		self.assertNotIn("Structured journaling for reflection", base["mental_program"]["activities"])
+
+	def test_catalog_file_is_loaded_and_reloaded_on_change(self):
+		handle, path = tempfile.mkstemp(suffix=".json")
+		os.close(handle)
+		self.addCleanup(os.remove, path)
+
+		def write(name, mtime):
+			with open(path, "w") as catalog_file:
+				json.dump({"activities_by_segment": {"Calm": {"physical": [self._item(name, "exercise")]}}}, catalog_file)
+			os.utime(path, ns=(mtime, mtime))
+
+		write("Walk", 1_000_000_000)
+		with override_settings(WORKOUT_CATALOG_PATH=path):
+			self.assertEqual(get_catalog().activities("Calm", "physical")[0]["name"], "Walk")
+			self.assertIn("Older High Stress Exhausted", get_catalog().program_recommendations)
+
+			write("Swim", 2_000_000_000)
+			self.assertEqual(get_catalog().activities("Calm", "physical")[0]["name"], "Swim")
+
+		self.assertEqual(get_catalog().activities("Calm", "physical"), ())
+
 
 @override_settings(ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'])
 class ActivityCompletionEndpointTests(APITestCase):
@@ -159,7 +256,9 @@ class RecommendationPrivacyEndpointTests(APITestCase):
 		mock_agent = MagicMock()
 		mock_agent.select_action.return_value = 5
 		mock_agent.adjust_activity_difficulty.side_effect = lambda activity, *_: activity
-		RecommendedActivitiesView.rl_agent = mock_agent
+		agent_patch = patch("workout.views.get_shared_agent", return_value=mock_agent)
+		agent_patch.start()
+		self.addCleanup(agent_patch.stop)
 
 		self.client.force_authenticate(user=self.user)
 
@@ -224,14 +323,16 @@ class ProgramFeedbackEndpointTests(APITestCase):
 			instructions=["Do sit-ups"],
 		)
 
-		ActivityFeedbackBatchView.rl_agent = MagicMock()
-		ActivityFeedbackBatchView.rl_agent.epsilon = 0.2
-		ActivityFeedbackBatchView.rl_agent.training_history = {
+		self.rl_agent = MagicMock()
+		self.rl_agent.epsilon = 0.2
+		self.rl_agent.training_history = {
 			"episodes": 10,
 			"total_reward": 5.5,
 		}
-		ActivityFeedbackBatchView.rl_agent.recommend_activity_modifications.return_value = []
-		ActivityFeedbackBatchView.rl_model_manager = MagicMock()
+		self.rl_agent.recommend_activity_modifications.return_value = []
+		agent_patch = patch("workout.views.get_shared_agent", return_value=self.rl_agent)
+		agent_patch.start()
+		self.addCleanup(agent_patch.stop)
 
 		self.client.force_authenticate(user=self.user)
 
@@ -262,5 +363,276 @@ class ProgramFeedbackEndpointTests(APITestCase):
 		self.assertTrue(self.program.completed)
 
 		self.assertEqual(WorkoutSession.objects.filter(user=self.user).count(), 1)
-		self.assertTrue(ActivityFeedbackBatchView.rl_agent.update_q_value.called)
-		self.assertTrue(ActivityFeedbackBatchView.rl_model_manager.save_agent.called)
+		transition = RLTransition.objects.get(user=self.user)
+		self.assertEqual(transition.source, RLTransition.Source.SESSION_FEEDBACK)
+		self.assertEqual(transition.reward, response.data["rl_training"]["reward_signal"])
+		self.assertTrue(response.data["rl_training"]["transition_queued"])
+		self.assertFalse(self.rl_agent.update_q_value.called)
+
+	def test_program_feedback_refreshes_statistics_once(self):
+		refresh = patch(
+			"api.signals._update_user_statistics",
+			wraps=statistics_signals._update_user_statistics,
+		)
+		with refresh as update_statistics, self.captureOnCommitCallbacks(execute=True):
+			response = self.client.post(
+				f"/api/workout/programs/{self.program.id}/feedback/",
+				{"completed": True, "motivation": 4, "overall_session_rating": 4},
+				format="json",
+			)
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED, getattr(response, "data", None))
+		self.assertEqual(update_statistics.call_count, 1)
+
+		stats = UserStatistics.objects.get(user=self.user)
+		self.assertEqual(stats.total_activities_completed, 2)
+		self.assertEqual(stats.total_activities_assigned, 2)
+		self.assertEqual(stats.current_streak_days, 1)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'])
+class RecommendedProgramMaterializationTests(APITestCase):
+	def setUp(self):
+		user_model = get_user_model()
+		self.user = user_model.objects.create_user(
+			username="materialization-user",
+			email="materialization@example.com",
+			password="testpass123",
+		)
+
+		mock_agent = MagicMock()
+		mock_agent.select_action.return_value = 5
+		mock_agent.adjust_activity_difficulty.side_effect = lambda activity, *_: activity
+		agent_patch = patch("workout.views.get_shared_agent", return_value=mock_agent)
+		agent_patch.start()
+		self.addCleanup(agent_patch.stop)
+
+		self.client.force_authenticate(user=self.user)
+
+	def _units(self, count):
+		return [
+			{
+				"activity_name": f"Step {index}",
+				"description": "Timed step",
+				"duration_seconds": 45,
+				"duration_minutes": 1,
+				"instructions": [f"Step {index}"],
+			}
+			for index in range(count)
+		]
+
+	def _recommend(self, units_per_item):
+		expand = patch.object(
+			RecommendedActivitiesView,
+			"_expand_catalog_activity",
+			side_effect=lambda item: self._units(units_per_item),
+		)
+		with expand, CaptureQueriesContext(connection) as queries:
+			response = self.client.get("/api/workout/activity/recommended/?regenerate=true")
+		self.assertEqual(response.status_code, status.HTTP_200_OK, getattr(response, "data", None))
+		return response, len(queries)
+
+	def test_query_count_does_not_grow_with_units(self):
+		self._recommend(1)  # seeds the statistics row
+
+		small, small_queries = self._recommend(2)
+		large, large_queries = self._recommend(12)
+
+		self.assertEqual(small_queries, large_queries)
+		self.assertEqual(
+			len(large.data["physical_program"]["activities"]) + len(large.data["mental_program"]["activities"]),
+			large.data["total_activities"],
+		)
+		self.assertGreater(large.data["total_activities"], small.data["total_activities"])
+
+		program = Program.objects.get(pk=large.data["physical_program"]["id"])
+		self.assertEqual(program.duration, f"{(program.activities.count() * 45 + 59) // 60} minutes")
+
+		stats = UserStatistics.objects.get(user=self.user)
+		self.assertEqual(stats.total_activities_assigned, Activity.objects.filter(user=self.user).count())
+
+	def test_failed_recommendation_is_rolled_back(self):
+		failing = patch.object(RecommendedActivitiesView, "_create_program_activities", side_effect=RuntimeError("boom"))
+		with failing:
+			response = self.client.get("/api/workout/activity/recommended/")
+
+		self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+		self.assertFalse(Program.objects.filter(user=self.user).exists())
+
+	def test_same_day_request_reuses_unfinished_programs(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			first = self.client.get("/api/workout/activity/recommended/")
+		with self.captureOnCommitCallbacks(execute=True) as callbacks:
+			with CaptureQueriesContext(connection) as queries:
+				second = self.client.get("/api/workout/activity/recommended/")
+
+		self.assertFalse(first.data["reused"])
+		self.assertTrue(second.data["reused"])
+		self.assertEqual(second.data["physical_program"]["id"], first.data["physical_program"]["id"])
+		self.assertEqual(second.data["total_activities"], first.data["total_activities"])
+		self.assertFalse(any(query["sql"].startswith("INSERT") for query in queries.captured_queries))
+		self.assertFalse(any("recommendationdailystats" in query["sql"] for query in queries.captured_queries))
+		self.assertEqual(len(callbacks), 1)
+		self.assertEqual(Program.objects.filter(user=self.user).count(), 2)
+
+		stats = RecommendationDailyStats.objects.get()
+		self.assertEqual((stats.generated, stats.reused), (1, 1))
+		self.assertEqual(stats.reuse_ratio, 1.0)
+
+	def test_regenerate_or_finished_program_creates_new_programs(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			first = self.client.get("/api/workout/activity/recommended/")
+			regenerated = self.client.get("/api/workout/activity/recommended/?regenerate=true")
+		self.assertFalse(regenerated.data["reused"])
+		self.assertNotEqual(regenerated.data["physical_program"]["id"], first.data["physical_program"]["id"])
+
+		Program.objects.filter(pk=regenerated.data["mental_program"]["id"]).update(completed=True)
+		with self.captureOnCommitCallbacks(execute=True):
+			after_completion = self.client.get("/api/workout/activity/recommended/")
+
+		self.assertFalse(after_completion.data["reused"])
+		self.assertEqual(Program.objects.filter(user=self.user).count(), 6)
+		self.assertEqual(RecommendationDailyStats.objects.get().generated, 3)
+
+
+class ProgramListQueryBudgetTests(APITestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username="program-list-user",
+			email="program-list@example.com",
+			password="testpass123",
+		)
+		self.client.force_authenticate(user=self.user)
+
+	def _create_programs(self, count):
+		for index in range(count):
+			program = Program.objects.create(
+				user=self.user,
+				program_type=Program.ProgramType.PHYSICAL,
+				name=f"Program {index}",
+				description="Query budget test",
+				duration="10 minutes",
+				frequency="Daily",
+				intensity="Moderate",
+			)
+			for step, completed in enumerate((True, False, False)):
+				Activity.objects.create(
+					user=self.user,
+					program=program,
+					activity_name=f"Step {step}",
+					activity_type="exercise",
+					description="Step",
+					duration_minutes=5,
+					duration_seconds=300,
+					intensity="Moderate",
+					completed=completed,
+				)
+
+	def _list_queries(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get("/api/workout/programs/")
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		return response, len(queries)
+
+	def test_list_query_count_is_constant(self):
+		self._create_programs(2)
+		_, few = self._list_queries()
+
+		self._create_programs(20)
+		response, many = self._list_queries()
+
+		self.assertEqual(few, many)
+		self.assertEqual(response.data["count"], 22)
+		program = response.data["programs"][0]
+		self.assertEqual(program["total_activities"], 3)
+		self.assertEqual(program["completed_activities"], 1)
+		self.assertEqual(program["completion_rate"], 0.33)
+
+	def test_cursor_pages_and_sparse_fields(self):
+		self._create_programs(5)
+
+		names = []
+		url = "/api/workout/programs/?page_size=2&fields=id,name,completion_rate"
+		while url:
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, status.HTTP_200_OK)
+			names.extend(program["name"] for program in response.data["programs"])
+			url = response.data["next"]
+
+		self.assertEqual(sorted(names), sorted(f"Program {index}" for index in range(5)))
+		self.assertEqual(len(set(names)), 5)
+		self.assertEqual(set(response.data["programs"][0]), {"id", "name", "completion_rate"})
+		self.assertEqual(response.data["programs"][0]["completion_rate"], 0.33)
+
+		response = self.client.get("/api/workout/programs/?fields=id&expand=activities")
+		self.assertEqual(len(response.data["programs"][0]["activities"]), 3)
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked with SQLite's EXPLAIN QUERY PLAN")
+class ActivityQueryPlanTests(APITestCase):
+	"""Hot Activity/WorkoutSession/daily rollup queries must search an index, never scan the table."""
+
+	TABLES = ("workout_activity", "workout_workoutsession", "api_userdailyactivity")
+
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username="query-plan-user",
+			email="query-plan@example.com",
+			password="testpass123",
+		)
+		now = timezone.now()
+		for index in range(6):
+			Activity.objects.create(
+				user=self.user,
+				activity_name=f"Step {index}",
+				activity_type="exercise" if index % 2 else "meditation",
+				description="Step",
+				duration_minutes=10,
+				duration_seconds=600,
+				intensity="Moderate",
+				completed=index < 4,
+				completion_date=now - timedelta(days=index) if index < 4 else None,
+			)
+
+	def assertSearchesIndexes(self, run):
+		with CaptureQueriesContext(connection) as queries:
+			run()
+
+		checked = 0
+		for query in queries:
+			sql = query["sql"]
+			if not sql.startswith("SELECT") or not any(f'"{table}"' in sql for table in self.TABLES):
+				continue
+			with connection.cursor() as cursor:
+				cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+				plan = [row[-1] for row in cursor.fetchall()]
+			for line in plan:
+				for table in self.TABLES:
+					self.assertFalse(
+						line.startswith(f"SCAN {table}"),
+						f"Full scan of {table}:\n{sql}\n" + "\n".join(plan),
+					)
+			checked += 1
+		self.assertGreater(checked, 0)
+
+	def test_statistics_refresh_queries(self):
+		self.assertSearchesIndexes(lambda: statistics_signals._update_user_statistics(self.user))
+
+	def test_statistics_endpoint_queries(self):
+		from api.statistics import build_user_statistics
+
+		end = timezone.now()
+		self.assertSearchesIndexes(
+			lambda: build_user_statistics(self.user, "week", end - timedelta(days=7), end)
+		)
+
+	def test_recent_engagement_query(self):
+		self.assertSearchesIndexes(lambda: RecommendedActivitiesView()._get_recent_engagement(self.user))
+
+	def test_notification_rule_queries(self):
+		from notifications import rules
+
+		today = timezone.localdate()
+		self.assertSearchesIndexes(lambda: rules._users_exercised_on([self.user.pk], today))
+		self.assertSearchesIndexes(lambda: rules._weekly_totals([self.user.pk], today - timedelta(days=6), today))
+		self.assertSearchesIndexes(lambda: rules._weekly_totals(None, today - timedelta(days=6), today))
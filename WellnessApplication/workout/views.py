@@ -6,17 +6,24 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
-from django.db.models import Avg, Sum, Count
+from django.db import transaction
+from django.db.models import Avg, Count, Q, prefetch_related_objects
 import re
 import random
+from datetime import datetime, time
 import os
 import sys
 
 # Add parent directory to path to import from api
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from api.rl_agent import WellnessRLAgent, RLModelManager
-from workout.models import Program, Activity, WorkoutSession
-from workout.activities import ACTIVITIES_BY_SEGMENT
+from api.listing import KeysetPagination
+from api.rl_registry import get_shared_agent
+from api.models import RLTransition
+from api.rl_training import record_transition
+from api.signals import activities_bulk_created, deferred_statistics
+from workout.models import Program, Activity, RecommendationDailyStats, WorkoutSession
+from workout.catalog import get_activity_segment_key, get_catalog, thaw
+from workout.expansion import expand_catalog_activity, normalize_activity_type, safe_duration_minutes
 from workout.serializers import (
     RecommendProgramResponseSerializer,
     EngagementFeedbackRequestSerializer,
@@ -32,20 +39,6 @@ from workout.serializers import (
 )
 
 
-SEGMENT_TO_ACTIVITY_KEY = {
-    "Older High Stress Exhausted": "High Anxiety, Low Activity",
-    "Young High Stress Active Social": "Low Anxiety, High Activity",
-    "Mid Life Low Stress Depressed": "Physical Health Risk",
-    "Mid Life Thriving Wellness Seeker": "Moderate Anxiety, Moderate Activity",
-    "Working Professional Sedentary Stable": "Moderate Anxiety, Moderate Activity",
-}
-
-
-def get_activity_segment_key(segment_name):
-    """Map model segment labels to activity-catalog segment keys."""
-    return SEGMENT_TO_ACTIVITY_KEY.get(segment_name, "Moderate Anxiety, Moderate Activity")
-
-
 def safe_int_or_default(value, default, min_value=None, max_value=None):
     """Coerce a value to int while tolerating None/invalid input."""
     try:
@@ -115,186 +108,12 @@ class RecommendProgram(APIView):
     Uses RL agent to adapt recommendations based on user engagement.
     """
     permission_classes = [IsAuthenticated]
-    
-    # RL Agent instance and model manager (class-level for persistence across requests)
-    rl_model_manager = RLModelManager(model_dir='api/models')
-    rl_agent = None
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Load RL agent on first initialization
-        if RecommendProgram.rl_agent is None:
-            RecommendProgram.rl_agent = RecommendProgram.rl_model_manager.load_agent()
-        
-        # Baseline program recommendations from Table 4.1 in the report
-        self.program_recommendations = {
-            "Older High Stress Exhausted": {
-                "physical_program": {
-                    "name": "Light Yoga & Stretching Program",
-                    "description": "Gentle movements to build activity habits",
-                    "exercises": [
-                        "Basic stretching routine",
-                        "Light yoga poses (Child's pose, Cat-cow, Mountain pose)",
-                        "Breathing-focused movements"
-                    ],
-                    "duration": "20-25 minutes",
-                    "frequency": "2-3 times per week",
-                    "intensity": "Low",
-                    "progression": "Start with 2 days, gradually increase to 3"
-                },
-                "mental_program": {
-                    "name": "Daily Mindfulness & Breathing",
-                    "description": "Structured anxiety reduction through meditation",
-                    "activities": [
-                        "Guided meditation sessions",
-                        "Deep breathing exercises (4-7-8 technique)",
-                        "Progressive muscle relaxation"
-                    ],
-                    "duration": "10-15 minutes daily",
-                    "frequency": "Daily",
-                    "focus": "Anxiety reduction and stress management"
-                },
-                "reminders": [
-                    "Gentle evening meditation reminder",
-                    "Morning breathing exercise prompt",
-                    "Weekly progress check-in"
-                ]
-            },
-            
-            "Working Professional Sedentary Stable": {
-                "physical_program": {
-                    "name": "Walk + Bodyweight Training",
-                    "description": "Balanced approach combining cardio and strength",
-                    "exercises": [
-                        "Brisk walking (20-30 minutes)",
-                        "Bodyweight exercises (push-ups, squats, planks)",
-                        "Light resistance movements"
-                    ],
-                    "duration": "30-40 minutes",
-                    "frequency": "3-4 times per week",
-                    "intensity": "Moderate",
-                    "progression": "Increase duration and add more bodyweight exercises"
-                },
-                "mental_program": {
-                    "name": "CBT-based Journaling + Mindfulness",
-                    "description": "Cognitive behavioral techniques with mindfulness",
-                    "activities": [
-                        "Daily mood and thought journaling",
-                        "Weekly structured mindfulness sessions",
-                        "Gratitude practice"
-                    ],
-                    "duration": "15-20 minutes",
-                    "frequency": "Daily journaling, 2-3x weekly meditation",
-                    "focus": "Thought pattern awareness and emotional regulation"
-                },
-                "reminders": [
-                    "Evening journaling prompt",
-                    "Mid-week mindfulness session",
-                    "Progress celebration messages"
-                ]
-            },
-            
-            "Young High Stress Active Social": {
-                "physical_program": {
-                    "name": "Personalized Strength & Cardio Training",
-                    "description": "Advanced training for active individuals",
-                    "exercises": [
-                        "Structured strength training routines",
-                        "High-intensity cardio sessions",
-                        "Sport-specific movements"
-                    ],
-                    "duration": "45-60 minutes",
-                    "frequency": "5-6 times per week",
-                    "intensity": "High",
-                    "progression": "Progressive overload and periodization"
-                },
-                "mental_program": {
-                    "name": "Light Breathing & Productivity Planning",
-                    "description": "Minimal mental health maintenance for balanced individuals",
-                    "activities": [
-                        "Quick breathing exercises",
-                        "Weekly goal setting sessions",
-                        "Performance mindfulness"
-                    ],
-                    "duration": "5-10 minutes",
-                    "frequency": "As needed",
-                    "focus": "Performance optimization and stress prevention"
-                },
-                "reminders": [
-                    "Pre-workout breathing exercise",
-                    "Weekly goal review",
-                    "Recovery day reminders"
-                ]
-            },
-            
-            "Mid Life Low Stress Depressed": {
-                "physical_program": {
-                    "name": "Beginner Bodyweight & Cardio",
-                    "description": "Health-focused gradual fitness improvement",
-                    "exercises": [
-                        "Low-impact cardio (walking, swimming)",
-                        "Basic bodyweight movements",
-                        "Flexibility and mobility work"
-                    ],
-                    "duration": "20-30 minutes",
-                    "frequency": "3-5 times per week",
-                    "intensity": "Low to moderate",
-                    "progression": "Very gradual increase in duration and intensity"
-                },
-                "mental_program": {
-                    "name": "Motivation & Habit Tracking",
-                    "description": "Building sustainable healthy habits",
-                    "activities": [
-                        "Daily habit tracking",
-                        "Motivational content delivery",
-                        "Short breathing routines"
-                    ],
-                    "duration": "10-15 minutes",
-                    "frequency": "Daily tracking, 3x weekly breathing",
-                    "focus": "Habit formation and motivation maintenance"
-                },
-                "reminders": [
-                    "Daily habit check-in",
-                    "Motivational quotes",
-                    "Health milestone celebrations"
-                ]
-            },
-            
-            "Mid Life Thriving Wellness Seeker": {
-                "physical_program": {
-                    "name": "Balanced Yoga + Cardio + Strength",
-                    "description": "Holistic approach to physical wellness",
-                    "exercises": [
-                        "Vinyasa yoga flows",
-                        "Moderate cardio sessions",
-                        "Functional strength training"
-                    ],
-                    "duration": "35-45 minutes",
-                    "frequency": "4-5 times per week",
-                    "intensity": "Moderate",
-                    "progression": "Balanced progression across all fitness domains"
-                },
-                "mental_program": {
-                    "name": "Journaling + Meditation + Gratitude",
-                    "description": "Comprehensive mental wellness approach",
-                    "activities": [
-                        "Daily gratitude journaling",
-                        "Guided meditation sessions",
-                        "Weekly reflection practices"
-                    ],
-                    "duration": "20-25 minutes",
-                    "frequency": "Daily",
-                    "focus": "Holistic mental wellness and personal growth"
-                },
-                "reminders": [
-                    "Morning gratitude prompt",
-                    "Evening meditation reminder",
-                    "Weekly wellness check-in"
-                ]
-            }
-        }
 
+    @property
+    def program_recommendations(self):
+        """Baseline program recommendations from Table 4.1 in the report"""
+        return get_catalog().program_recommendations
+    
     def get_user_state_dict(self, user):
         """
         Extract user state dictionary from user object for RL agent
@@ -348,8 +167,7 @@ class RecommendProgram(APIView):
         """
         Adapt baseline program based on RL agent's recommended action
         """
-        adapted = {k: (v.copy() if isinstance(v, dict) else list(v) if isinstance(v, list) else v) 
-                   for k, v in base_program.items()}
+        adapted = thaw(base_program)
         
         action_names = {
             0: "Increase Workout Intensity (IWI)",
@@ -445,7 +263,18 @@ class RecommendProgram(APIView):
         - Activity IDs
         - Exact timers (`duration_minutes` and `duration_seconds`)
         - Neutral recommendation metadata (policy hidden from client)
+
+        Today's unfinished programs are reused unless `?regenerate=true` is passed.
         """,
+        parameters=[
+            OpenApiParameter(
+                name='regenerate',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="Create new programs even if today's unfinished programs can be reused"
+            )
+        ],
         responses={
             200: RecommendedProgramsResponseSerializer,
             401: OpenApiTypes.OBJECT,
@@ -591,27 +420,27 @@ class RecommendProgram(APIView):
         last_action = user.last_action_recommended if user.last_action_recommended is not None else 5
         
         # Calculate reward
-        reward = RecommendProgram.rl_agent.calculate_reward(user_state_after, last_action)
-        
-        # Update Q-table with feedback
-        RecommendProgram.rl_agent.update_q_value(user_state_before, last_action, reward, user_state_after)
-        RecommendProgram.rl_agent.decay_epsilon()
+        rl_agent = get_shared_agent()
+        reward = rl_agent.calculate_reward(user_state_after, last_action)
         
-        # Save updated agent model
-        RecommendProgram.rl_model_manager.save_agent(RecommendProgram.rl_agent)
+        # Queue the sample; train_rl_agent applies it to the Q-table
+        record_transition(
+            user, RLTransition.Source.RECOMMEND_FEEDBACK,
+            user_state_before, last_action, reward, user_state_after,
+        )
         
         response_data = {
             "status": "success",
-            "message": "Engagement feedback recorded and RL agent updated",
+            "message": "Engagement feedback recorded and queued for RL training",
             "engagement_score": user.engagement_score,
             "motivation_score": user.motivation_score,
             "workouts_completed": user.workouts_completed,
             "meditation_sessions": user.meditation_sessions,
             "rl_reward_signal": reward,
             "agent_training_info": {
-                "total_episodes_trained": RecommendProgram.rl_agent.training_history['episodes'],
-                "current_epsilon": RecommendProgram.rl_agent.epsilon,
-                "total_reward": RecommendProgram.rl_agent.training_history['total_reward']
+                "total_episodes_trained": rl_agent.training_history['episodes'],
+                "current_epsilon": rl_agent.epsilon,
+                "total_reward": rl_agent.training_history['total_reward']
             }
         }
         
@@ -634,7 +463,7 @@ class EngagementFeedback(APIView):
         **This endpoint:**
         - Records your workout/meditation completion
         - Updates your engagement and motivation scores
-        - Trains the RL agent with reward signals
+        - Queues a reward signal for the RL trainer (`train_rl_agent`)
         - Improves future recommendations
         
         **When to use:**
@@ -783,9 +612,7 @@ class EngagementFeedback(APIView):
             'segment': segment
         }
         
-        # Get the RL agent and update
-        rl_model_manager = RLModelManager(model_dir='api/models')
-        rl_agent = rl_model_manager.load_agent()
+        rl_agent = get_shared_agent()
         
         # Get last recommended action
         last_action = user.last_action_recommended if user.last_action_recommended is not None else 5
@@ -793,16 +620,15 @@ class EngagementFeedback(APIView):
         # Calculate reward
         reward = rl_agent.calculate_reward(user_state_after, last_action)
         
-        # Update Q-table
-        rl_agent.update_q_value(user_state_before, last_action, reward, user_state_after)
-        rl_agent.decay_epsilon()
-        
-        # Save updated model
-        rl_model_manager.save_agent(rl_agent)
+        # Queue the sample; train_rl_agent applies it to the Q-table
+        record_transition(
+            user, RLTransition.Source.ENGAGEMENT_FEEDBACK,
+            user_state_before, last_action, reward, user_state_after,
+        )
         
         return Response({
             "status": "success",
-            "message": "Feedback recorded and RL agent updated",
+            "message": "Feedback recorded and queued for RL training",
             "user_metrics": {
                 "engagement_score": user.engagement_score,
                 "motivation_score": user.motivation_score,
@@ -830,13 +656,6 @@ class RecommendedActivitiesView(APIView):
     Activities are selected based on the RL action and adjusted for difficulty based on recent engagement.
     """
     permission_classes = [IsAuthenticated]
-    rl_model_manager = RLModelManager(model_dir='api/models')
-    rl_agent = None
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if RecommendedActivitiesView.rl_agent is None:
-            RecommendedActivitiesView.rl_agent = RecommendedActivitiesView.rl_model_manager.load_agent()
     
     @extend_schema(
         summary="Get Daily Recommended Activities",
@@ -850,6 +669,11 @@ class RecommendedActivitiesView(APIView):
         4. Two persisted programs are created: one physical and one mental
         5. Timed instruction steps are split into standalone activities when possible
         6. Every activity is saved with an ID and linked to its parent program
+
+        **Reuse:** if today's physical and mental programs are both unfinished and
+        were generated for your current RL action, they are returned again
+        (`reused: true`) instead of creating new ones. Pass `?regenerate=true`
+        to always create a new pair.
         
         **Activity Fields:**
         - `duration_seconds`: Explicit timer value for each activity unit
@@ -864,6 +688,15 @@ class RecommendedActivitiesView(APIView):
         2. Submit batch feedback using `/workout/activity/feedback-batch/`
         3. RL agent learns and adapts future recommendations
         """,
+        parameters=[
+            OpenApiParameter(
+                name='regenerate',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="Create new programs even if today's unfinished programs can be reused"
+            )
+        ],
         responses={
             200: RecommendedProgramsResponseSerializer,
             401: OpenApiTypes.OBJECT,
@@ -900,6 +733,7 @@ class RecommendedActivitiesView(APIView):
                         ]
                     },
                     "total_activities": 2,
+                    "reused": False,
                     "user_engagement": 0.68,
                     "user_motivation": 4
                 },
@@ -907,11 +741,21 @@ class RecommendedActivitiesView(APIView):
             )
         ]
     )
+    @transaction.atomic
     def get(self, request):
         """Create and return persisted physical + mental programs with activity IDs."""
         user = request.user
         
         try:
+            # Reuse today's unfinished programs unless the client asks for new ones.
+            regenerate = str(request.query_params.get('regenerate', '')).lower() in ('1', 'true', 'yes')
+            todays_programs = None if regenerate else self._get_todays_programs(user)
+            if todays_programs is not None:
+                RecommendationDailyStats.record('reused')
+                physical_program, mental_program = todays_programs
+                prefetch_related_objects([physical_program, mental_program], 'activities')
+                return self._programs_response(user, physical_program, mental_program, reused=True)
+
             # Get user's segment
             segment = self._get_user_segment(user)
             segment_id = getattr(user, 'segment_label', 4)
@@ -919,7 +763,8 @@ class RecommendedActivitiesView(APIView):
             
             # Get RL agent's recommended action
             user_state = self._build_user_state(user, segment_id)
-            action = RecommendedActivitiesView.rl_agent.select_action(user_state)
+            rl_agent = get_shared_agent()
+            action = rl_agent.select_action(user_state)
 
             # Keep last action in sync for subsequent RL training endpoints.
             user.last_action_recommended = int(action)
@@ -927,17 +772,7 @@ class RecommendedActivitiesView(APIView):
             user.save(update_fields=['last_action_recommended', 'last_recommendation_date'])
             
             # Get activities using mapped activity segment key
-            segment_activities = ACTIVITIES_BY_SEGMENT.get(activity_segment, {})
-            physical_activities = segment_activities.get("physical", [])
-            all_mental_activities = segment_activities.get("mental", [])
-            mental_activities = [
-                item for item in all_mental_activities
-                if str(item.get("type", "")).lower() != 'journaling'
-            ]
-            # If a segment has too few meditation items, include journaling templates
-            # so we can still build multi-activity sessions.
-            if len(mental_activities) < 2 and all_mental_activities:
-                mental_activities = list(all_mental_activities)
+            physical_activities, mental_activities = get_catalog().session_pool(activity_segment)
             
             # Select activities based on RL action
             selected_activities = self._select_activities_by_action(
@@ -950,7 +785,7 @@ class RecommendedActivitiesView(APIView):
             # Adjust selected activities based on engagement
             adjusted_activities = []
             for activity in selected_activities:
-                adjusted = RecommendedActivitiesView.rl_agent.adjust_activity_difficulty(
+                adjusted = rl_agent.adjust_activity_difficulty(
                     activity, recent_completions.get('avg_engagement', 0.5), 
                     recent_completions.get('engagement_history', [])
                 )
@@ -971,12 +806,16 @@ class RecommendedActivitiesView(APIView):
             if not mental_selected and mental_activities:
                 mental_selected = [random.choice(mental_activities)]
 
+            # Expand catalog items up front so program durations come from the units themselves.
+            physical_units = self._expand_program_units(physical_selected)
+            mental_units = self._expand_program_units(mental_selected)
+
             physical_program = Program.objects.create(
                 user=user,
                 program_type=Program.ProgramType.PHYSICAL,
                 name="Physical Wellness Program",
                 description="Personalized physical wellness activities",
-                duration=f"{sum(self._safe_duration_minutes(item.get('duration')) for item in physical_selected)} minutes",
+                duration=self._program_duration_label(physical_units),
                 frequency="Daily",
                 intensity=self._pick_dominant_intensity(physical_selected),
                 progression="Adjust gradually based on completion and motivation",
@@ -988,7 +827,7 @@ class RecommendedActivitiesView(APIView):
                 program_type=Program.ProgramType.MENTAL,
                 name="Mental Wellness Program",
                 description="Personalized mental wellness activities",
-                duration=f"{sum(self._safe_duration_minutes(item.get('duration')) for item in mental_selected)} minutes",
+                duration=self._program_duration_label(mental_units),
                 frequency="Daily",
                 focus="Stress management and emotional regulation",
                 rl_action_id=action,
@@ -999,35 +838,75 @@ class RecommendedActivitiesView(APIView):
                 program=physical_program,
                 segment=segment,
                 action=action,
-                catalog_activities=physical_selected,
+                units=physical_units,
             )
             created_mental = self._create_program_activities(
                 user=user,
                 program=mental_program,
                 segment=segment,
                 action=action,
-                catalog_activities=mental_selected,
+                units=mental_units,
             )
+            activities_bulk_created(user, created_physical + created_mental)
+            prefetch_related_objects([physical_program, mental_program], 'activities')
+            RecommendationDailyStats.record('generated')
 
-            self._sync_program_duration(physical_program)
-            self._sync_program_duration(mental_program)
-            
-            return Response({
-                "status": "success",
-                "recommendation_note": "Personalized plan generated from your recent progress.",
-                "physical_program": ProgramSerializer(physical_program).data,
-                "mental_program": ProgramSerializer(mental_program).data,
-                "total_activities": len(created_physical) + len(created_mental),
-                "user_engagement": recent_completions.get('avg_engagement', 0.5),
-                "user_motivation": user.motivation_score if hasattr(user, 'motivation_score') else 3
-            }, status=status.HTTP_200_OK)
+            return self._programs_response(
+                user, physical_program, mental_program, reused=False, recent_completions=recent_completions,
+            )
             
         except Exception as e:
+            # Do not leave a half-built recommendation behind.
+            transaction.set_rollback(True)
             return Response({
                 "status": "error",
                 "message": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _get_todays_programs(self, user):
+        """
+        Today's latest physical and mental programs, if both are unfinished and
+        were generated for the user's current RL action; otherwise None.
+        """
+        action = user.last_action_recommended
+        if action is None:
+            return None
+
+        day_start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        latest = {}
+        programs = Program.objects.filter(
+            user=user,
+            created_at__gte=day_start,
+            program_type__in=[Program.ProgramType.PHYSICAL, Program.ProgramType.MENTAL],
+        ).order_by('-created_at', '-id')
+        for program in programs:
+            latest.setdefault(program.program_type, program)
+            if len(latest) == 2:
+                break
+
+        physical = latest.get(Program.ProgramType.PHYSICAL)
+        mental = latest.get(Program.ProgramType.MENTAL)
+        if physical is None or mental is None:
+            return None
+        if any(program.completed or program.rl_action_id != action for program in (physical, mental)):
+            return None
+        return physical, mental
+
+    def _programs_response(self, user, physical_program, mental_program, reused, recent_completions=None):
+        """Success payload for a pair of programs with prefetched activities."""
+        if recent_completions is None:
+            recent_completions = self._get_recent_engagement(user)
+        return Response({
+            "status": "success",
+            "recommendation_note": "Personalized plan generated from your recent progress.",
+            "physical_program": ProgramSerializer(physical_program).data,
+            "mental_program": ProgramSerializer(mental_program).data,
+            "total_activities": len(physical_program.activities.all()) + len(mental_program.activities.all()),
+            "reused": reused,
+            "user_engagement": recent_completions.get('avg_engagement', 0.5),
+            "user_motivation": user.motivation_score if hasattr(user, 'motivation_score') else 3
+        }, status=status.HTTP_200_OK)
+
     def _get_user_segment(self, user):
         """Determine user segment - use stored segment_label from ML model"""
         segment_names = {
@@ -1160,315 +1039,11 @@ class RecommendedActivitiesView(APIView):
 
     def _safe_duration_minutes(self, value):
         """Convert duration values to a positive integer minute value."""
-        try:
-            return max(1, int(round(float(value))))
-        except (TypeError, ValueError):
-            return 10
-
-    def _safe_duration_seconds_from_minutes(self, value):
-        """Convert minute-based duration values to positive integer seconds."""
-        return self._safe_duration_minutes(value) * 60
-
-    def _duration_parts_to_seconds(self, amount, unit):
-        """Convert parsed duration pieces (e.g., 30 + seconds) into seconds."""
-        quantity = max(1, int(amount))
-        unit_text = str(unit or '').lower()
-        if unit_text.startswith('min'):
-            return quantity * 60
-        return quantity
-
-    def _estimate_repetition_seconds(self, low_reps, high_reps=None):
-        """Estimate step duration from repetition counts when no timer is provided."""
-        low = max(1, int(low_reps))
-        high = max(low, int(high_reps)) if high_reps is not None else low
-        average_reps = round((low + high) / 2)
-        # Controlled bodyweight tempo: around 4 seconds per repetition.
-        return min(180, max(20, average_reps * 4))
-
-    def _compact_whitespace(self, text):
-        return re.sub(r'\s+', ' ', str(text or '')).strip()
-
-    def _strip_duration_from_name(self, name):
-        """Remove duration markers from activity names (duration stays in dedicated fields)."""
-        cleaned = self._compact_whitespace(name)
-        if not cleaned:
-            return cleaned
-
-        # Examples: "Brisk Walking: 20 Minutes", "Walking - 10 min (Slow Pace)"
-        cleaned = re.sub(
-            r'\s*[:\-]\s*\d+\s*(?:minutes?|mins?|min)\b',
-            '',
-            cleaned,
-            flags=re.IGNORECASE,
-        )
-        # Examples: "Child's Pose Breathing (3 min)"
-        cleaned = re.sub(
-            r'\s*\(\s*\d+\s*(?:minutes?|mins?|min)\s*\)',
-            '',
-            cleaned,
-            flags=re.IGNORECASE,
-        )
-        # Example fallback: "Brisk Walking 20 Minutes"
-        cleaned = re.sub(
-            r'\s+\d+\s*(?:minutes?|mins?|min)\b\s*$',
-            '',
-            cleaned,
-            flags=re.IGNORECASE,
-        )
-        # Examples: "5-Min Gentle Stretching", "10 minute walking"
-        cleaned = re.sub(
-            r'^\s*\d+\s*[-]?\s*(?:minutes?|mins?|min)\b\s*',
-            '',
-            cleaned,
-            flags=re.IGNORECASE,
-        )
-
-        cleaned = self._compact_whitespace(cleaned).strip(':- ')
-        return cleaned or self._compact_whitespace(name)
-
-    def _build_step_name(self, parent_name, step_text, prefix=None, round_number=None):
-        """Create a short activity name for an extracted step."""
-        parent_name = self._strip_duration_from_name(parent_name)
-        label = self._compact_whitespace(step_text)
-        if '(' in label:
-            label = label.split('(', 1)[0].strip()
-        label = label.rstrip(':').strip()
-        if prefix:
-            label = prefix
-        if not label:
-            label = 'Step'
-
-        name = f"{parent_name} - {label}"
-        if round_number is not None:
-            name = f"{name} (Round {round_number})"
-        return name[:200]
-
-    def _extract_timed_units(self, parent_name, instructions, allow_rep_steps=False):
-        """Extract timed or repetition-based instruction lines into standalone units."""
-        timed_units = []
-        repeat_count = 1
-        repeat_step_templates = []
-
-        def emit_step(step_name, description, seconds, round_number=None, rounds_total=None):
-            duration_seconds = max(1, int(seconds))
-            line_description = description
-            if round_number is not None and rounds_total is not None:
-                line_description = f"{description} (Round {round_number} of {rounds_total})"
-
-            timed_units.append({
-                'activity_name': self._build_step_name(parent_name, step_name, round_number=round_number),
-                'description': line_description,
-                'duration_seconds': duration_seconds,
-                'instructions': [line_description],
-            })
-
-        def flush_repeat_templates(reset_repeat=True):
-            nonlocal repeat_step_templates, repeat_count
-
-            if repeat_step_templates:
-                rounds = repeat_count if repeat_count > 1 else 1
-                if rounds > 1:
-                    for round_number in range(1, rounds + 1):
-                        for template in repeat_step_templates:
-                            emit_step(
-                                template['step_name'],
-                                template['description'],
-                                template['seconds'],
-                                round_number=round_number,
-                                rounds_total=rounds,
-                            )
-                else:
-                    for template in repeat_step_templates:
-                        emit_step(
-                            template['step_name'],
-                            template['description'],
-                            template['seconds'],
-                        )
-
-                repeat_step_templates = []
-
-            if reset_repeat:
-                repeat_count = 1
-
-        def append_step(step_name, description, seconds, force_single=False):
-            nonlocal repeat_step_templates
-
-            if force_single:
-                flush_repeat_templates()
-                emit_step(step_name, description, seconds)
-                return
-
-            if repeat_count > 1:
-                repeat_step_templates.append({
-                    'step_name': step_name,
-                    'description': description,
-                    'seconds': max(1, int(seconds)),
-                })
-                return
-
-            emit_step(step_name, description, seconds)
-
-        timed_step_pattern = re.compile(
-            r'^(?:[-*]\s*)?(?:\d+[\.)]\s*)?(?P<value>\d+)\s*'
-            r'(?P<unit>seconds?|secs?|minutes?|mins?)\s*:\s*(?P<step>.+)$',
-            re.IGNORECASE,
-        )
-        labeled_duration_pattern = re.compile(
-            r'^(?:[-*]\s*)?(?P<label>[A-Za-z][A-Za-z\s\-/]+?)\s*\('
-            r'(?P<value>\d+)\s*(?P<unit>seconds?|secs?|minutes?|mins?)\)\s*:\s*(?P<details>.+)$',
-            re.IGNORECASE,
-        )
-        repeat_pattern = re.compile(r'repeat\s+(?P<count>\d+)\s+times', re.IGNORECASE)
-        movement_pattern = re.compile(
-            r'^(?:[-*]\s*)?(?:\d+[\.)]\s*)?(?P<label>[A-Za-z][A-Za-z0-9\s\'\-/]+?)\s*:\s*(?P<details>.+)$',
-            re.IGNORECASE,
-        )
-        repetition_pattern = re.compile(
-            r'(?P<low>\d+)\s*(?:-\s*(?P<high>\d+))?\s*(?:repetitions?|reps?)\b',
-            re.IGNORECASE,
-        )
-        hold_pattern = re.compile(
-            r'hold\s+(?:for\s+)?(?P<value>\d+)\s*(?P<unit>seconds?|secs?|minutes?|mins?)\b',
-            re.IGNORECASE,
-        )
-        duration_pattern = re.compile(
-            r'(?P<value>\d+)\s*(?P<unit>seconds?|secs?|minutes?|mins?)\b',
-            re.IGNORECASE,
-        )
-        rest_pattern = re.compile(
-            r'^(?:[-*]\s*)?(?:\d+[\.)]\s*)?rest(?:\s+for)?\s+(?P<value>\d+)\s*'
-            r'(?P<unit>seconds?|secs?|minutes?|mins?)\b(?P<details>.*)$',
-            re.IGNORECASE,
-        )
-
-        for raw_line in instructions:
-            line = self._compact_whitespace(raw_line)
-            if not line:
-                continue
-
-            repeat_match = repeat_pattern.search(line)
-            if repeat_match:
-                flush_repeat_templates(reset_repeat=False)
-                repeat_count = max(1, int(repeat_match.group('count')))
-                continue
-
-            if line.lower().startswith(('tips:', 'safety:', 'benefits:', 'goal:')):
-                flush_repeat_templates()
-                continue
-
-            labeled_match = labeled_duration_pattern.match(line)
-            if labeled_match:
-                label = self._compact_whitespace(labeled_match.group('label')).title()
-                details = self._compact_whitespace(labeled_match.group('details'))
-                seconds = self._duration_parts_to_seconds(
-                    labeled_match.group('value'),
-                    labeled_match.group('unit'),
-                )
-                append_step(label, details or label, seconds, force_single=True)
-                continue
-
-            timed_match = timed_step_pattern.match(line)
-            if timed_match:
-                seconds = self._duration_parts_to_seconds(
-                    timed_match.group('value'),
-                    timed_match.group('unit'),
-                )
-                step = self._compact_whitespace(timed_match.group('step'))
-                append_step(step, step, seconds)
-                continue
-
-            if allow_rep_steps:
-                movement_match = movement_pattern.match(line)
-                if movement_match:
-                    label = self._compact_whitespace(movement_match.group('label')).rstrip(':')
-                    details = self._compact_whitespace(movement_match.group('details'))
-
-                    seconds = None
-                    hold_match = hold_pattern.search(details)
-                    if hold_match:
-                        seconds = self._duration_parts_to_seconds(
-                            hold_match.group('value'),
-                            hold_match.group('unit'),
-                        )
-
-                    if seconds is None:
-                        reps_match = repetition_pattern.search(details)
-                        if reps_match:
-                            seconds = self._estimate_repetition_seconds(
-                                reps_match.group('low'),
-                                reps_match.group('high'),
-                            )
-
-                    if seconds is None and label.lower().startswith('rest'):
-                        rest_duration_match = duration_pattern.search(details)
-                        if rest_duration_match:
-                            seconds = self._duration_parts_to_seconds(
-                                rest_duration_match.group('value'),
-                                rest_duration_match.group('unit'),
-                            )
-
-                    if seconds is not None:
-                        append_step(label, f"{label}: {details}", seconds)
-                        continue
-
-                rest_match = rest_pattern.match(line)
-                if rest_match:
-                    rest_text = f"Rest for {rest_match.group('value')} {rest_match.group('unit')}"
-                    rest_details = self._compact_whitespace(rest_match.group('details'))
-                    if rest_details:
-                        rest_text = f"{rest_text} {rest_details}".strip()
-
-                    seconds = self._duration_parts_to_seconds(
-                        rest_match.group('value'),
-                        rest_match.group('unit'),
-                    )
-                    append_step('Rest', rest_text, seconds)
-                    continue
-
-            line_lower = line.lower()
-            if 'cool-down' in line_lower or 'cool down' in line_lower or line_lower.startswith('total:'):
-                flush_repeat_templates()
-
-        flush_repeat_templates()
-        return timed_units
+        return safe_duration_minutes(value)
 
     def _expand_catalog_activity(self, item):
         """Split one catalog activity into atomic timer-friendly units when possible."""
-        instructions = item.get('instructions', [])
-        if not isinstance(instructions, list):
-            instructions = [str(instructions)] if instructions else []
-
-        parent_name = self._strip_duration_from_name(item.get('name', 'Unnamed Activity')) or 'Unnamed Activity'
-        parent_description = self._compact_whitespace(item.get('description', ''))
-        default_seconds = self._safe_duration_seconds_from_minutes(item.get('duration'))
-        activity_type = self._normalize_activity_type(item.get('type'))
-
-        timed_units = self._extract_timed_units(
-            parent_name,
-            instructions,
-            allow_rep_steps=activity_type == 'exercise',
-        )
-        if not timed_units:
-            return [{
-                'activity_name': parent_name,
-                'description': parent_description,
-                'duration_seconds': default_seconds,
-                'duration_minutes': max(1, (default_seconds + 59) // 60),
-                'instructions': instructions,
-            }]
-
-        expanded = []
-        for unit in timed_units:
-            duration_seconds = max(1, int(unit.get('duration_seconds') or default_seconds))
-            expanded.append({
-                'activity_name': unit.get('activity_name', parent_name)[:200],
-                'description': unit.get('description') or parent_description,
-                'duration_seconds': duration_seconds,
-                'duration_minutes': max(1, (duration_seconds + 59) // 60),
-                'instructions': unit.get('instructions') or instructions,
-            })
-
-        return expanded
+        return expand_catalog_activity(item)
 
     def _normalize_intensity(self, value):
         intensity = str(value or 'Moderate').strip().lower()
@@ -1480,7 +1055,7 @@ class RecommendedActivitiesView(APIView):
 
     def _normalize_activity_type(self, value):
         """Normalize catalog activity type to Activity model choices."""
-        return 'exercise' if str(value).lower() == 'exercise' else 'meditation'
+        return normalize_activity_type(value)
 
     def _pick_dominant_intensity(self, activities):
         """Return strongest intensity among selected physical activities."""
@@ -1492,41 +1067,48 @@ class RecommendedActivitiesView(APIView):
                 dominant = normalized
         return dominant
 
-    def _sync_program_duration(self, program):
-        """Refresh program duration string from persisted child activities."""
-        total_seconds = program.activities.aggregate(total=Sum('duration_seconds')).get('total') or 0
-        total_minutes = max(1, (int(total_seconds) + 59) // 60) if total_seconds else 0
-        duration_label = f"{total_minutes} minutes"
+    def _expand_program_units(self, catalog_activities):
+        """Expand selected catalog activities into (catalog item, timed unit) pairs."""
+        return [
+            (item, unit)
+            for item in catalog_activities
+            for unit in self._expand_catalog_activity(item)
+        ]
 
-        if program.duration != duration_label:
-            program.duration = duration_label
-            program.save(update_fields=['duration'])
+    def _program_duration_label(self, units):
+        """Program duration string from the total of its timed units."""
+        total_seconds = sum(unit['duration_seconds'] for _, unit in units)
+        total_minutes = max(1, (int(total_seconds) + 59) // 60) if total_seconds else 0
+        return f"{total_minutes} minutes"
 
-    def _create_program_activities(self, user, program, segment, action, catalog_activities):
-        """Persist selected catalog activities under a program and return created rows."""
-        created = []
+    def _create_program_activities(self, user, program, segment, action, units):
+        """Persist expanded units under a program with one insert and return the rows."""
         now = timezone.now()
+        activities = [
+            Activity(
+                user=user,
+                program=program,
+                activity_name=unit['activity_name'],
+                activity_type=self._normalize_activity_type(item.get('type')),
+                user_segment=segment,
+                rl_action_id=action,
+                description=unit['description'],
+                duration_minutes=unit['duration_minutes'],
+                duration_seconds=unit['duration_seconds'],
+                intensity=self._normalize_intensity(item.get('intensity')),
+                instructions=unit['instructions'],
+                assigned_date=now,
+            )
+            for item, unit in units
+        ]
+        # bulk_create skips Activity.save() and its signals; callers report the
+        # rows to activities_bulk_created once.
+        return Activity.objects.bulk_create(activities)
 
-        for item in catalog_activities:
-            for unit in self._expand_catalog_activity(item):
-                created.append(
-                    Activity.objects.create(
-                        user=user,
-                        program=program,
-                        activity_name=unit['activity_name'],
-                        activity_type=self._normalize_activity_type(item.get('type')),
-                        user_segment=segment,
-                        rl_action_id=action,
-                        description=unit['description'],
-                        duration_minutes=unit['duration_minutes'],
-                        duration_seconds=unit['duration_seconds'],
-                        intensity=self._normalize_intensity(item.get('intensity')),
-                        instructions=unit['instructions'],
-                        assigned_date=now,
-                    )
-                )
 
-        return created
+class ProgramPagination(KeysetPagination):
+    # Backed by program_user_created_idx
+    ordering = ('-created_at', 'id')
 
 
 @extend_schema(tags=['Workout Programs'])
@@ -1536,7 +1118,12 @@ class ProgramListView(APIView):
 
     @extend_schema(
         summary="List User Programs",
-        description="List all persisted programs for the authenticated user. Optionally filter by type.",
+        description=(
+            "List all persisted programs for the authenticated user. Optionally filter by type.\n\n"
+            "Pass `page_size` (then the returned `next` cursor) for cursor pagination, newest first. "
+            "Pass `fields` to return only some fields; nested `activities` are then left out "
+            "unless `expand=activities` is also given."
+        ),
         parameters=[
             OpenApiParameter(
                 name='type',
@@ -1545,14 +1132,50 @@ class ProgramListView(APIView):
                 required=False,
                 enum=['physical', 'mental'],
                 description='Optional program type filter'
-            )
+            ),
+            OpenApiParameter(
+                name='page_size',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Programs per page (max 100); enables cursor pagination'
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Opaque cursor from the previous page'
+            ),
+            OpenApiParameter(
+                name='fields',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Comma-separated program fields to return, e.g. id,name,completion_rate'
+            ),
+            OpenApiParameter(
+                name='expand',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=['activities'],
+                description='Include nested activities when `fields` is given'
+            ),
         ],
         responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
     )
     def get(self, request):
         program_type = request.query_params.get('type')
 
-        programs = Program.objects.filter(user=request.user).prefetch_related('activities')
+        programs = Program.objects.filter(user=request.user)
+        if ProgramSerializer.includes(request, 'activities'):
+            programs = programs.prefetch_related('activities')
+        else:
+            programs = programs.annotate(
+                total_activities_count=Count('activities'),
+                completed_activities_count=Count('activities', filter=Q(activities__completed=True)),
+            )
         if program_type:
             if program_type not in (Program.ProgramType.PHYSICAL, Program.ProgramType.MENTAL):
                 return Response(
@@ -1561,9 +1184,24 @@ class ProgramListView(APIView):
                 )
             programs = programs.filter(program_type=program_type)
 
-        serialized = ProgramSerializer(programs, many=True)
+        paginator = ProgramPagination()
+        page = paginator.paginate_queryset(programs, request, view=self)
+        if page is None:
+            serialized = ProgramSerializer(programs, many=True, context={'request': request})
+            return Response(
+                {"status": "success", "count": len(serialized.data), "programs": serialized.data},
+                status=status.HTTP_200_OK,
+            )
+
+        serialized = ProgramSerializer(page, many=True, context={'request': request})
         return Response(
-            {"status": "success", "count": len(serialized.data), "programs": serialized.data},
+            {
+                "status": "success",
+                "count": len(serialized.data),
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "programs": serialized.data,
+            },
             status=status.HTTP_200_OK,
         )
 
@@ -1763,13 +1401,6 @@ class ActivityFeedbackBatchView(APIView):
     and train the RL agent with session-level engagement feedback.
     """
     permission_classes = [IsAuthenticated]
-    rl_model_manager = RLModelManager(model_dir='api/models')
-    rl_agent = None
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if ActivityFeedbackBatchView.rl_agent is None:
-            ActivityFeedbackBatchView.rl_agent = ActivityFeedbackBatchView.rl_model_manager.load_agent()
     
     @extend_schema(
         summary="Submit Batch Activity Feedback (RL Training)",
@@ -1808,7 +1439,8 @@ class ActivityFeedbackBatchView(APIView):
         **RL Training Details:**
         - `reward_signal`: Calculated from your feedback (higher = better)
         - `action_trained`: Which RL action (0-5) was reinforced
-        - `q_value_updated`: Q-table was updated with new knowledge
+        - `q_value_updated`: false; the Q-table is updated by the `train_rl_agent` job
+        - `transition_queued`: the training sample was queued for that job
         - `epsilon_current`: Exploration rate (decreases over time)
         
         **How RL Learns:**
@@ -1872,6 +1504,7 @@ class ActivityFeedbackBatchView(APIView):
             )
         ]
     )
+    @deferred_statistics()
     def _process_feedback(self, user, activities_data, overall_rating, session_notes):
         """Persist activity feedback, create session metrics, and train RL once per session."""
         if not activities_data:
@@ -1959,21 +1592,18 @@ class ActivityFeedbackBatchView(APIView):
 
         last_action = safe_int_or_default(getattr(user, 'last_action_recommended', None), 5, min_value=0, max_value=5)
 
-        ActivityFeedbackBatchView.rl_agent.update_q_value(
-            user_state, last_action, session.engagement_contribution, user_state
+        # Queue the session-level sample; train_rl_agent applies it to the Q-table
+        record_transition(
+            user, RLTransition.Source.SESSION_FEEDBACK,
+            user_state, last_action, session.engagement_contribution, user_state,
         )
-        ActivityFeedbackBatchView.rl_agent.decay_epsilon()
-
-        ActivityFeedbackBatchView.rl_model_manager.save_agent(ActivityFeedbackBatchView.rl_agent)
 
+        rl_agent = get_shared_agent()
         activity_segment = get_activity_segment_key(segment)
-        next_catalog = ACTIVITIES_BY_SEGMENT.get(activity_segment, {})
-        next_mental = [
-            item for item in next_catalog.get('mental', [])
-            if str(item.get('type', '')).lower() != 'journaling'
-        ]
-        recommendations = ActivityFeedbackBatchView.rl_agent.recommend_activity_modifications(
-            next_catalog.get('physical', []) + next_mental,
+        catalog = get_catalog()
+        recommendations = rl_agent.recommend_activity_modifications(
+            catalog.activities(activity_segment, 'physical')
+            + catalog.mental_activities(activity_segment, include_journaling=False),
             {}  # Would be populated with real engagement history in production
         )
 
@@ -1996,10 +1626,11 @@ class ActivityFeedbackBatchView(APIView):
             "rl_training": {
                 "action_trained": int(last_action),
                 "reward_signal": float(session.engagement_contribution),
-                "q_value_updated": True,
-                "epsilon_current": float(ActivityFeedbackBatchView.rl_agent.epsilon),
-                "total_episodes": ActivityFeedbackBatchView.rl_agent.training_history['episodes'],
-                "total_reward": float(ActivityFeedbackBatchView.rl_agent.training_history['total_reward'])
+                "q_value_updated": False,
+                "transition_queued": True,
+                "epsilon_current": float(rl_agent.epsilon),
+                "total_episodes": rl_agent.training_history['episodes'],
+                "total_reward": float(rl_agent.training_history['total_reward'])
             },
             "activity_recommendations": recommendations
         }